@@ -262,7 +262,7 @@ classify:         wekaClassifier
                       --testCSV           "%%(testing.resultfile)s"
                       --hdrTrain          "%%(training.resultheader)s"
                       --hdrTest           "%%(testing.resultheader)s"
-jobstat:          qstat -j %%(jobid)s
+jobstatus:        qstat
 
 [settings]
 foldids:          %(foldids)s
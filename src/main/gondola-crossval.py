@@ -13,10 +13,15 @@
 import os
 import sys
 import re
+import csv
+import hashlib
+import datetime
 import time
 import shlex
+import pipes
+import getpass
+import subprocess
 import numpy
-import scipy
 
 from ConfigParser import SafeConfigParser as ConfigParser
 from getopt       import getopt, GetoptError
@@ -36,7 +41,86 @@ TRAINING = 'training'
 TESTING  = 'testing'
 
 ## @brief Implemented experiment steps.
-STEPS = ['learn', 'show', 'extract', 'search', 'classify', 'summarize']
+STEPS = ['learn', 'show', 'extract', 'search', 'classify', 'summarize', 'profile']
+
+## @brief Default log file of a task executed by the local process pool.
+LOGFILE = '%(foldid)s/logs/%(task)s.log'
+
+## @brief Default file in which the hash of the inputs of a finished task is stored.
+STAMPFILE = '%(foldid)s/stamps/%(task)s.md5'
+
+## @brief Interval in seconds at which running local processes are polled.
+POLL_INTERVAL = 0.5
+
+## @brief Significance level of bootstrap confidence intervals.
+BOOTSTRAP_ALPHA = 0.05
+
+## @brief Seed of random number generator used to draw bootstrap samples.
+BOOTSTRAP_SEED = 0
+
+## @brief Commands which accept the --numSlots option (see "slots" setting).
+SLOTS_COMMANDS = ['wekaParamSearchForClassifier', 'wekaClassifier', 'wekaClassifierWithProbability']
+
+## @brief Modes of the evaluation of the classifiers on the training data
+#         (see "evaluation" option of [training] section), default first.
+TRAINING_EVALUATION_MODES = ['full', 'summary', 'none']
+
+## @brief Modes of the best parameter search (see "searchmode" option of
+#         [settings] section), default first.
+SEARCH_MODES = ['grid', 'halving']
+
+## @brief Default file to which the start, end, and failure of each task is appended.
+JOURNALFILE = 'journal.csv'
+
+## @brief Columns of journal file.
+JOURNAL_COLUMNS = ['time', 'run', 'event', 'foldid', 'task', 'jobid', 'outputs', 'message']
+
+## @brief Journal events which indicate that the outputs of a task were complete.
+JOURNAL_DONE_EVENTS = ['finished', 'uptodate']
+
+## @brief Journal events which indicate that a task was started but did not finish.
+JOURNAL_RESUME_EVENTS = ['started', 'submitted', 'interrupted']
+
+## @brief Default file to which the resource usage of each task is appended.
+TIMINGSFILE = 'timings.csv'
+
+## @brief Columns of timings file.
+TIMINGS_COLUMNS = ['run', 'foldid', 'step', 'task', 'executor', 'jobid', 'state',
+                   'exitcode', 'start', 'wall', 'cpu', 'maxrss']
+
+## @brief Number of slowest tasks listed by the profile step.
+PROFILE_NUM_TASKS = 10
+
+## @brief Minimum interval in seconds at which the status of batch jobs is queried.
+JOBSTAT_MIN_INTERVAL = 5
+
+## @brief Maximum interval in seconds at which the status of batch jobs is queried.
+JOBSTAT_MAX_INTERVAL = 300
+
+## @brief Factor by which the job status interval is increased if no job finished.
+JOBSTAT_BACKOFF = 1.5
+
+## @brief Maximum time in seconds to wait for the accounting record of a SGE
+#         batch job which is no longer listed by qstat.
+JOBACCT_TIMEOUT = 600
+
+## @brief Job states reported by the "jobstatus" command which indicate a failed job.
+#
+# Includes the error states of SGE and the failure states of SLURM in both
+# short and long form. The states are compared case-insensitive.
+JOB_FAILED_STATES = ['e', 'eqw', 'ehqw', 'er', 'failed', 'f', 'ca', 'cancelled',
+                     'to', 'timeout', 'nf', 'node_fail', 'bf', 'boot_fail',
+                     'oom', 'out_of_memory', 'dl', 'deadline']
+
+## @brief Job states reported by the "jobstatus" command which indicate a finished job.
+JOB_DONE_STATES = ['done', 'cd', 'completed']
+
+## @brief Index of the column with the job state in the output of known job
+#         status commands. The state is in the second column otherwise.
+JOBSTATUS_STATE_COLUMNS = {'qstat': 4}
+
+## @brief Names of executors which can be selected by the "executor" setting.
+EXECUTORS = ['serial', 'pool', 'sge', 'slurm', 'script']
 
 ## @brief Maps meta-classifier name to name of underlying core classifier.
 META_TO_CORE_CLASSIFIER = {
@@ -75,12 +159,17 @@ Description:
   5. classify     Classify both training and testing data using the found best
                   parameters. The classification results are stored in CSV format.
   6. summarize    Generate performance report for each classifier.
+  7. profile      Print the slowest tasks and the time spent in each step
+                  as recorded in the timings file (see "timingsfile" below).
 
 Required arguments:
   <step>                    Step to perform. Note that this argument can be given multiple
-                            times and that the named steps are executed in the order they
-                            appear in the argument list. If 'all' is given, every step is
-                            executed in the order specified above.
+                            times. The named steps are executed for each fold in the order
+                            specified above, where each step of a fold is started as soon
+                            as the previous steps of this fold are finished, regardless of
+                            the progress of the other folds. The summarize step is performed
+                            after all other steps of all folds are finished. If 'all' is
+                            given, every step is executed.
  
 Optional arguments:
   -c, --configfile <file>   Configuration file for this program.
@@ -90,12 +179,46 @@ Optional arguments:
                             configuration file. This option, if specified, overwrites
                             this configuration option. It can be used in particular to
                             only run the experiment for a subset of all folds.
+  -j, --jobs <n>            Maximum number of tasks, i.e., commands for one fold or one
+                            fold and classifier, which are executed in parallel on the
+                            local machine. If greater than one, the output of each task
+                            is written to a separate log file (see 'logfile' option below)
+                            and the exit status of each task is checked when it finished.
+                            (default: 1)
+  --slots <n>               Number of threads used by the search and classify commands to
+                            train the members of ensemble classifiers such as Bagging and
+                            Random Forest in parallel. Overwrites the "slots" option of the
+                            [%(SETTINGS)s] section. Note that up to --jobs times this number
+                            of threads are run on the local machine. (default: 1)
+  --executor <name>         Name of executor which runs the tasks, i.e., one of "serial"
+                            (one after the other), "pool" (local processes in parallel),
+                            "sge" (SGE batch jobs), "slurm" (SLURM batch jobs), or "script"
+                            (user-defined commands, see below). Overwrites the "executor"
+                            option of the [%(SETTINGS)s] section. (default: "pool" if more
+                            than one job is allowed and "serial" otherwise)
   --continue                Continue learning after previous run was interrupted.
+  --resume                  Resume an experiment which was interrupted or in which tasks
+                            failed. Tasks whose last entry in the journal (see 'journalfile'
+                            below) reports that they finished are skipped without checking
+                            their inputs as long as their output files exist and none of
+                            the tasks they depend on is executed again. All other tasks are
+                            executed unless they are up to date, where the --continue option
+                            is added to the command of learn tasks which were started but
+                            did not finish.
+  --force                   Execute tasks even if their outputs are up to date. By default,
+                            a task is skipped if its output files exist and neither its
+                            input files nor the parameters of its command changed since
+                            it was last executed successfully (see 'stampfile' below).
   -m, --macroavg            Instead of collecting all data into a single CSV table
                             and compute the average accuracy from this table, compute
                             the average for each cross-validation fold first and
                             finally compute the average of these averaged results.
                             The standard deviation is reported if this option is given.
+  --bootstrap <n>           Number of bootstrap replicates used by the summarize step to
+                            compute %(BOOTSTRAP_LEVEL)g%% percentile confidence intervals of the
+                            accuracy and the recall of each class by resampling the pooled
+                            predictions of all folds. Overwrites the "bootstrap" option of
+                            the [%(SETTINGS)s] section. (default: 0, i.e., no intervals)
   -v, --verbose             Increase verbosity of output messages.
   -s, --simulate            Simulate execution, i.e., print commands that would be
                             executed only without actually executing them.
@@ -115,7 +238,116 @@ Configuration:
   show:        Command to save basis vectors to images.
   extract:     Command to extract the features.
   search:      Command to find the best parameters for each classifier.
-  classify:    Command to train classifiers and classify data samples.
+  classify:    Command to train classifiers and classify data samples. Add the
+               option "--modelCache <dir>" to the wekaClassifier command to store
+               the trained classifiers and reuse them when the test data changed.
+               Add the option "--dataCache <dir>" to both the search and the
+               classify command to preprocess the training data of each fold
+               only once and share it between these steps.
+  jobstatus:   Command to query the state of submitted batch jobs, where %%(jobids)s
+               is substituted by the comma separated list of IDs of all jobs which
+               are not finished yet. Each output line which starts with the ID of
+               one of these jobs reports its state in the second column, or in the
+               fifth column if the command is qstat. If this state is an error or
+               failure state such as "Eqw", "F", or "FAILED", the job failed.
+               If it is "CD", "COMPLETED", or "done", the job finished.
+               Otherwise, the job is still queued or running. Jobs which are not
+               listed are considered finished. Any script which prints lines of
+               the form "<jobid> <state>" can thus be used. The state of the
+               jobs is queried in increasing intervals from %(JOBSTAT_MIN_INTERVAL)d up to %(JOBSTAT_MAX_INTERVAL)d
+               seconds while none of the jobs finished.
+  jobstat:     Command to query whether a single batch job with ID %%(jobid)s is
+               still queued or running, i.e., exits with status zero if so.
+               Used only if no "jobstatus" command is configured.
+  submit:      Command used by the "script" executor to submit a task, where
+               %%(command)s is substituted by the shell-quoted command of the task,
+               %%(name)s by the name of the job, and %%(logfile)s by the log file.
+               The last word of the output of this command must be the job ID.
+  cancel:      Command used by the "script" executor to cancel the jobs with the
+               comma separated IDs %%(jobids)s when the execution is interrupted.
+
+  The optional "jobs" and "logfile" options of the [%(SETTINGS)s] section set the
+  default number of tasks executed in parallel and the log file of each task
+  relative to the experiment directory, respectively, where %%(task)s is the
+  name of the task such as "learn", "extract-testing", or "classify-SMO".
+  The wall time, CPU time, peak resident set size, and exit code of each
+  executed task are appended to the CSV file named by the "timingsfile" option
+  (default: %(TIMINGSFILE)s). For batch jobs, these are taken from the accounting
+  of the batch queuing system if available (qacct or sacct). Otherwise, the
+  wall time is the time from submission until the job was found to be finished.
+
+  The optional "slots" option of the [%(SETTINGS)s] section sets the number of
+  threads used to train the members of ensemble classifiers (see --slots).
+  If greater than one, the option "--numSlots <n>" is added to the search and
+  classify commands if these are wekaParamSearchForClassifier, wekaClassifier,
+  or wekaClassifierWithProbability. As the number of threads does not change
+  the results, it is not considered when checking whether a task is up to
+  date. Batch jobs should request the same number of cores using the
+  "submitargs" option.
+
+  The optional "searchmode" option of the [%(SETTINGS)s] section selects how the
+  search command finds the best parameters: "grid" (default) cross-validates
+  all parameter combinations or, for most classifiers and datasets of more
+  than 10 instances, searches them by Weka's GridSearch, while "halving"
+  evaluates all combinations on one fold only and the best of them on more
+  folds by successive halving.
+  The option "--searchMode <mode>" is added to the search command, which thus
+  must be wekaParamSearchForClassifier.
+  As the search mode changes the results, the search is repeated when it was
+  changed.
+
+  The optional "probabilityfile" options of the [%(TRAINING)s] and [%(TESTING)s]
+  sections name the CSV files to which the class probabilities estimated by
+  each classifier are written. These files are passed to the classify command
+  using the --trainProbCSV and --testProbCSV options, respectively, such that
+  wekaClassifier outputs the predicted labels, the class probabilities, and
+  the training summary after training each classifier only once. The
+  probabilities are written with one column per class, or as NumPy array if
+  the file name ends with ".npy".
+
+  The optional "evaluation" option of the [%(TRAINING)s] section selects which
+  results of the classifiers on the training data are written to the training
+  "resultfile" by the wekaClassifier command (see its --trainEval option):
+  "full" (default) writes the predicted label of each training sample and the
+  summary of the training evaluation, "summary" writes only the summary, and
+  "none" skips the evaluation on the training data altogether, which saves
+  the time of classifying the training data when only the test results are
+  of interest. In the latter case, the training "resultfile" is not written
+  and thus may be the same for all classifiers when their results are combined
+  (see below). The summarize step only reads the testing results.
+
+  The "executor" option selects how tasks are run (see --executor option).
+  When tasks are run locally, the classify tasks of a fold are run by a single
+  wekaClassifier process using its --manifest option such that the training
+  and testing data is only read once. Set the "manifest" option to false to
+  run a separate process for each classifier instead. If the "resultfile"
+  options of the [%(TRAINING)s] and [%(TESTING)s] sections do not depend on
+  %%(classifier)s, a single wekaClassifier task per fold named "classify"
+  trains all classifiers on the same preprocessed data using the best
+  parameters read by wekaClassifier from the "bestparamsfile". The results of
+  all classifiers are then written to one combined table per fold, where the
+  name of the classifier is appended to the result columns, e.g.,
+  "ClassLabel-SMO-actual". In this case, %%(classifier)s is substituted by the
+  comma separated list of classifiers in the classify command.
+  The "sge" and "slurm" executors submit each task as batch job using qsub
+  or sbatch, respectively, where the optional "submitargs" option specifies
+  additional arguments such as the queue name. The state of these jobs is
+  queried using qstat or squeue and sacct unless a "jobstatus" command is
+  configured. A SGE job which is no longer listed is only considered finished
+  once qacct reports its exit status, which is retried for up to %(JOBACCT_TIMEOUT)d
+  seconds before the job is considered failed. Hence, the same [%(COMMANDS)s] can be used on a local machine
+  and on a cluster. Commands which submit a SGE job themselves, e.g., using
+  "qsub gondola-sbia learn", are still supported by the local executors.
+  Similarly, the optional "stampfile" option sets the file in which the hash of
+  the inputs of a task is stored after it finished successfully.
+  (default: %%(foldid)s/stamps/%%(task)s.md5)
+  Each time a task is started, submitted as batch job, finished, failed, skipped,
+  found to be up to date, or interrupted, a line with the time, the event, the
+  fold ID, the task name, the job ID, the output files, and an optional message
+  is appended to the CSV file named by the "journalfile" option (default:
+  %(JOURNALFILE)s). Each line is written to disk immediately. The last line of a
+  task thus tells whether it finished even if this program was killed. Tasks
+  which were started but have no later entry were interrupted.
 
   the commands that can be used and are included with the GONDOLA package are
   "gondola learn", "gondola-sbia learn", and "gondola-sbia-sge learn" for the
@@ -147,12 +379,14 @@ Example configuration:
   extract:          gondola
   search:           wekaParamSearchForClassifier -i -w
   classify:         wekaClassifier
-  jobstat:          qstat -j %%(jobid)s
+  jobstatus:        qstat
 
   [%(SETTINGS)s]
   foldids:          1, 2, 3, 4, 5
   classifiers:      Logistic, SMO, Simple Logistic, Bayesian, Random Forest
   summaryfile:      Summary for %%(classifer)s Classifier.txt
+  jobs:             8
+  logfile:          %%(foldid)s/logs/%%(task)s.log
 
   [%(TRAINING)s]
   configfile:       gondola.cfg
@@ -191,15 +425,26 @@ Examples:
   %(EXENAME)s all
 
     This command performs all steps of the cross-validation experiment at once.
+    The features of a fold are extracted as soon as the basis vectors of this
+    fold were learned, and so on. If a step of a fold fails, the following steps
+    of this fold are skipped while the other folds are processed further.
 
-    Note that this command will not detect if a step failed if this step was
-    performed as parallel job using a batch queuing system, e.g., when the
-    command gondola-sbia is used at SBIA in place of gondola. Therefore, check
-    the log files to verify that each step was successful or simply run each
-    step separately instead.
+    If a command submits a batch job, e.g., when the command gondola-sbia is
+    used at SBIA in place of gondola, the status of this job is queried using
+    the "jobstatus" command to determine when the next step of this fold can be
+    started. Note that the exit status of batch jobs is only known if reported
+    by this command. Therefore, check the log files of the batch jobs to verify
+    that each step was successful. If the --nosync option is given, batch jobs
+    are not waited for.
 """ % \
     {
         'EXENAME':  basis.exename(),
+        'TIMINGSFILE': TIMINGSFILE,
+        'JOURNALFILE': JOURNALFILE,
+        'BOOTSTRAP_LEVEL': 100.0 * (1.0 - BOOTSTRAP_ALPHA),
+        'JOBSTAT_MIN_INTERVAL': JOBSTAT_MIN_INTERVAL,
+        'JOBSTAT_MAX_INTERVAL': JOBSTAT_MAX_INTERVAL,
+        'JOBACCT_TIMEOUT':      JOBACCT_TIMEOUT,
         'COMMANDS': COMMANDS,
         'SETTINGS': SETTINGS,
         'TRAINING': TRAINING,
@@ -238,114 +483,306 @@ def bestparams(bestparamsfile, classifier):
     return param, extraparam
 
 # ----------------------------------------------------------------------------
-def accuracy(p, colname='ClassLabel'):
-    # find out how many classes are in the experiment
-    numSamples = {}      # this is a list containing list of labels
-    labels = p.column(col=2)[1]   # get the column of the actual labels
-    for l in labels:
-        if not(l in numSamples.keys()):
-            numSamples.update({l:0})
-    numLabels = len(numSamples.keys()) 
-    # count number of samples per class
-    labels = p.column(col=2)[1]
-    for l in labels:
-        numSamples[l] = numSamples[l] + 1  
-    numLabels = len(numSamples.keys())
-    confusionMatrix = scipy.mat( numpy.zeros( (numLabels,numLabels) ) ) 
-    hdr_actual = '%s-actual' % colname
-    hdr_predic = '%s-prediction' % colname
-    mapLabels = {}
-    cnt = 0
-    for l in numSamples.keys():
-       mapLabels.update({l:cnt})
-       cnt = cnt + 1
-    confusionMatrix = scipy.mat( numpy.zeros( (numLabels,numLabels) ) )  
-    hdr_actual = '%s-actual' % colname
-    hdr_predic = '%s-prediction' % colname
-    actualLabels = p.column(hdr_actual)
-    predictLabels = p.column(hdr_predic)
-    for cnt in range(0,len(actualLabels[0])):
-        pLabel = mapLabels[predictLabels[1][cnt]]     # predicted label
-        aLabel = mapLabels[actualLabels[1][cnt]]      # actual Label
-        if ( not(  predictLabels[0][cnt] ==   actualLabels[0][cnt]   ) ):     # it is just a sanity check, this event should happen ever. Just to make sure that it is comparing the same subject
-              assert False, "This event should NOT happend ever !!! Are you sure you are using the correct Pyxel version??? I am comparing labels of two different subjects !! " 
-        confusionMatrix[aLabel,pLabel] = confusionMatrix[aLabel,pLabel] + 1.0
-    return confusionMatrix
- 
+## @brief Get names of classifiers listed in CSV file of best parameters.
+#
+# @param [in] bestparamsfile CSV file generated by bestparam search.
+#
+# @returns Names of classifiers, i.e., row headers, or an empty list if the
+#          file does not exist.
+def listclassifiers(bestparamsfile):
+    if not os.path.isfile(bestparamsfile): return []
+    f = open(bestparamsfile, 'rb')
+    try:
+        return [row[0].strip() for row in csv.reader(f) if row][1:]
+    finally:
+        f.close()
+
+# ----------------------------------------------------------------------------
+## @brief Get arguments which set the number of threads of a command.
+#
+# @param [in] cfg  ConfigParser object.
+# @param [in] step Name of step, i.e., of the command in the [commands] section.
+#
+# @returns Arguments "--numSlots <n>" if the "slots" setting is greater than
+#          one and the command accepts this option, an empty list otherwise.
+def slotsargs(cfg, step):
+    slots   = cfg.getint(SETTINGS, 'slots')
+    command = os.path.basename(shlex.split(cfg.get(COMMANDS, step, 1))[0])
+    if slots > 1 and os.path.splitext(command)[0] in SLOTS_COMMANDS:
+        return ['--numSlots', str(slots)]
+    return []
+
+# ----------------------------------------------------------------------------
+## @brief Get mode of the evaluation of the classifiers on the training data.
+#
+# @param [in] cfg ConfigParser object.
+#
+# @returns Value of the "evaluation" option of the [training] section, i.e.,
+#          "full" (default), "summary", or "none".
+def trainingevaluation(cfg):
+    if not cfg.has_option(TRAINING, 'evaluation'): return TRAINING_EVALUATION_MODES[0]
+    mode = cfg.get(TRAINING, 'evaluation', 1).strip().lower()
+    if not mode in TRAINING_EVALUATION_MODES:
+        raise Exception("Invalid value for option 'evaluation' of [%s] section: %s" % (TRAINING, mode))
+    return mode
+
+# ----------------------------------------------------------------------------
+## @brief Get mode of the best parameter search.
+#
+# @param [in] cfg ConfigParser object.
+#
+# @returns Value of the "searchmode" option of the [settings] section, i.e.,
+#          "grid" (default) or "halving".
+def searchmode(cfg):
+    if not cfg.has_option(SETTINGS, 'searchmode'): return SEARCH_MODES[0]
+    mode = cfg.get(SETTINGS, 'searchmode', 1).strip().lower()
+    if not mode in SEARCH_MODES:
+        raise Exception("Invalid value for option 'searchmode' of [%s] section: %s" % (SETTINGS, mode))
+    return mode
+
+# ----------------------------------------------------------------------------
+## @brief Whether the results of all classifiers are written to the same files.
+#
+# This is the case if the classify command is wekaClassifier, more than one
+# classifier is configured, and neither the "resultfile" option of the
+# [training] nor of the [testing] section depends on %(classifier)s, where
+# the former is ignored if the classifiers are not evaluated on the training
+# data (see trainingevaluation()). The classify step then runs a single task
+# per fold which trains and evaluates all classifiers on the same data, and
+# the name of each classifier is appended to the result columns of this
+# classifier.
+#
+# @param [in] cfg ConfigParser object.
+def combinedresults(cfg):
+    classifiers = [c.strip() for c in cfg.get(SETTINGS, 'classifiers').split(',')]
+    if len(classifiers) < 2: return False
+    command = os.path.basename(shlex.split(cfg.get(COMMANDS, 'classify', 1))[0])
+    if os.path.splitext(command)[0] != 'wekaClassifier': return False
+    sections = [TESTING]
+    if trainingevaluation(cfg) != 'none': sections.append(TRAINING)
+    for section in sections:
+        if '%(classifier)s' in cfg.get(section, 'resultfile', 1): return False
+    return True
+
+# ----------------------------------------------------------------------------
+## @brief Read actual and predicted labels from result CSV file.
+#
+# The columns are located by their headers "<colname>-actual" and
+# "<colname>-prediction". Rows without actual or predicted label, such as
+# the rows of training samples or of the summary of the training evaluation,
+# are ignored.
+#
+# @param [in] resultfile CSV file written by the classify step.
+# @param [in] colname    Name of result column without suffix.
+#
+# @returns Tuple of NumPy arrays of actual and predicted labels, respectively.
+def readlabels(resultfile, colname):
+    rows = []
+    if os.path.isfile(resultfile):
+        f = open(resultfile, 'rb')
+        try:
+            reader = csv.reader(f)
+            header = [hdr.strip() for hdr in reader.next()]
+            try:
+                actual    = header.index('%s-actual'     % colname)
+                predicted = header.index('%s-prediction' % colname)
+            except ValueError:
+                raise Exception("File %s\nhas no columns %s-actual and %s-prediction !!!" % (resultfile, colname, colname))
+            for row in reader:
+                if len(row) <= max(actual, predicted): continue
+                if not row[actual].strip() or not row[predicted].strip(): continue
+                rows.append((row[actual].strip(), row[predicted].strip()))
+        finally:
+            f.close()
+    if not rows:
+        raise Exception("File %s\ndoes either not exist or contains no data rows !!!" % resultfile)
+    return (numpy.array([row[0] for row in rows]), numpy.array([row[1] for row in rows]))
+
+# ----------------------------------------------------------------------------
+## @brief Compute confusion matrices of multiple result tables.
+#
+# @param [in] tables List of tuples of actual and predicted labels as returned
+#                    by readlabels().
+#
+# @returns Tuple of sorted list of class labels and list of confusion matrices,
+#          one for each table, where rows correspond to the actual labels and
+#          columns to the predicted labels.
+def confusion(tables):
+    labels = numpy.concatenate([numpy.concatenate(table) for table in tables])
+    # sort numeric labels by value instead of lexicographically
+    try:
+        labels = labels.astype(float)
+    except ValueError:
+        pass
+    (classes, codes) = numpy.unique(labels, return_inverse=True)
+    n = len(classes)
+    matrices = []
+    offset   = 0
+    for (actual, predicted) in tables:
+        m = len(actual)
+        a = codes[offset     : offset + m]
+        p = codes[offset + m : offset + 2 * m]
+        matrices.append(numpy.bincount(a * n + p, minlength=n * n).reshape((n, n)))
+        offset += 2 * m
+    if classes.dtype.kind == 'f':
+        classes = ['%g' % c for c in classes]
+    else:
+        classes = [str(c) for c in classes]
+    return (classes, matrices)
+
+# ----------------------------------------------------------------------------
+## @brief Compute performance measures from confusion matrix.
+#
+# @returns Dictionary of accuracy, balanced accuracy (mean recall of classes
+#          with samples), per-class precision, recall, and F1-score, and the
+#          macro averages over classes with samples and micro averages of
+#          these per-class measures.
+def metrics(cm):
+    cm        = cm.astype(float)
+    tp        = numpy.diag(cm)
+    support   = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    total     = cm.sum()
+    recall    = tp / numpy.maximum(support,   1.0)
+    precision = tp / numpy.maximum(predicted, 1.0)
+    f1        = 2.0 * precision * recall / numpy.maximum(precision + recall, 1e-12)
+    accuracy  = tp.sum() / max(total, 1.0)
+    # classes without samples in the pooled folds do not enter the averages
+    present   = support > 0
+    return {
+        'accuracy':        accuracy,
+        'balanced':        recall[present].mean(),
+        'support':         support,
+        'precision':       precision,
+        'recall':          recall,
+        'f1':              f1,
+        'macro.precision': precision[present].mean(),
+        'macro.recall':    recall[present].mean(),
+        'macro.f1':        f1[present].mean(),
+        # each misclassified sample is a false positive of one class and a
+        # false negative of another, hence, micro averages equal the accuracy
+        'micro.precision': accuracy,
+        'micro.recall':    accuracy,
+        'micro.f1':        accuracy
+    }
+
+# ----------------------------------------------------------------------------
+## @brief Format confusion matrix and performance measures.
+#
+# @returns List of lines.
+def format_metrics(classes, cm, m):
+    width = max([len(c) for c in classes] + [len(str(cm.max())), 9])
+    lines = ['  %-*s  %s' % (width, 'actual', ' '.join(['%*s' % (width, c) for c in classes]))]
+    for i in range(len(classes)):
+        lines.append('  %-*s  %s' % (width, classes[i], ' '.join(['%*d' % (width, v) for v in cm[i]])))
+    lines.append('')
+    lines.append("Normalized trace of confusion matrix: %f" % m['accuracy'])
+    lines.append("Balanced accuracy: %f" % m['balanced'])
+    lines.append('')
+    lines.append('  %-*s  %9s  %9s  %9s  %9s' % (width, 'class', 'samples', 'precision', 'recall', 'F1'))
+    for i in range(len(classes)):
+        lines.append('  %-*s  %9d  %9.4f  %9.4f  %9.4f' % (width, classes[i], m['support'][i],
+                                                           m['precision'][i], m['recall'][i], m['f1'][i]))
+    for avg in ('macro', 'micro'):
+        lines.append('  %-*s  %9d  %9.4f  %9.4f  %9.4f' % (width, avg + ' avg', m['support'].sum(),
+                                                           m[avg + '.precision'], m[avg + '.recall'], m[avg + '.f1']))
+    return lines
+
+# ----------------------------------------------------------------------------
+## @brief Compute bootstrap confidence intervals of accuracy and class recalls.
+#
+# Resampling the n pooled predictions with replacement is equivalent to
+# drawing the cells of the confusion matrix from a multinomial distribution
+# with n trials and the observed cell frequencies as probabilities. Hence,
+# all replicates are drawn at once as a matrix of cell counts, from which the
+# performance measures of each replicate are computed by NumPy. The random
+# number generator is seeded with BOOTSTRAP_SEED such that the results are
+# reproducible.
+#
+# @param [in] cm         Pooled confusion matrix.
+# @param [in] replicates Number of bootstrap replicates.
+#
+# @returns Dictionary with lower and upper percentiles of the accuracy,
+#          balanced accuracy, and the recall of each class, respectively.
+def bootstrap(cm, replicates):
+    n        = len(cm)
+    total    = cm.sum()
+    random   = numpy.random.RandomState(BOOTSTRAP_SEED)
+    counts   = random.multinomial(total, cm.ravel() / float(total), size=replicates)
+    counts   = counts.reshape((replicates, n, n))
+    tp       = numpy.diagonal(counts, axis1=1, axis2=2).astype(float)
+    support  = counts.sum(axis=2).astype(float)
+    accuracy = tp.sum(axis=1) / total
+    # classes not drawn in a replicate are excluded from its balanced accuracy
+    support[support == 0] = numpy.nan
+    recall   = tp / support
+    balanced = numpy.nanmean(recall, axis=1)
+    q = [50.0 * BOOTSTRAP_ALPHA, 100.0 - 50.0 * BOOTSTRAP_ALPHA]
+    return {
+        'accuracy': numpy.percentile(accuracy, q),
+        'balanced': numpy.nanpercentile(balanced, q),
+        'recall':   [numpy.nanpercentile(recall[:, c], q) for c in range(n)]
+    }
+
 # ----------------------------------------------------------------------------
 # this function summarize the results into text and csv files
-def write_summary(classifier, csvTrainFile_List, csvTestFile_List, resFile, aveMode, colname):
+#
+# The result tables of all folds are read once and the confusion matrix of
+# each fold is computed by a single bincount. The confusion matrix of all
+# folds is the sum of these. With aveMode=1, this pooled confusion matrix is
+# reported. With aveMode=2, the confusion matrix of each fold is reported
+# followed by the mean and standard deviation of the measures over all folds.
+# Both the pooled and the averaged accuracies are reported in either case.
+# If the number of bootstrap replicates is positive, percentile confidence
+# intervals of the pooled accuracy and class recalls are reported as well.
+def write_summary(classifier, csvTrainFile_List, csvTestFile_List, resFile, aveMode, colname, replicates=0):
     if not aveMode in [1, 2]:
         assert False, "Invalid value for aveMode parameter of write_summary() function: %s" % repr(aveMode)
-    # find out home many classes are in the experiment
-    numSamples = {}      # this is a list containing list of labels
-    for fn in csvTestFile_List:
-        p = pyxel.Pyxel(fn)
-        if len(p) > 1:                  # first row are the column headers
-            labels = p.column(col=2)[1] # get the column of the actual labels
-            for l in labels:
-                if not(l in numSamples.keys()):
-                    numSamples.update({l:0})
-        else:
-            raise Exception("File %s\ndoes either not exist or contains no data rows !!!" % fn)
-    numLabels = len(numSamples.keys()) 
-    # read all test csv files and keep them into a single file
-    totalNumSamplesPerClass = []
-    res_test = pyxel.Pyxel()
-    for fn in csvTestFile_List:
-        p = pyxel.Pyxel(fn)
-        totalNumSamplesPerClass.append(len(p.getIds()))
-        res_test = res_test + p
-        res_test.contract()
-    # count number of samples per class
-    labels = res_test.column(col=2)[1]
-    for l in labels:
-        numSamples[l] = numSamples[l] + 1.0  
-    # Do one of the following: aveMode=1) collect accuracy of all experiments and avearge, or aveMode=2) collect all csv file into one csv file and compute average
-    if aveMode == 1:
-        confusionMatrix = accuracy(res_test, colname)
-    else:
-        confusionMatrix = [] 
-        for fn in csvTestFile_List:
-            p = pyxel.Pyxel(fn)
-            tmpConfMatrix = accuracy(p, colname)
-            confusionMatrix.append(tmpConfMatrix)
+    # read all test csv files and compute confusion matrices
+    tables = [readlabels(fn, colname) for fn in csvTestFile_List]
+    (classes, matrices) = confusion(tables)
+    pooled  = sum(matrices)
+    results = [metrics(cm) for cm in matrices]
+    overall = metrics(pooled)
     # write a report to the text file
-    text_file = open(resFile, "a+")
-    sys.stdout.write('\n'); text_file.write('\n')
+    lines = ['']
     if aveMode == 1:
         line = "Confusion matrix of %s classifier" % classifier
     else:
         line = "Confusion matrices of %s classifier" % classifier
-    line = ' '.join([line, "(numbers of classified samples NOT percentages):\n"])
-    print line; text_file.write(line + '\n')
+    lines.append(' '.join([line, "(numbers of classified samples NOT percentages):\n"]))
     if aveMode == 1:
-        for l in confusionMatrix:
-            line = str(l)
-            print line; text_file.write(line + '\n')
-        sys.stdout.write('\n'); text_file.write('\n')
-        line = "Normalized trace of confusion matrix: " + str(confusionMatrix.trace()/numpy.sum(totalNumSamplesPerClass))
-        print line; text_file.write(line + '\n')
+        lines.extend(format_metrics(classes, pooled, overall))
     else:
-        cnt = 0
-        accList = []
-        for cfMat in confusionMatrix:
-            if cnt > 0:
-                sys.stdout.write('\n'); text_file.write('\n')
-            line = "Confusion matrix %d =" % (cnt + 1)
-            print line; text_file.write(line + '\n')
-            for l in cfMat:
-                line = str(l) 
-                print line; text_file.write(line + '\n')
-            line = "\n"
-            print line; text_file.write(line + '\n')
-            line = "Normalized trace of confusion matrix: " + str(cfMat.trace()/totalNumSamplesPerClass[cnt])
-            print line; text_file.write(line + '\n')
-            accList.append(cfMat.trace()/totalNumSamplesPerClass[cnt])
-            cnt = cnt + 1
-        line = "Average accuracy [standard deviation]: %f [%f] " % (numpy.mean(accList), numpy.std(accList))
-        print line; text_file.write(line + '\n')
-    sys.stdout.write('\n'); text_file.write('\n')
+        for cnt in range(len(matrices)):
+            if cnt > 0: lines.append('')
+            lines.append("Confusion matrix %d =" % (cnt + 1))
+            lines.extend(format_metrics(classes, matrices[cnt], results[cnt]))
+    lines.append('')
+    accList      = numpy.array([m['accuracy'] for m in results])
+    balancedList = numpy.array([m['balanced'] for m in results])
+    macroF1List  = numpy.array([m['macro.f1'] for m in results])
+    lines.append("Pooled accuracy of all folds: %f" % overall['accuracy'])
+    lines.append("Pooled balanced accuracy of all folds: %f" % overall['balanced'])
+    lines.append("Average accuracy [standard deviation]: %f [%f] " % (accList.mean(), accList.std()))
+    lines.append("Average balanced accuracy [standard deviation]: %f [%f] " % (balancedList.mean(), balancedList.std()))
+    lines.append("Average macro F1-score [standard deviation]: %f [%f] " % (macroF1List.mean(), macroF1List.std()))
+    lines.append('')
+    if replicates > 0:
+        ci    = bootstrap(pooled, replicates)
+        level = 100.0 * (1.0 - BOOTSTRAP_ALPHA)
+        lines.append("Bootstrap %g%% confidence intervals of pooled results (%d replicates):" % (level, replicates))
+        lines.append('')
+        lines.append("  %-18s  %9f  [%f, %f]" % ('accuracy', overall['accuracy'], ci['accuracy'][0], ci['accuracy'][1]))
+        lines.append("  %-18s  %9f  [%f, %f]" % ('balanced accuracy', overall['balanced'], ci['balanced'][0], ci['balanced'][1]))
+        for c in range(len(classes)):
+            lines.append("  %-18s  %9f  [%f, %f]" % ('recall of ' + classes[c], overall['recall'][c],
+                                                     ci['recall'][c][0], ci['recall'][c][1]))
+        lines.append('')
+    text = '\n'.join(lines) + '\n'
+    sys.stdout.write(text)
+    text_file = open(resFile, "a+")
+    text_file.write(text)
     text_file.close()
 
 # ----------------------------------------------------------------------------
@@ -360,25 +797,1280 @@ def getfoldids(cfg):
     else: raise Exception("Missing 'foldids' or 'numfolds' option in [%s]!" % SETTINGS)
 
 # ----------------------------------------------------------------------------
-## @brief Execute subprocess and return job IDs if batch job was submitted.
-#
-# This function executes a subprocess and parses the output to extract the
-# job ID if the command submitted a batch job to a batch queuing system.
-# At the moment, only SGE is supported. If no job ID is matched in the
-# command output, it is assumed that the subprocess exits after the command
-# has been executed.
-#
-# @returns List of job IDs or an empty list.
-def execute(cmd, verbose=0, simulate=False):
+## @brief Make command a list of arguments with full paths of known executables.
+def resolve(cmd):
     if not type(cmd) is list: cmd = shlex.split(cmd)
     for i in range(len(cmd)):
         path = basis.exepath(cmd[i])
         if path: cmd[i] = path
-    (status, stdout) = basis.execute(cmd, verbose=verbose, simulate=simulate, stdout=True)
-    m = re.match(r"^.*Your job (?P<jobid>[0-9]+) \(\".*\"\) has been submitted.*$", stdout)
+    return cmd
+
+# ----------------------------------------------------------------------------
+## @brief Get ID of batch job from output of submitted command.
+#
+# This function is used to detect whether a command executed by one of the
+# local executors submitted a SGE batch job itself, e.g., "qsub gondola-sbia learn".
+#
+# @returns Job ID or @c None if no job submission message was found.
+def parsejobid(stdout):
+    m = re.search(r"^.*Your job (?P<jobid>[0-9]+) \(\".*\"\) has been submitted.*$", stdout, re.M)
     if not m is None: return m.group('jobid')
     else:             return None
 
+# ============================================================================
+# tasks
+# ============================================================================
+
+# ----------------------------------------------------------------------------
+## @brief Create a new task.
+#
+# A task is a single command which is executed for one cross-validation fold
+# and, in case of the classify step, one classifier. A task may depend on other
+# tasks of the same fold. It is only executed when these are finished.
+#
+# When a task finished successfully, a hash of its parameters and the content
+# of its input files is stored in a stamp file. The task is skipped when the
+# experiment is run again if the inputs and parameters are unchanged, all its
+# output files exist, and the optional completeness check is successful.
+#
+# @param [in] step   Name of experiment step.
+# @param [in] foldid ID of cross-validation fold.
+# @param [in] cmd    Command to execute as list of arguments or function
+#                    which returns this list when the task is executed.
+#                    The latter is used if the command depends on the
+#                    output of a previous task.
+# @param [in] name   Name of task which is unique for each fold.
+#                    Defaults to the name of the step.
+# @param [in] deps   Names of tasks of the same fold this task depends on.
+# @param [in] inputs  Input files of the task.
+# @param [in] outputs Output files or directories of the task.
+# @param [in] params  String of parameters which affect the outputs of the task.
+#                     Defaults to the command if @c None.
+# @param [in] check   Function which returns whether the existing outputs are
+#                     complete or @c None.
+# @param [in] batch   Name of command if it accepts a manifest file with the
+#                     arguments of multiple tasks (see LocalExecutor).
+# @param [in] resume  Arguments which are appended to the command when a task
+#                     is resumed after it was interrupted (see --resume).
+# @param [in] threads Arguments which are appended to the command to set the
+#                     number of threads, which do not affect the outputs.
+#
+# @returns Dictionary describing the task.
+def maketask(step, foldid, cmd, name=None, deps=[], inputs=[], outputs=[], params=None, check=None, batch=None, resume=[], threads=[]):
+    if not name: name = step
+    return {
+        'id':      '%s/%s' % (foldid, name),
+        'step':    step,
+        'foldid':  foldid,
+        'name':    name,
+        'cmd':     cmd,
+        'deps':    ['%s/%s' % (foldid, dep) for dep in deps],
+        'inputs':  inputs,
+        'outputs': outputs,
+        'params':  params,
+        'check':   check,
+        'batch':   batch,
+        'resume':  resume,
+        'threads': threads,
+        'hash':    None,
+        'stamped': False
+    }
+
+# ----------------------------------------------------------------------------
+## @brief Get command of task.
+#
+# @param [in] task    Task as returned by maketask().
+# @param [in] threads Whether to append the arguments which set the number of threads.
+def getcmd(task, threads=True):
+    if callable(task['cmd']): cmd = task['cmd']()
+    else:                     cmd = task['cmd']
+    if threads: cmd = cmd + task['threads']
+    return cmd
+
+# ----------------------------------------------------------------------------
+## @brief Get absolute path of log file of a task.
+#
+# @param [in] cfg  ConfigParser instance.
+# @param [in] task Task as returned by maketask().
+def getlogfile(cfg, task):
+    configdir = cfg.get(SETTINGS, 'configdir')
+    cfgvars   = {'foldid': task['foldid'], 'step': task['step'], 'task': task['name']}
+    if cfg.has_option(SETTINGS, 'logfile'):
+        logfile = cfg.get(SETTINGS, 'logfile', 0, cfgvars)
+    else:
+        logfile = LOGFILE % cfgvars
+    return os.path.join(configdir, logfile)
+
+# ----------------------------------------------------------------------------
+## @brief Get absolute path of stamp file of a task.
+#
+# @param [in] cfg  ConfigParser instance.
+# @param [in] task Task as returned by maketask().
+def getstampfile(cfg, task):
+    configdir = cfg.get(SETTINGS, 'configdir')
+    cfgvars   = {'foldid': task['foldid'], 'step': task['step'], 'task': task['name']}
+    if cfg.has_option(SETTINGS, 'stampfile'):
+        stampfile = cfg.get(SETTINGS, 'stampfile', 0, cfgvars)
+    else:
+        stampfile = STAMPFILE % cfgvars
+    return os.path.join(configdir, stampfile)
+
+# ----------------------------------------------------------------------------
+## @brief Compute MD5 hash of the content of a file.
+#
+# @param [in] path  Path of file.
+# @param [in] cache Dictionary of previously computed hashes. A hash is only
+#                   looked up if the modification time and size of the file
+#                   are unchanged.
+#
+# @returns Hexadecimal digest or @c None if the file does not exist.
+def filehash(path, cache):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (path, st.st_mtime, st.st_size)
+    if not key in cache:
+        m = hashlib.md5()
+        f = open(path, 'rb')
+        try:
+            while True:
+                buf = f.read(1048576)
+                if not buf: break
+                m.update(buf)
+        finally:
+            f.close()
+        cache[key] = m.hexdigest()
+    return cache[key]
+
+# ----------------------------------------------------------------------------
+## @brief Compute hash of the parameters and the inputs of a task.
+#
+# @param [in] task  Task as returned by maketask().
+# @param [in] cache Dictionary of previously computed file hashes.
+#
+# @returns Hexadecimal digest or @c None if an input file does not exist.
+def taskhash(task, cache):
+    m = hashlib.md5()
+    if task['params'] is None: m.update(' '.join(getcmd(task, False)))
+    else:                      m.update(task['params'])
+    for path in task['inputs']:
+        h = filehash(path, cache)
+        if h is None: return None
+        m.update('\0%s\0%s' % (path, h))
+    return m.hexdigest()
+
+# ----------------------------------------------------------------------------
+## @brief Whether the outputs of a task are up to date.
+#
+# @param [in] cfg  ConfigParser instance.
+# @param [in] task Task as returned by maketask() whose 'hash' was set.
+def uptodate(cfg, task):
+    if not task['hash']: return False
+    for path in task['outputs']:
+        if not os.path.exists(path): return False
+    if task['check'] and not task['check'](): return False
+    return stamped(cfg, task)
+
+# ----------------------------------------------------------------------------
+## @brief Whether the stamp file of a task matches its hash.
+#
+# @param [in] cfg  ConfigParser instance.
+# @param [in] task Task as returned by maketask() whose 'hash' was set.
+def stamped(cfg, task):
+    if not task['hash']: return False
+    try:
+        f = open(getstampfile(cfg, task), 'r')
+        try:
+            return f.read().strip() == task['hash']
+        finally:
+            f.close()
+    except IOError:
+        return False
+
+# ----------------------------------------------------------------------------
+## @brief Write stamp file of a task.
+#
+# @param [in] cfg  ConfigParser instance.
+# @param [in] task Task as returned by maketask().
+def writestamp(cfg, task):
+    if not task['hash']: return
+    stampfile = getstampfile(cfg, task)
+    stampdir  = os.path.dirname(stampfile)
+    if stampdir and not os.path.isdir(stampdir): os.makedirs(stampdir)
+    f = open(stampfile, 'w')
+    f.write(task['hash'] + '\n')
+    f.close()
+
+# ----------------------------------------------------------------------------
+## @brief Remove stamp file of a task if it exists.
+#
+# @param [in] cfg  ConfigParser instance.
+# @param [in] task Task as returned by maketask().
+def removestamp(cfg, task):
+    stampfile = getstampfile(cfg, task)
+    if os.path.isfile(stampfile): os.remove(stampfile)
+
+# ============================================================================
+# journal
+# ============================================================================
+
+# ----------------------------------------------------------------------------
+## @brief Get absolute path of journal file.
+def getjournalfile(cfg):
+    journalfile = JOURNALFILE
+    if cfg.has_option(SETTINGS, 'journalfile'):
+        journalfile = cfg.get(SETTINGS, 'journalfile')
+    return os.path.join(cfg.get(SETTINGS, 'configdir'), journalfile)
+
+# ----------------------------------------------------------------------------
+## @brief Append event of a task to journal file.
+#
+# The file is synchronized with the disk after each event such that the
+# journal is complete up to the last event even if the experiment is killed.
+#
+# @param [in] cfg     ConfigParser instance.
+# @param [in] run     Start time of the experiment run as string.
+# @param [in] event   Name of event, e.g., "started", "finished", or "failed".
+# @param [in] task    Task as returned by maketask().
+# @param [in] jobid   ID of batch job or @c None.
+# @param [in] message Optional message such as the reason of a failure.
+def writejournal(cfg, run, event, task, jobid=None, message=''):
+    journalfile = getjournalfile(cfg)
+    exists      = os.path.isfile(journalfile)
+    f = open(journalfile, 'ab')
+    try:
+        writer = csv.writer(f)
+        if not exists: writer.writerow(JOURNAL_COLUMNS)
+        writer.writerow([datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), run, event,
+                         task['foldid'], task['name'], jobid or '',
+                         os.pathsep.join(task['outputs']), message.replace('\n', ' ')])
+        f.flush()
+        os.fsync(f.fileno())
+    finally:
+        f.close()
+
+# ----------------------------------------------------------------------------
+## @brief Read last journal entry of each task.
+#
+# An incomplete last line which was written while the experiment was killed
+# is ignored.
+#
+# @returns Dictionary which maps task ID to last entry of this task.
+def readjournal(cfg):
+    journalfile = getjournalfile(cfg)
+    entries     = {}
+    if not os.path.isfile(journalfile): return entries
+    f = open(journalfile, 'rb')
+    try:
+        for row in csv.DictReader(f):
+            if None in row.values(): continue
+            entries['%s/%s' % (row['foldid'], row['task'])] = row
+    finally:
+        f.close()
+    return entries
+
+# ----------------------------------------------------------------------------
+## @brief Whether the journal reports that a task finished and its outputs exist.
+#
+# @param [in] task  Task as returned by maketask().
+# @param [in] entry Last journal entry of the task or @c None.
+def journaldone(task, entry):
+    if not entry or not entry['event'] in JOURNAL_DONE_EVENTS: return False
+    for path in task['outputs']:
+        if not os.path.exists(path): return False
+    if task['check'] and not task['check'](): return False
+    return True
+
+# ============================================================================
+# executors
+# ============================================================================
+
+# ----------------------------------------------------------------------------
+## @brief Start subprocess which writes its output to the given log file.
+#
+# @returns The subprocess.Popen object of the started process.
+def spawn(cmd, logfile):
+    cmd = resolve(cmd)
+    makelogdir(logfile)
+    log = open(logfile, 'w')
+    try:
+        log.write("$ %s\n\n" % ' '.join([('"%s"' % arg if ' ' in arg else arg) for arg in cmd]))
+        log.flush()
+        return subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT)
+    finally:
+        log.close()
+
+# ----------------------------------------------------------------------------
+## @brief Create directory of log file if it does not exist.
+def makelogdir(logfile):
+    logdir = os.path.dirname(logfile)
+    if logdir and not os.path.isdir(logdir): os.makedirs(logdir)
+
+# ----------------------------------------------------------------------------
+## @brief Get name of batch job of a task.
+def getjobname(task):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', 'crossval-%s-%s' % (task['foldid'], task['name']))
+
+# ----------------------------------------------------------------------------
+## @brief Parse output of "jobstatus" command.
+#
+# Each line whose first token is the ID of one of the given jobs reports the
+# state of this job in the given column. If the state is one of the
+# JOB_FAILED_STATES, the job failed. If it is one of the JOB_DONE_STATES, the
+# job is finished. Otherwise, the job is still queued or running. Jobs which
+# are not listed at all are considered to be finished.
+#
+# @param [in] stdout Output of "jobstatus" command.
+# @param [in] jobids IDs of jobs whose state is requested.
+# @param [in] column Index of the column with the job state.
+#
+# @returns Dictionary which maps job IDs to either 'active', 'done', or 'failed'.
+def parsejobstatus(stdout, jobids, column=1):
+    states = {}
+    for line in stdout.splitlines():
+        tokens = line.split()
+        if not tokens or not tokens[0] in jobids: continue
+        state = 'active'
+        if len(tokens) > column:
+            token = tokens[column].rstrip('+').lower()
+            if   token in JOB_FAILED_STATES: state = 'failed'
+            elif token in JOB_DONE_STATES:   state = 'done'
+        if states.get(tokens[0]) != 'failed': states[tokens[0]] = state
+    for jobid in jobids:
+        if not jobid in states: states[jobid] = 'done'
+    return states
+
+# ----------------------------------------------------------------------------
+## @brief Execute job status command and parse its output.
+#
+# @param [in] cmd    Job status command.
+# @param [in] jobids IDs of jobs whose state is requested.
+# @param [in] column Index of the column with the job state.
+#
+# @returns Dictionary which maps job IDs to either 'active', 'done', or 'failed'.
+#          If the command failed, all jobs are considered to be still active.
+def querystatus(cmd, jobids, column=1):
+    (status, stdout) = basis.execute(resolve(cmd), quiet=True, stdout=True, allow_fail=True)
+    if status != 0:
+        sys.stderr.write("Failed to query status of batch jobs (exit code %d)! Will retry later.\n" % status)
+        return dict([(jobid, 'active') for jobid in jobids])
+    return parsejobstatus(stdout, jobids, column)
+
+# ----------------------------------------------------------------------------
+## @brief Query state of batch jobs using the configured command.
+#
+# The state of all jobs is queried at once by the "jobstatus" command, where
+# %(jobids)s is substituted by the comma separated list of job IDs (see
+# parsejobstatus()). If only the "jobstat" command is configured, it is
+# executed for each job instead, where an exit status of zero indicates that
+# the job is still queued or running.
+#
+# @param [in] cfg    ConfigParser instance.
+# @param [in] jobids IDs of jobs whose state is requested.
+#
+# @returns Dictionary which maps job IDs to either 'active', 'done', or 'failed'.
+def queryjobs(cfg, jobids):
+    if cfg.has_option(COMMANDS, 'jobstatus'):
+        cmd    = cfg.get(COMMANDS, 'jobstatus', 0, {'jobids': ','.join(jobids)})
+        name   = os.path.splitext(os.path.basename(shlex.split(cmd)[0]))[0]
+        column = JOBSTATUS_STATE_COLUMNS.get(name, 1)
+        return querystatus(cmd, jobids, column)
+    states = {}
+    for jobid in jobids:
+        cmd = cfg.get(COMMANDS, 'jobstat', 0, {'jobid': jobid})
+        if basis.execute(resolve(cmd), quiet=True, allow_fail=True) == 0:
+            states[jobid] = 'active'
+        else:
+            states[jobid] = 'done'
+    return states
+
+# ----------------------------------------------------------------------------
+## @brief Convert duration given as [DD-][HH:]MM:SS[.mmm] to seconds.
+def parseduration(value):
+    days = 0
+    if '-' in value:
+        (days, value) = value.split('-', 1)
+    seconds = 0.0
+    for part in value.split(':'):
+        seconds = seconds * 60 + float(part)
+    return int(days) * 86400 + seconds
+
+# ----------------------------------------------------------------------------
+## @brief Convert memory size with optional unit suffix K, M, G, or T to KB.
+def parsesize(value):
+    units = {'K': 1, 'M': 1024, 'G': 1024 ** 2, 'T': 1024 ** 3}
+    value = value.strip().upper()
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(float(value) / 1024)
+
+# ----------------------------------------------------------------------------
+## @brief Handle of a task which was submitted to an executor.
+#
+# The state of a job is 'active' while it is queued or running, 'done' if it
+# finished successfully, 'failed' if it failed, and 'submitted' if a batch job
+# was submitted which is not waited for (see --nosync option).
+class Job(object):
+
+    # ------------------------------------------------------------------------
+    ## @brief Initialize job handle.
+    #
+    # @param [in] task    Task as returned by maketask().
+    # @param [in] logfile Log file of the job or @c None.
+    def __init__(self, task, logfile=None):
+        self.task     = task
+        self.logfile  = logfile
+        self.jobid    = None # ID of batch job
+        self.process  = None # subprocess.Popen object of local process
+        self.state    = 'active'
+        self.message  = None # reason why the job failed
+        self.start    = time.time()
+        self.wall     = None # elapsed time in seconds
+        self.cpu      = None # user and system CPU time in seconds
+        self.maxrss   = None # peak resident set size in KB
+        self.exitcode = None
+        self.group    = [self] # jobs which are run by the same process
+
+    # ------------------------------------------------------------------------
+    ## @brief Set resource usage of finished local process.
+    #
+    # @param [in] status Exit status as returned by os.wait4().
+    # @param [in] rusage Resource usage as returned by os.wait4().
+    def finished(self, status, rusage):
+        if os.WIFSIGNALED(status): self.exitcode = -os.WTERMSIG(status)
+        else:                      self.exitcode = os.WEXITSTATUS(status)
+        self.wall   = time.time() - self.start
+        self.cpu    = rusage.ru_utime + rusage.ru_stime
+        self.maxrss = rusage.ru_maxrss
+        # ru_maxrss is given in bytes on Mac OS
+        if sys.platform == 'darwin': self.maxrss /= 1024
+
+    # ------------------------------------------------------------------------
+    ## @brief Mark job as failed.
+    def fail(self, message):
+        self.state   = 'failed'
+        self.message = message
+
+    # ------------------------------------------------------------------------
+    ## @brief Human readable description of job.
+    def __str__(self):
+        return "%s of fold %s" % (self.task['name'], self.task['foldid'])
+
+# ----------------------------------------------------------------------------
+## @brief Tracks the state of submitted batch jobs.
+#
+# The interval between status queries starts at JOBSTAT_MIN_INTERVAL and is
+# increased by the factor JOBSTAT_BACKOFF each time none of the jobs finished,
+# up to JOBSTAT_MAX_INTERVAL. It is reset once any of the jobs finished.
+class JobTracker(object):
+
+    # ------------------------------------------------------------------------
+    ## @brief Initialize job tracker.
+    #
+    # @param [in] query Function which maps a list of job IDs to a dictionary
+    #                   of job states, i.e., 'active', 'done', or 'failed'.
+    def __init__(self, query):
+        self.query    = query
+        self.jobs     = {} # jobid => Job
+        self.interval = JOBSTAT_MIN_INTERVAL
+        self.nextpoll = 0
+
+    # ------------------------------------------------------------------------
+    ## @brief Add submitted job.
+    def add(self, job):
+        if not self.jobs: self.nextpoll = time.time() + self.interval
+        self.jobs[job.jobid] = job
+
+    # ------------------------------------------------------------------------
+    ## @brief Stop tracking job.
+    def remove(self, job):
+        if job.jobid in self.jobs: del self.jobs[job.jobid]
+
+    # ------------------------------------------------------------------------
+    ## @brief Number of outstanding jobs.
+    def __len__(self):
+        return len(self.jobs)
+
+    # ------------------------------------------------------------------------
+    ## @brief Update state of outstanding jobs if the current interval elapsed.
+    def poll(self):
+        if not self.jobs or time.time() < self.nextpoll: return
+        changed = False
+        for (jobid, state) in self.query(self.jobs.keys()).items():
+            if state == 'active' or not jobid in self.jobs: continue
+            job = self.jobs.pop(jobid)
+            if state == 'failed': job.fail("batch job %s failed" % jobid)
+            else:                 job.state = 'done'
+            changed = True
+        if changed: self.interval = JOBSTAT_MIN_INTERVAL
+        else:       self.interval = min(self.interval * JOBSTAT_BACKOFF, JOBSTAT_MAX_INTERVAL)
+        self.nextpoll = time.time() + self.interval
+
+# ----------------------------------------------------------------------------
+## @brief Base class of executors which run the tasks of an experiment.
+#
+# An executor submits a list of tasks at once and returns a Job handle for
+# each of them. The state of the jobs is updated by poll() and active jobs
+# are cancelled by cancel(), each of which processes all given jobs at once.
+class Executor(object):
+
+    ## @brief Name of executor as used by the "executor" setting.
+    name = None
+
+    # ------------------------------------------------------------------------
+    ## @brief Initialize executor.
+    #
+    # @param [in] cfg ConfigParser instance.
+    def __init__(self, cfg):
+        self.cfg      = cfg
+        self.verbose  = cfg.getint    (SETTINGS, 'verbose')
+        self.simulate = cfg.getboolean(SETTINGS, 'simulate')
+        self.sync     = cfg.getboolean(SETTINGS, 'sync')
+        self.tracker  = None
+
+    # ------------------------------------------------------------------------
+    ## @brief Maximum number of active jobs or @c None if unlimited.
+    def slots(self):
+        return None
+
+    # ------------------------------------------------------------------------
+    ## @brief Key of group of tasks which are run together or @c None.
+    def groupkey(self, task):
+        return None
+
+    # ------------------------------------------------------------------------
+    ## @brief Number of slots occupied by the given active jobs.
+    def busy(self, jobs):
+        return len(jobs)
+
+    # ------------------------------------------------------------------------
+    ## @brief Submit tasks for execution.
+    #
+    # @param [in] tasks Tasks as returned by maketask().
+    #
+    # @returns List of Job instances, one for each task.
+    def submit(self, tasks):
+        raise NotImplementedError
+
+    # ------------------------------------------------------------------------
+    ## @brief Update state of active jobs.
+    def poll(self, jobs):
+        if self.tracker is not None: self.tracker.poll()
+
+    # ------------------------------------------------------------------------
+    ## @brief Cancel active jobs.
+    def cancel(self, jobs):
+        pass
+
+    # ------------------------------------------------------------------------
+    ## @brief Get resource usage of finished batch jobs from the accounting.
+    def account(self, jobs):
+        pass
+
+    # ------------------------------------------------------------------------
+    ## @brief Wait for batch job if synchronization is enabled.
+    def track(self, job, jobid):
+        job.jobid = jobid
+        if self.sync and self.tracker is not None: self.tracker.add(job)
+        else:                          job.state = 'submitted'
+
+# ----------------------------------------------------------------------------
+## @brief Base class of executors which run tasks on the local machine.
+#
+# If a command submits an SGE batch job itself, e.g., "qsub gondola-sbia learn",
+# this job is tracked using the configured "jobstatus" or "jobstat" command.
+#
+# Tasks of the same fold whose command accepts a manifest of tasks, i.e.,
+# wekaClassifier (see its --manifest option), are run by a single process
+# unless the "manifest" option of the [settings] section is false. Hence,
+# the JVM is started and each ARFF file is read only once for these tasks.
+class LocalExecutor(Executor):
+
+    # ------------------------------------------------------------------------
+    ## @brief Initialize executor.
+    def __init__(self, cfg):
+        Executor.__init__(self, cfg)
+        if cfg.has_option(COMMANDS, 'jobstatus') or cfg.has_option(COMMANDS, 'jobstat'):
+            self.tracker = JobTracker(lambda jobids: queryjobs(cfg, jobids))
+        self.manifest = True
+        if cfg.has_option(SETTINGS, 'manifest'):
+            self.manifest = cfg.getboolean(SETTINGS, 'manifest')
+
+    # ------------------------------------------------------------------------
+    def groupkey(self, task):
+        if self.manifest and task['batch']: return (task['batch'], task['foldid'])
+        return None
+
+    # ------------------------------------------------------------------------
+    ## @brief Split tasks into groups which are run by one process each.
+    def group(self, tasks):
+        groups = []
+        index  = {}
+        for task in tasks:
+            key = self.groupkey(task)
+            if key is None:
+                groups.append([task])
+            elif key in index:
+                groups[index[key]].append(task)
+            else:
+                index[key] = len(groups)
+                groups.append([task])
+        return groups
+
+    # ------------------------------------------------------------------------
+    ## @brief Get command and log file of the process which runs a group of tasks.
+    #
+    # If the group consists of more than one task, a manifest file is written
+    # next to the log file, which is named after the step of the tasks.
+    def groupcmd(self, tasks):
+        if len(tasks) == 1: return (getcmd(tasks[0]), getlogfile(self.cfg, tasks[0]))
+        logfile  = getlogfile(self.cfg, maketask(tasks[0]['step'], tasks[0]['foldid'], None))
+        manifest = os.path.splitext(logfile)[0] + '.manifest'
+        makelogdir(manifest)
+        f = open(manifest, 'w')
+        try:
+            for task in tasks:
+                cmd = getcmd(task)
+                f.write(' '.join([pipes.quote(arg) for arg in cmd[1:]]) + '\n')
+        finally:
+            f.close()
+        return ([cmd[0], '--manifest', manifest], logfile)
+
+    # ------------------------------------------------------------------------
+    ## @brief Set state of jobs given the output of the finished process.
+    #
+    # @param [in] jobs   Jobs run by the process.
+    # @param [in] status Exit status as returned by os.wait4().
+    # @param [in] rusage Resource usage as returned by os.wait4().
+    # @param [in] stdout Output of the process.
+    def finished(self, jobs, status, rusage, stdout):
+        for job in jobs:
+            job.finished(status, rusage)
+        if len(jobs) == 1:
+            job = jobs[0]
+            if job.exitcode == 0:
+                jobid = parsejobid(stdout)
+                if jobid: self.track(job, jobid)
+                else:     job.state = 'done'
+            else:
+                job.fail("exit code %d" % job.exitcode)
+            return
+        # the result of each task of a manifest is reported in the output
+        results = {}
+        for m in re.finditer(r"^Task (?P<index>[0-9]+) of [0-9]+ (?P<result>finished|failed) in (?P<time>[0-9.]+) s",
+                             stdout, re.M):
+            results[int(m.group('index')) - 1] = (m.group('result'), float(m.group('time')))
+        total = sum([wall for (result, wall) in results.values()])
+        for i in range(len(jobs)):
+            job = jobs[i]
+            if not i in results:
+                job.fail("task %d of manifest not run (exit code %d)" % (i + 1, job.exitcode))
+                continue
+            (result, job.wall) = results[i]
+            # CPU time of process is split proportional to the elapsed time
+            if total > 0: job.cpu = job.cpu * job.wall / total
+            if result == 'finished':
+                job.state    = 'done'
+                job.exitcode = 0
+            else:
+                job.fail("task %d of manifest failed" % (i + 1))
+
+    # ------------------------------------------------------------------------
+    def busy(self, jobs):
+        return len(dict([(id(job.group), job) for job in jobs]))
+
+# ----------------------------------------------------------------------------
+## @brief Executes tasks one after the other with output to the terminal.
+class SerialExecutor(LocalExecutor):
+
+    name = 'serial'
+
+    # ------------------------------------------------------------------------
+    def submit(self, tasks):
+        jobs = []
+        for group in self.group(tasks):
+            grouped = [Job(task) for task in group]
+            for job in grouped: job.group = grouped
+            jobs.extend(grouped)
+            try:
+                (cmd, logfile) = self.groupcmd(group)
+                cmd = resolve(cmd)
+                if self.simulate:
+                    basis.execute(cmd, simulate=True)
+                    for job in grouped: job.state = 'done'
+                    continue
+                if self.verbose > 0:
+                    print "$ %s" % ' '.join([('"%s"' % arg if ' ' in arg else arg) for arg in cmd])
+                # output is printed and collected to detect a submitted batch job
+                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+                stdout  = []
+                for line in iter(process.stdout.readline, ''):
+                    sys.stdout.write(line)
+                    stdout.append(line)
+                sys.stdout.flush()
+                process.stdout.close()
+                (pid, status, rusage) = os.wait4(process.pid, 0)
+                self.finished(grouped, status, rusage, ''.join(stdout))
+                process.returncode = grouped[0].exitcode
+            except Exception, e:
+                for job in grouped: job.fail(str(e))
+        return jobs
+
+# ----------------------------------------------------------------------------
+## @brief Executes tasks in parallel by local processes.
+#
+# The output of each task is written to its log file (see getlogfile()).
+class PoolExecutor(LocalExecutor):
+
+    name = 'pool'
+
+    # ------------------------------------------------------------------------
+    def slots(self):
+        return self.cfg.getint(SETTINGS, 'jobs')
+
+    # ------------------------------------------------------------------------
+    def submit(self, tasks):
+        jobs = []
+        for group in self.group(tasks):
+            grouped = [Job(task) for task in group]
+            for job in grouped: job.group = grouped
+            jobs.extend(grouped)
+            try:
+                (cmd, logfile) = self.groupcmd(group)
+                process = spawn(cmd, logfile)
+                for job in grouped:
+                    job.logfile = logfile
+                    job.process = process
+            except Exception, e:
+                for job in grouped: job.fail(str(e))
+        return jobs
+
+    # ------------------------------------------------------------------------
+    def poll(self, jobs):
+        for job in jobs:
+            if job.jobid or not job.process or not job.process.returncode is None: continue
+            (pid, status, rusage) = os.wait4(job.process.pid, os.WNOHANG)
+            if pid == 0: continue
+            f = open(job.logfile, 'r')
+            self.finished(job.group, status, rusage, f.read())
+            f.close()
+            job.process.returncode = job.group[0].exitcode
+        LocalExecutor.poll(self, jobs)
+
+    # ------------------------------------------------------------------------
+    def cancel(self, jobs):
+        for job in jobs:
+            if job.process and job.process.returncode is None:
+                job.process.terminate()
+                job.process.returncode = -1
+
+# ----------------------------------------------------------------------------
+## @brief Base class of executors which submit each task as batch job.
+#
+# The output of each batch job is written to its log file (see getlogfile()).
+# Additional arguments of the submission command can be specified by the
+# "submitargs" option of the [settings] section. If a "jobstatus" command is
+# configured, it is used instead of the default status query of the executor.
+class BatchExecutor(Executor):
+
+    # ------------------------------------------------------------------------
+    ## @brief Initialize executor.
+    def __init__(self, cfg):
+        Executor.__init__(self, cfg)
+        self.tracker    = JobTracker(self.query)
+        self.submitargs = []
+        if cfg.has_option(SETTINGS, 'submitargs'):
+            self.submitargs = shlex.split(cfg.get(SETTINGS, 'submitargs'))
+
+    # ------------------------------------------------------------------------
+    ## @brief Get command which submits the given command of a job.
+    def submitcmd(self, job, cmd):
+        raise NotImplementedError
+
+    # ------------------------------------------------------------------------
+    ## @brief Get job ID from output of submission command.
+    def parsejobid(self, stdout):
+        raise NotImplementedError
+
+    # ------------------------------------------------------------------------
+    ## @brief Query state of batch jobs if no "jobstatus" command is configured.
+    def querydefault(self, jobids):
+        raise NotImplementedError
+
+    # ------------------------------------------------------------------------
+    ## @brief Get command which cancels the given batch jobs or @c None.
+    def cancelcmd(self, jobids):
+        return None
+
+    # ------------------------------------------------------------------------
+    ## @brief Query state of batch jobs.
+    def query(self, jobids):
+        if self.cfg.has_option(COMMANDS, 'jobstatus') or self.cfg.has_option(COMMANDS, 'jobstat'):
+            return queryjobs(self.cfg, jobids)
+        return self.querydefault(jobids)
+
+    # ------------------------------------------------------------------------
+    def submit(self, tasks):
+        jobs = []
+        for task in tasks:
+            job = Job(task, getlogfile(self.cfg, task))
+            jobs.append(job)
+            try:
+                cmd = self.submitcmd(job, resolve(getcmd(task)))
+                if self.simulate:
+                    basis.execute(cmd, simulate=True)
+                    job.state = 'done'
+                    continue
+                makelogdir(job.logfile)
+                (status, stdout) = basis.execute(cmd, quiet=True, stdout=True, allow_fail=True,
+                                                 verbose=self.verbose)
+                jobid = None
+                if status == 0: jobid = self.parsejobid(stdout)
+                if jobid: self.track(job, jobid)
+                else:     job.fail("job submission failed: %s" % stdout.strip())
+            except Exception, e:
+                job.fail(str(e))
+        return jobs
+
+    # ------------------------------------------------------------------------
+    def cancel(self, jobs):
+        jobids = [job.jobid for job in jobs if job.jobid and job.state == 'active']
+        for job in jobs: self.tracker.remove(job)
+        cmd = jobids and self.cancelcmd(jobids)
+        if cmd: basis.execute(cmd, quiet=True, allow_fail=True)
+
+# ----------------------------------------------------------------------------
+## @brief Submits each task as SGE batch job.
+class SGEExecutor(BatchExecutor):
+
+    name = 'sge'
+
+    # ------------------------------------------------------------------------
+    def submitcmd(self, job, cmd):
+        return ['qsub', '-terse', '-b', 'y', '-cwd', '-V', '-j', 'y',
+                '-N', getjobname(job.task), '-o', job.logfile] + self.submitargs + cmd
+
+    # ------------------------------------------------------------------------
+    def parsejobid(self, stdout):
+        # output is either "<jobid>" or "<jobid>.<first>-<last>:<step>" for array jobs
+        m = re.match(r"\s*(?P<jobid>[0-9]+)", stdout)
+        if not m is None: return m.group('jobid')
+        else:             return None
+
+    # ------------------------------------------------------------------------
+    ## @brief Initialize executor.
+    def __init__(self, cfg):
+        BatchExecutor.__init__(self, cfg)
+        self.records  = {} # jobid => accounting record of finished job
+        self.waiting  = {} # jobid => time when job was first found without record
+        self.expired  = set() # IDs of jobs whose record did not appear in time
+        self.noacct   = False # whether qacct is not available
+
+    # ------------------------------------------------------------------------
+    def querydefault(self, jobids):
+        # finished jobs are no longer listed, error states start with 'E',
+        # whether a finished job failed is checked by query()
+        return querystatus(['qstat'], jobids, JOBSTATUS_STATE_COLUMNS['qstat'])
+
+    # ------------------------------------------------------------------------
+    ## @brief Get accounting record of finished batch job.
+    #
+    # @returns Dictionary of resource usage, exit status, and failed value,
+    #          an empty dictionary if qacct has no record of the job (yet),
+    #          or @c None if qacct is not available.
+    def qacct(self, jobid):
+        if self.noacct: return None
+        try:
+            (status, stdout) = basis.execute(['qacct', '-j', jobid], quiet=True, stdout=True, allow_fail=True)
+        except OSError:
+            self.noacct = True
+            return None
+        if status != 0: return {}
+        info = {}
+        for line in stdout.splitlines():
+            parts = line.split(None, 1)
+            if len(parts) == 2: info[parts[0]] = parts[1].strip().rstrip('s')
+        record = {'failed': 0}
+        try:
+            if 'ru_wallclock' in info: record['wall']     = float(info['ru_wallclock'])
+            if 'cpu'          in info: record['cpu']      = float(info['cpu'])
+            if 'ru_maxrss'    in info: record['maxrss']   = int(float(info['ru_maxrss']))
+            if 'exit_status'  in info: record['exitcode'] = int(info['exit_status'].split()[0])
+            if 'failed'       in info: record['failed']   = int(info['failed'].split()[0])
+        except ValueError:
+            pass
+        return record
+
+    # ------------------------------------------------------------------------
+    ## @brief Query state of batch jobs.
+    #
+    # Jobs which are no longer listed are reported as done even if they failed,
+    # which only the accounting tells. As SGE writes the accounting record some
+    # time after a job finished, such job is considered active until qacct
+    # reports its exit status, such that the job tracker retries the query
+    # with increasing intervals. If there is no record after JOBACCT_TIMEOUT
+    # seconds, the job is considered failed.
+    def query(self, jobids):
+        states = BatchExecutor.query(self, jobids)
+        for jobid in jobids:
+            if states.get(jobid) != 'done': continue
+            record = self.qacct(jobid)
+            if record is None: continue # accounting not available
+            if not record:
+                since = self.waiting.setdefault(jobid, time.time())
+                if time.time() - since < JOBACCT_TIMEOUT:
+                    states[jobid] = 'active'
+                else:
+                    del self.waiting[jobid]
+                    self.expired.add(jobid)
+                    states[jobid] = 'failed'
+                continue
+            if jobid in self.waiting: del self.waiting[jobid]
+            self.records[jobid] = record
+            if record.get('exitcode') or record['failed']: states[jobid] = 'failed'
+        return states
+
+    # ------------------------------------------------------------------------
+    def cancelcmd(self, jobids):
+        return ['qdel'] + jobids
+
+    # ------------------------------------------------------------------------
+    def account(self, jobs):
+        for job in jobs:
+            if job.jobid in self.expired:
+                self.expired.discard(job.jobid)
+                job.fail("qacct has no record of batch job %s after %d seconds" % (job.jobid, JOBACCT_TIMEOUT))
+                continue
+            record = self.records.pop(job.jobid, None)
+            if record is None: continue
+            job.wall     = record.get('wall',     job.wall)
+            job.cpu      = record.get('cpu',      job.cpu)
+            job.maxrss   = record.get('maxrss',   job.maxrss)
+            job.exitcode = record.get('exitcode', job.exitcode)
+            if job.exitcode or record['failed']:
+                job.fail("qacct reports exit status %s and failed %d" % (job.exitcode, record['failed']))
+
+# ----------------------------------------------------------------------------
+## @brief Submits each task as SLURM batch job.
+class SlurmExecutor(BatchExecutor):
+
+    name = 'slurm'
+
+    # ------------------------------------------------------------------------
+    def submitcmd(self, job, cmd):
+        return ['sbatch', '--parsable', '-J', getjobname(job.task), '-o', job.logfile] \
+                    + self.submitargs + ['--wrap', ' '.join([pipes.quote(arg) for arg in cmd])]
+
+    # ------------------------------------------------------------------------
+    def parsejobid(self, stdout):
+        # output is "<jobid>" or "<jobid>;<cluster>"
+        m = re.match(r"\s*(?P<jobid>[0-9]+)", stdout)
+        if not m is None: return m.group('jobid')
+        else:             return None
+
+    # ------------------------------------------------------------------------
+    def querydefault(self, jobids):
+        # jobs listed by squeue are still active (or about to be finished),
+        # the accounting database is queried for the final state of the others
+        states   = querystatus(['squeue', '-h', '-o', '%i %t', '-u', getpass.getuser()], jobids)
+        finished = [jobid for jobid in jobids if states[jobid] == 'done']
+        if not finished: return states
+        (status, stdout) = basis.execute(['sacct', '-n', '-X', '-o', 'JobID,State', '-j', ','.join(finished)],
+                                         quiet=True, stdout=True, allow_fail=True)
+        if status == 0: states.update(parsejobstatus(stdout, finished))
+        return states
+
+    # ------------------------------------------------------------------------
+    def cancelcmd(self, jobids):
+        return ['scancel'] + jobids
+
+    # ------------------------------------------------------------------------
+    def account(self, jobs):
+        jobs = dict([(job.jobid, job) for job in jobs if job.jobid])
+        if not jobs: return
+        try:
+            (status, stdout) = basis.execute(['sacct', '-n', '-P', '-o', 'JobID,ElapsedRaw,TotalCPU,MaxRSS,ExitCode',
+                                              '-j', ','.join(jobs.keys())], quiet=True, stdout=True, allow_fail=True)
+        except OSError:
+            return # accounting not available
+        if status != 0: return
+        for line in stdout.splitlines():
+            fields = line.split('|')
+            if len(fields) != 5: continue
+            # resource usage of job steps such as <jobid>.batch is given in separate lines
+            job = jobs.get(fields[0].split('.')[0])
+            if not job: continue
+            try:
+                if fields[3]:
+                    job.maxrss = max(job.maxrss or 0, parsesize(fields[3]))
+                if fields[0] == job.jobid:
+                    job.wall     = float(fields[1])
+                    job.cpu      = parseduration(fields[2])
+                    job.exitcode = int(fields[4].split(':')[0])
+            except ValueError:
+                pass
+
+# ----------------------------------------------------------------------------
+## @brief Submits each task using user-defined commands.
+#
+# The "submit" command of the [commands] section is executed for each task,
+# where %(command)s is substituted by the shell-quoted command of the task,
+# %(name)s by the job name, and %(logfile)s by the log file. The last word of
+# its output is the ID of the submitted job. The state of the jobs is queried
+# using the "jobstatus" command. The optional "cancel" command is used to
+# cancel jobs, where %(jobids)s is substituted by the comma separated job IDs.
+class ScriptExecutor(BatchExecutor):
+
+    name = 'script'
+
+    # ------------------------------------------------------------------------
+    ## @brief Initialize executor.
+    def __init__(self, cfg):
+        BatchExecutor.__init__(self, cfg)
+        for name in ('submit', 'jobstatus'):
+            if not cfg.has_option(COMMANDS, name):
+                raise Exception("Missing '%s' option in [%s] required by script executor!" % (name, COMMANDS))
+
+    # ------------------------------------------------------------------------
+    def submitcmd(self, job, cmd):
+        cfgvars = {
+            'command': ' '.join([pipes.quote(arg) for arg in cmd]),
+            'name':    getjobname(job.task),
+            'logfile': job.logfile,
+            'foldid':  job.task['foldid'],
+            'task':    job.task['name']
+        }
+        return shlex.split(self.cfg.get(COMMANDS, 'submit', 0, cfgvars)) + self.submitargs
+
+    # ------------------------------------------------------------------------
+    def parsejobid(self, stdout):
+        words = stdout.split()
+        if words: return words[-1]
+        else:     return None
+
+    # ------------------------------------------------------------------------
+    def cancelcmd(self, jobids):
+        if not self.cfg.has_option(COMMANDS, 'cancel'): return None
+        return shlex.split(self.cfg.get(COMMANDS, 'cancel', 0, {'jobids': ','.join(jobids)}))
+
+# ----------------------------------------------------------------------------
+## @brief Create executor selected by "executor" option of [settings] section.
+#
+# If no executor is specified, tasks are executed in parallel by local processes
+# if more than one job is allowed and one after the other otherwise.
+def getexecutor(cfg):
+    if cfg.has_option(SETTINGS, 'executor'):
+        name = cfg.get(SETTINGS, 'executor').strip().lower()
+    elif cfg.getint(SETTINGS, 'jobs') > 1:
+        name = 'pool'
+    else:
+        name = 'serial'
+    # local processes are not started in parallel when simulating execution
+    if name == 'pool' and cfg.getboolean(SETTINGS, 'simulate'): name = 'serial'
+    if   name == 'serial': return SerialExecutor(cfg)
+    elif name == 'pool':   return PoolExecutor  (cfg)
+    elif name == 'sge':    return SGEExecutor   (cfg)
+    elif name == 'slurm':  return SlurmExecutor (cfg)
+    elif name == 'script': return ScriptExecutor(cfg)
+    else: raise Exception("Invalid executor: %s! Valid executors are: %s" % (name, ', '.join(EXECUTORS)))
+
+# ============================================================================
+# timings
+# ============================================================================
+
+# ----------------------------------------------------------------------------
+## @brief Get absolute path of timings file.
+def gettimingsfile(cfg):
+    timingsfile = TIMINGSFILE
+    if cfg.has_option(SETTINGS, 'timingsfile'):
+        timingsfile = cfg.get(SETTINGS, 'timingsfile')
+    return os.path.join(cfg.get(SETTINGS, 'configdir'), timingsfile)
+
+# ----------------------------------------------------------------------------
+## @brief Append resource usage of finished jobs to timings file.
+#
+# @param [in] cfg      ConfigParser instance.
+# @param [in] jobs     Finished jobs.
+# @param [in] run      Start time of the experiment run as string.
+# @param [in] executor Name of executor.
+def writetimings(cfg, jobs, run, executor):
+    timingsfile = gettimingsfile(cfg)
+    exists      = os.path.isfile(timingsfile)
+    f = open(timingsfile, 'ab')
+    try:
+        writer = csv.writer(f)
+        if not exists: writer.writerow(TIMINGS_COLUMNS)
+        for job in jobs:
+            def fmt(value, spec):
+                if value is None: return ''
+                else:             return spec % value
+            writer.writerow([run, job.task['foldid'], job.task['step'], job.task['name'], executor,
+                             job.jobid or '', job.state, fmt(job.exitcode, '%d'),
+                             datetime.datetime.fromtimestamp(job.start).strftime('%Y-%m-%d %H:%M:%S'),
+                             fmt(job.wall, '%.3f'), fmt(job.cpu, '%.3f'), fmt(job.maxrss, '%d')])
+    finally:
+        f.close()
+
+# ----------------------------------------------------------------------------
+## @brief Read timings file.
+#
+# @returns List of dictionaries, one for each row.
+def readtimings(cfg):
+    timingsfile = gettimingsfile(cfg)
+    if not os.path.isfile(timingsfile): return []
+    f = open(timingsfile, 'rb')
+    try:
+        return [row for row in csv.DictReader(f)]
+    finally:
+        f.close()
+
+# ============================================================================
+# scheduler
+# ============================================================================
+
+# ----------------------------------------------------------------------------
+## @brief Execute tasks in the order given by their dependencies.
+#
+# A task is submitted to the executor (see getexecutor()) as soon as all tasks
+# it depends on are finished, i.e., the next step of one fold does not wait for
+# the previous step of all other folds. Dependencies on tasks which are not in
+# the given list are assumed to be fulfilled already. If a task submitted a batch
+# job which is not waited for (see --nosync option), the tasks depending on it
+# are started immediately.
+#
+# Tasks whose outputs are up to date are not executed unless the force option
+# is set (see maketask()). If the resume option is set, tasks which finished
+# according to the journal are skipped as well unless any of their
+# dependencies is executed by this run, and the resume arguments of tasks
+# which were started but did not finish are appended to their command (see
+# maketask()).
+# Each event of a task is recorded in the journal (see writejournal()).
+# Tasks which depend on a failed task are skipped.
+# Once all other tasks are finished, an exception is raised if any of the
+# tasks failed. Active jobs are cancelled if the execution is interrupted.
+#
+# @param [in] tasks List of tasks in the order in which ready tasks are started.
+# @param [in] cfg   ConfigParser instance.
+def run(tasks, cfg):
+    verbose  = cfg.getint    (SETTINGS, 'verbose')
+    simulate = cfg.getboolean(SETTINGS, 'simulate')
+    force    = cfg.getboolean(SETTINGS, 'force')
+    resume   = cfg.getboolean(SETTINGS, 'resume')
+    executor = getexecutor(cfg)
+    slots    = executor.slots()
+    started  = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    ids      = set([task['id'] for task in tasks])
+    state    = {}  # task ID => 'done', 'failed', or 'skipped'
+    pending  = list(tasks)
+    active   = [] # submitted jobs which are not finished yet
+    failed   = [] # failed jobs
+    hashes   = {} # cache of file hashes
+    journal  = {} # task ID => last journal entry of previous runs
+    if resume: journal = readjournal(cfg)
+    executed = set() # IDs of tasks executed by this run
+    # record events in journal except when simulating
+    def record(event, task, jobid=None, message=''):
+        if not simulate: writejournal(cfg, started, event, task, jobid, message)
+    try:
+        while pending or active:
+            # submit tasks whose dependencies are fulfilled
+            ready  = []
+            groups = set() # keys of groups of ready tasks
+            needed = 0     # number of slots needed by ready tasks
+            for task in list(pending):
+                deps = [dep for dep in task['deps'] if dep in ids]
+                if [dep for dep in deps if state.get(dep) in ('failed', 'skipped')]:
+                    sys.stderr.write("Skipping %s of fold %s because a previous step failed.\n"
+                                        % (task['name'], task['foldid']))
+                    state[task['id']] = 'skipped'
+                    pending.remove(task)
+                    record('skipped', task, message='previous step failed')
+                    continue
+                if [dep for dep in deps if state.get(dep) != 'done']: continue
+                # a task which is run together with another ready task needs no extra slot
+                key = executor.groupkey(task)
+                if slots and (key is None or not key in groups):
+                    if executor.busy(active) + needed >= slots: continue
+                pending.remove(task)
+                try:
+                    entry = journal.get(task['id'])
+                    # outputs of a task which finished before are outdated if
+                    # any of its dependencies was executed again by this run
+                    if not force and not [dep for dep in deps if dep in executed] and journaldone(task, entry):
+                        if verbose > 0: print "Skipping %s of fold %s because it finished before." % (task['name'], task['foldid'])
+                        state[task['id']] = 'done'
+                        continue
+                    if entry and entry['event'] in JOURNAL_RESUME_EVENTS and task['resume']:
+                        task['cmd'] = getcmd(task, False) + task['resume']
+                    task['hash'] = taskhash(task, hashes)
+                    if not force and uptodate(cfg, task):
+                        if verbose > 0: print "Skipping %s of fold %s because it is up to date." % (task['name'], task['foldid'])
+                        state[task['id']] = 'done'
+                        record('uptodate', task)
+                        continue
+                    # existing outputs of the same inputs and parameters may
+                    # merely be incomplete, which a task can check by 'stamped'
+                    task['stamped'] = not force and stamped(cfg, task)
+                    # outputs are modified from now on
+                    if not simulate: removestamp(cfg, task)
+                except Exception, e:
+                    job = Job(task)
+                    job.fail(str(e))
+                    active.append(job)
+                    continue
+                ready.append(task)
+                executed.add(task['id'])
+                if key is None or not key in groups: needed += 1
+                if key is not None: groups.add(key)
+            if ready:
+                for task in ready: record('started', task)
+                for job in executor.submit(ready):
+                    if job.jobid: record('submitted', job.task, job.jobid)
+                    if verbose > 0 and job.state != 'failed':
+                        if   job.jobid:   print "Job %s of %s submitted." % (job.jobid, job)
+                        elif job.process: print "Starting %s (log: %s)" % (job, job.logfile)
+                    active.append(job)
+            elif active:
+                # wait for any of the active jobs to finish
+                time.sleep(POLL_INTERVAL)
+            executor.poll([job for job in active if job.state == 'active'])
+            finished = [job for job in active if job.state != 'active']
+            if finished and not simulate:
+                executor.account([job for job in finished if job.jobid])
+                for job in finished:
+                    if job.wall is None: job.wall = time.time() - job.start
+                writetimings(cfg, finished, started, executor.name)
+            for job in finished:
+                active.remove(job)
+                if job.state == 'failed':
+                    msg = "Failed %s: %s" % (job, job.message)
+                    if job.logfile: msg += " (log: %s)" % job.logfile
+                    sys.stderr.write(msg + '\n')
+                    state[job.task['id']] = 'failed'
+                    failed.append(job)
+                    record('failed', job.task, job.jobid, job.message or '')
+                else:
+                    if verbose > 0 and job.state == 'done':
+                        if   job.jobid:   print "Job %s of %s finished." % (job.jobid, job)
+                        elif job.process: print "Finished %s" % job
+                    state[job.task['id']] = 'done'
+                    # stamp only written when it is known that the outputs are complete
+                    if job.state == 'done' and not simulate:
+                        writestamp(cfg, job.task)
+                        record('finished', job.task, job.jobid)
+    except KeyboardInterrupt:
+        interrupted = [job for job in active if job.state == 'active']
+        executor.cancel(interrupted)
+        for job in interrupted: record('interrupted', job.task, job.jobid)
+        raise
+    if failed:
+        msg = "%d of %d tasks failed:" % (len(failed), len(tasks))
+        for job in failed:
+            msg += "\n  %s" % job
+            if job.logfile: msg += " (log: %s)" % job.logfile
+        raise Exception(msg)
+
 # ============================================================================
 # steps
 # ============================================================================
@@ -387,58 +2079,66 @@ def execute(cmd, verbose=0, simulate=False):
 ## @brief Learn basis vectors from each training set.
 #
 # @param [in] cfg ConfigParser instance.
+#
+# @returns List of tasks, one for each fold.
 def learn(cfg):
     # get configuration values
     foldids    = getfoldids(cfg)
     configdir  = cfg.get       (SETTINGS, 'configdir')
     continue_  = cfg.getboolean(SETTINGS, 'continue')
-    verbose    = cfg.getint    (SETTINGS, 'verbose')
-    simulate   = cfg.getboolean(SETTINGS, 'simulate')
-    # run step for each subset
-    jobids = []
+    # create task for each subset
+    tasks = []
     for foldid in foldids:
         cfgvars = {'foldid': foldid}
         cfgvars['configfile']    = os.path.join(configdir, cfg.get(TRAINING, 'configfile',    0, cfgvars))
         cfgvars['imagelistfile'] = os.path.join(configdir, cfg.get(TRAINING, 'imagelistfile', 0, cfgvars))
         cfgvars['datafile']      = os.path.join(configdir, cfg.get(TRAINING, 'datafile',      0, cfgvars))
         cmd = shlex.split(cfg.get(COMMANDS, 'learn', 0, cfgvars))
-        if continue_: cmd.append('--continue')
-        jobid = execute(cmd, verbose=verbose, simulate=simulate)
-        if jobid: jobids.append(jobid)
-    return jobids
+        params = ' '.join(cmd)
+        resume = ['--continue']
+        if continue_:
+            cmd.extend(resume)
+            resume = []
+        tasks.append(maketask('learn', foldid, cmd, params=params,
+                              inputs=[cfgvars['configfile'], cfgvars['imagelistfile']],
+                              outputs=[cfgvars['datafile']], resume=resume))
+    return tasks
 
 # ----------------------------------------------------------------------------
 ## @brief Convert basis vectors to images.
+#
+# @param [in] cfg ConfigParser instance.
+#
+# @returns List of tasks, one for each fold.
 def show(cfg):
     # get configuration values
     foldids   = getfoldids(cfg)
-    configdir = cfg.get       (SETTINGS, 'configdir')
-    verbose   = cfg.getint    (SETTINGS, 'verbose')
-    simulate  = cfg.getboolean(SETTINGS, 'simulate')
-    # run step for each subset
-    jobids = []
+    configdir = cfg.get(SETTINGS, 'configdir')
+    # create task for each subset
+    tasks = []
     for foldid in foldids:
         cfgvars  = {'foldid': foldid}
         cfgvars['imagelistfile'] = os.path.join(configdir, cfg.get(TRAINING, 'imagelistfile', 0, cfgvars))
         cfgvars['datafile']      = os.path.join(configdir, cfg.get(TRAINING, 'datafile',      0, cfgvars))
         cfgvars['basisimagedir'] = os.path.join(configdir, cfg.get(TRAINING, 'basisimagedir', 0, cfgvars))
-        cmd   = shlex.split(cfg.get(COMMANDS, 'show', 0, cfgvars))
-        jobid = execute(cmd, verbose=verbose, simulate=simulate)
-        if jobid: jobids.append(jobid)
-    return jobids
+        cmd = shlex.split(cfg.get(COMMANDS, 'show', 0, cfgvars))
+        tasks.append(maketask('show', foldid, cmd, deps=['learn'],
+                              inputs=[cfgvars['imagelistfile'], cfgvars['datafile']],
+                              outputs=[cfgvars['basisimagedir']]))
+    return tasks
 
 # ----------------------------------------------------------------------------
 ## @brief Extract features given trained basis vectors.
 #
 # @param [in] cfg ConfigParser object.
+#
+# @returns List of tasks, one for each fold and data set.
 def extract(cfg):
     # get configuration values
     foldids    = getfoldids(cfg)
-    configdir  = cfg.get       (SETTINGS, 'configdir')
-    verbose    = cfg.getint    (SETTINGS, 'verbose')
-    simulate   = cfg.getboolean(SETTINGS, 'simulate')
-    # run step for each subset
-    jobids = []
+    configdir  = cfg.get(SETTINGS, 'configdir')
+    # create tasks for each subset
+    tasks = []
     for foldid in foldids:
         for s in (TRAINING, TESTING):
             cfgvars = {'foldid': foldid}
@@ -446,49 +2146,93 @@ def extract(cfg):
             cfgvars['imagelistfile'] = os.path.join(configdir, cfg.get(s, 'imagelistfile', 0, cfgvars))
             cfgvars['idlistfile']    = os.path.join(configdir, cfg.get(s, 'idlistfile',    0, cfgvars))
             cfgvars['featuresfile']  = os.path.join(configdir, cfg.get(s, 'featuresfile',  0, cfgvars))
-            cmd   = shlex.split(cfg.get(COMMANDS, 'extract', 0, cfgvars))
-            jobid = execute(cmd, verbose=verbose, simulate=simulate)
-            if jobid: jobids.append(jobid)
-    return jobids
+            cmd = shlex.split(cfg.get(COMMANDS, 'extract', 0, cfgvars))
+            tasks.append(maketask('extract', foldid, cmd, 'extract-' + s, deps=['learn'],
+                                  inputs=[cfgvars['datafile'], cfgvars['imagelistfile'], cfgvars['idlistfile']],
+                                  outputs=[cfgvars['featuresfile']]))
+    return tasks
 
 # ----------------------------------------------------------------------------
 ## @brief Find the best parameters for each classifier.
 #
 # @param [in] cfg ConfigParser object.
+#
+# @returns List of tasks, one for each fold.
 def search(cfg):
     # get configuration values
     foldids     = getfoldids(cfg)
-    configdir   = cfg.get       (SETTINGS, 'configdir')
-    verbose     = cfg.getint    (SETTINGS, 'verbose')
-    simulate    = cfg.getboolean(SETTINGS, 'simulate')
-    classifiers = cfg.get       (SETTINGS, 'classifiers')
-    # run step for each subset
-    jobids = []
+    configdir   = cfg.get(SETTINGS, 'configdir')
+    classifiers = cfg.get(SETTINGS, 'classifiers')
+    # the search mode is passed to wekaParamSearchForClassifier
+    mode     = searchmode(cfg)
+    modeargs = []
+    if mode != SEARCH_MODES[0]:
+        command = os.path.basename(shlex.split(cfg.get(COMMANDS, 'search', 1))[0])
+        if os.path.splitext(command)[0] != 'wekaParamSearchForClassifier':
+            raise Exception("Option 'searchmode' of [%s] section requires the wekaParamSearchForClassifier search command!" % SETTINGS)
+        modeargs = ['--searchMode', mode]
+    # create task for each subset
+    tasks = []
     for foldid in foldids:
         cfgvars = {'foldid': foldid, 'classifiers': classifiers}
         cfgvars['featuresfile']   = os.path.join(configdir, cfg.get(TRAINING, 'featuresfile',   0, cfgvars))
         cfgvars['bestparamsfile'] = os.path.join(configdir, cfg.get(TRAINING, 'bestparamsfile', 0, cfgvars))
-        cmd   = shlex.split(cfg.get(COMMANDS, 'search', 0, cfgvars))
-        jobid = execute(cmd, verbose=verbose, simulate=simulate)
-        if jobid: jobids.append(jobid)
-    return jobids
+        # the parameters found for a classifier do not depend on which other
+        # classifiers are searched, hence, the search is only repeated if the
+        # file with the best parameters lacks any of the named classifiers
+        params = ' '.join(shlex.split(cfg.get(COMMANDS, 'search', 0, dict(cfgvars, classifiers=''))) + modeargs)
+        def check(bestparamsfile=cfgvars['bestparamsfile']):
+            found = listclassifiers(bestparamsfile)
+            return not [c for c in classifiers.split(',') if not c.strip() in found]
+        task = maketask('search', foldid, None, deps=['extract-' + TRAINING], params=params,
+                        inputs=[cfgvars['featuresfile']], outputs=[cfgvars['bestparamsfile']],
+                        check=check, threads=slotsargs(cfg, 'search'))
+        # if the inputs and parameters are unchanged, only the classifiers
+        # missing in the file are searched, the others are kept by the merge
+        def cmd(task=task, cfgvars=cfgvars):
+            names = [c.strip() for c in classifiers.split(',')]
+            if task['stamped']:
+                found = listclassifiers(cfgvars['bestparamsfile'])
+                names = [c for c in names if not c in found]
+            return shlex.split(cfg.get(COMMANDS, 'search', 0, dict(cfgvars, classifiers=','.join(names)))) + modeargs
+        task['cmd'] = cmd
+        tasks.append(task)
+    return tasks
 
 # ----------------------------------------------------------------------------
 ## @brief Train classifiers using best parameters and classify samples.
 #
 # @param [in] cfg ConfigParser object.
+#
+# @returns List of tasks, one for each fold and classifier, or one for each
+#          fold if the results of all classifiers are combined.
 def classify(cfg):
     # get configuration values
     foldids       = getfoldids(cfg)
-    configdir     = cfg.get       (SETTINGS, 'configdir')
-    verbose       = cfg.getint    (SETTINGS, 'verbose')
-    simulate      = cfg.getboolean(SETTINGS, 'simulate')
+    configdir     = cfg.get(SETTINGS, 'configdir')
     classifiers   = [c.strip() for c in cfg.get(SETTINGS, 'classifiers').split(',')]
-    # run step for each subset
-    jobids = []
+    # wekaClassifier can run the tasks of all classifiers of a fold at once
+    batch = os.path.basename(shlex.split(cfg.get(COMMANDS, 'classify', 1))[0])
+    if os.path.splitext(batch)[0] != 'wekaClassifier': batch = None
+    # the evaluation on the training data may be skipped or reduced to the summary
+    evaluation = trainingevaluation(cfg)
+    evalargs   = []
+    if evaluation != 'full':
+        if batch is None:
+            raise Exception("Option 'evaluation' of [%s] section requires the wekaClassifier classify command!" % TRAINING)
+        if cfg.has_option(TRAINING, 'probabilityfile'):
+            raise Exception("Option 'probabilityfile' of [%s] section requires 'evaluation: full'!" % TRAINING)
+        evalargs = ['--trainEval', evaluation]
+    # or even train all classifiers of a fold by a single task
+    if combinedresults(cfg):
+        groups = [classifiers]
+    else:
+        groups = [[cls] for cls in classifiers]
+    # create tasks for each subset
+    tasks = []
     for foldid in foldids:
-        for cls in classifiers:
-            cfgvars = {'foldid': foldid, 'classifier': cls.replace(' ', '')}
+        for group in groups:
+            cfgvars = {'foldid': foldid, 'classifier': ','.join([cls.replace(' ', '') for cls in group])}
             cfgvars['bestparamsfile']        = os.path.join(configdir, cfg.get(TRAINING, 'bestparamsfile', 0, cfgvars))
             cfgvars['training.featuresfile'] = os.path.join(configdir, cfg.get(TRAINING, 'featuresfile',   0, cfgvars))
             cfgvars['training.resultfile']   = os.path.join(configdir, cfg.get(TRAINING, 'resultfile',     0, cfgvars))
@@ -496,21 +2240,54 @@ def classify(cfg):
             cfgvars['testing.featuresfile']  = os.path.join(configdir, cfg.get(TESTING,  'featuresfile',   0, cfgvars))
             cfgvars['testing.resultfile']    = os.path.join(configdir, cfg.get(TESTING,  'resultfile',     0, cfgvars))
             cfgvars['testing.resultheader']  =                         cfg.get(TESTING,  'resultcolumn',   0, cfgvars)
-            try:
-                (cfgvars['bestparams'], cfgvars['extraparams']) = bestparams(cfgvars['bestparamsfile'], cls)
-            except IOError, e:
-                sys.stderr.write("File with best parameters for each classifier could not be opened.\n")
-                sys.stderr.write("Have you run the parameter \"search\" step already ?\n")
-                raise e
-            if not cfgvars['bestparams']:
-                raise Exception('Failed to get best parameters of %s classifier!\n' \
-                                ' Check the file %s with the best parameters.\n'\
-                                ' Was the best parameter search successful and complete?' \
-                                       % (cls, cfgvars['bestparamsfile']))
-            cmd   = shlex.split(cfg.get(COMMANDS, 'classify', 0, cfgvars))
-            jobid = execute(cmd, verbose=verbose, simulate=simulate)
-            if jobid: jobids.append(jobid)
-    return jobids
+            # class probabilities are written by the same process if requested
+            probargs = []
+            for (section, option) in ((TRAINING, '--trainProbCSV'), (TESTING, '--testProbCSV')):
+                if cfg.has_option(section, 'probabilityfile'):
+                    cfgvars[section + '.probabilityfile'] = os.path.join(configdir, cfg.get(section, 'probabilityfile', 0, cfgvars))
+                    probargs.extend([option, cfgvars[section + '.probabilityfile']])
+            inputs = [cfgvars['training.featuresfile'], cfgvars['testing.featuresfile']]
+            if len(group) == 1:
+                # the best parameters are read when the task is executed
+                # because they are only known after the search step of this fold
+                def cmd(cls=group[0], cfgvars=cfgvars, probargs=probargs, evalargs=evalargs):
+                    try:
+                        (cfgvars['bestparams'], cfgvars['extraparams']) = bestparams(cfgvars['bestparamsfile'], cls)
+                    except IOError, e:
+                        sys.stderr.write("File with best parameters for each classifier could not be opened.\n")
+                        sys.stderr.write("Have you run the parameter \"search\" step already ?\n")
+                        raise e
+                    if not cfgvars['bestparams']:
+                        raise Exception('Failed to get best parameters of %s classifier!\n' \
+                                        ' Check the file %s with the best parameters.\n'\
+                                        ' Was the best parameter search successful and complete?' \
+                                               % (cls, cfgvars['bestparamsfile']))
+                    return shlex.split(cfg.get(COMMANDS, 'classify', 0, cfgvars)) + probargs + evalargs
+                # the command contains the best parameters of this classifier,
+                # hence, the file with the best parameters is no input itself
+                name = 'classify-' + cfgvars['classifier']
+            else:
+                # wekaClassifier reads the best parameters of all classifiers
+                # from the file, which is checked when the task is executed
+                def cmd(group=group, cfgvars=cfgvars, probargs=probargs, evalargs=evalargs):
+                    found = [c.replace(' ', '') for c in listclassifiers(cfgvars['bestparamsfile'])]
+                    missing = [cls for cls in group if not cls.replace(' ', '') in found]
+                    if missing:
+                        raise Exception('Failed to get best parameters of %s classifier!\n' \
+                                        ' Check the file %s with the best parameters.\n'\
+                                        ' Was the best parameter search successful and complete?' \
+                                               % (', '.join(missing), cfgvars['bestparamsfile']))
+                    return shlex.split(cfg.get(COMMANDS, 'classify', 0, dict(cfgvars, bestparams='', extraparams=''))) \
+                               + ['--bestParamsCSV', cfgvars['bestparamsfile']] + probargs + evalargs
+                name = 'classify'
+                inputs.append(cfgvars['bestparamsfile'])
+            # nothing is written to the training result file if not evaluated
+            outputs = [cfgvars['testing.resultfile']] + probargs[1::2]
+            if evaluation != 'none': outputs.insert(0, cfgvars['training.resultfile'])
+            tasks.append(maketask('classify', foldid, cmd, name,
+                                  deps=['search', 'extract-' + TESTING], batch=batch, inputs=inputs,
+                                  outputs=outputs, threads=slotsargs(cfg, 'classify')))
+    return tasks
 
 # ----------------------------------------------------------------------------
 ## @brief Summarize results and generate report.
@@ -522,7 +2299,9 @@ def summarize(cfg, ):
     classifiers = [c.strip() for c in cfg.get(SETTINGS, 'classifiers').split(',')]
     configdir   = cfg.get   (SETTINGS, 'configdir')
     avgmode     = cfg.getint(SETTINGS, 'avgmode')
+    replicates  = cfg.getint(SETTINGS, 'bootstrap')
     colname     = cfg.get   (TESTING,  'resultcolumn', 0, {'foldid': 0, 'classifier': ''})
+    combined    = combinedresults(cfg)
     # remove previous summary reports
     for cls in classifiers:
         cfgvars = {'classifier': cls.replace(' ', '')}
@@ -539,47 +2318,93 @@ def summarize(cfg, ):
             cfgvars['foldid'] = foldid
             trainresultfiles.append(os.path.join(configdir, cfg.get(TRAINING, 'resultfile', 0, cfgvars)))
             testresultfiles .append(os.path.join(configdir, cfg.get(TESTING,  'resultfile', 0, cfgvars)))
-        write_summary(cls, trainresultfiles, testresultfiles, summaryfile, avgmode, colname)
+        if combined:
+            write_summary(cls, trainresultfiles, testresultfiles, summaryfile, avgmode,
+                          colname + '-' + cls.replace(' ', ''), replicates)
+        else:
+            write_summary(cls, trainresultfiles, testresultfiles, summaryfile, avgmode, colname, replicates)
     return []
 
+# ----------------------------------------------------------------------------
+## @brief Print slowest tasks and time spent in each step.
+#
+# Only the most recent execution of each task recorded in the timings file
+# is considered.
+#
+# @param [in] cfg ConfigParser object.
+def profile(cfg):
+    # get most recent timings of each task
+    latest = {}
+    for row in readtimings(cfg):
+        latest[(row['foldid'], row['task'])] = row
+    if not latest:
+        print "No timings recorded in %s" % gettimingsfile(cfg)
+        return
+    def number(row, column):
+        try:
+            return float(row[column])
+        except ValueError:
+            return 0.0
+    rows = latest.values()
+    rows.sort(key=lambda row: number(row, 'wall'), reverse=True)
+    # slowest tasks
+    print "Slowest tasks:"
+    print
+    print "  %-6s  %-24s  %12s  %12s  %12s  %-8s" % ('Fold', 'Task', 'Wall [s]', 'CPU [s]', 'RSS [MB]', 'State')
+    for row in rows[:PROFILE_NUM_TASKS]:
+        print "  %-6s  %-24s  %12.1f  %12.1f  %12.1f  %-8s" % (row['foldid'], row['task'],
+                number(row, 'wall'), number(row, 'cpu'), number(row, 'maxrss') / 1024, row['state'])
+    print
+    # per-step breakdown
+    print "Time spent in each step:"
+    print
+    print "  %-10s  %6s  %12s  %12s  %12s  %12s  %12s" % ('Step', 'Tasks', 'Wall [s]', 'Mean [s]',
+                                                         'Max [s]', 'CPU [s]', 'Max RSS [MB]')
+    total = 0.0
+    for step in STEPS:
+        steprows = [row for row in rows if row['step'] == step]
+        if not steprows: continue
+        wall = [number(row, 'wall') for row in steprows]
+        total += sum(wall)
+        print "  %-10s  %6d  %12.1f  %12.1f  %12.1f  %12.1f  %12.1f" % (step, len(steprows),
+                sum(wall), sum(wall) / len(wall), max(wall),
+                sum([number(row, 'cpu') for row in steprows]),
+                max([number(row, 'maxrss') for row in steprows]) / 1024)
+    print "  %-10s  %6d  %12.1f" % ('total', len(rows), total)
+    print
+
 # ============================================================================
 # main
 # ============================================================================
 
 # ----------------------------------------------------------------------------
 ## @brief Perform specified steps for all cross-validation sets.
+#
+# The tasks of all specified steps except the summarize step are executed
+# per fold in the order given by their dependencies, i.e., the next step of
+# one fold is started as soon as the previous step of this fold is finished.
+# The summarize and profile steps are performed once all other tasks are finished.
 def main(steps, cfg):
-    verbose = cfg.getint(SETTINGS, 'verbose')
-    for i in range(len(steps)):
-        steps[i] = steps[i].lower()
-        if not steps[i] in STEPS:
-            raise Exception("Invalid processing step: %s! Valid steps are: %s"
-                                % (steps[i], ', '.join(STEPS)))
-    for step in steps:
-        if step == 'all':
-            steps = STEPS
-            break
+    steps = [step.lower() for step in steps]
     for step in steps:
-        # run next step
-        if   step == 'learn':     jobids = learn    (cfg)
-        elif step == 'show':      jobids = show     (cfg)
-        elif step == 'extract':   jobids = extract  (cfg)
-        elif step == 'search':    jobids = search   (cfg)
-        elif step == 'classify':  jobids = classify (cfg)
-        elif step == 'summarize': jobids = summarize(cfg)
+        if step != 'all' and not step in STEPS:
+            raise Exception("Invalid processing step: %s! Valid steps are: %s"
+                                % (step, ', '.join(STEPS + ['all'])))
+    if 'all' in steps: steps = STEPS
+    tasks = []
+    for step in STEPS:
+        if not step in steps: continue
+        if   step == 'learn':     tasks.extend(learn   (cfg))
+        elif step == 'show':      tasks.extend(show    (cfg))
+        elif step == 'extract':   tasks.extend(extract (cfg))
+        elif step == 'search':    tasks.extend(search  (cfg))
+        elif step == 'classify':  tasks.extend(classify(cfg))
+        elif step == 'summarize': pass
+        elif step == 'profile':   pass
         else: assert False, 'unhandled step'
-        # wait for submitted batch jobs
-        if cfg.getboolean(SETTINGS, 'sync') and cfg.has_option(COMMANDS, 'jobstat'):
-            while jobids:
-                cmd = cfg.get(COMMANDS, 'jobstat', 0, {'jobid': jobids[-1]})
-                if cmd: status = basis.execute(cmd, allow_fail=True, quiet=True)
-                else:   break
-                if status != 0:
-                    if verbose > 0: print "Job %s finished." % jobid
-                    jobids.pop()
-                else:
-                    if verbose > 0: print "Job %s running. Waiting for job to finish." % jobid
-                    time.sleep(60)
+    run(tasks, cfg)
+    if 'summarize' in steps: summarize(cfg)
+    if 'profile'   in steps: profile  (cfg)
 
 # ----------------------------------------------------------------------------
 ## @brief Parse command-line arguments and call main() function.
@@ -593,9 +2418,15 @@ if __name__ == '__main__':
     configfile = 'crossval.cfg'
     foldids    = None
     avgmode    = 1
+    replicates = None
     continue_  = False
+    resume     = False
+    force      = False
     simulate   = False
     verbose    = 0
+    jobs       = None
+    slots      = None
+    executor   = None
 
     # getopt ignores all options (such as --foldids) following a positional
     # argument (such as 'learn'). we would like to allow for both of the
@@ -603,14 +2434,14 @@ if __name__ == '__main__':
     # $ gondola-crossval --configfile crossval.cfg --foldids 1,2,3 learn
     # $ gondola-crossval learn --configfile crossval.cfg --foldids 1,2,3
     i = 1
-    while i < len(sys.argv) and sys.argv[i].lower() in STEPS:
+    while i < len(sys.argv) and sys.argv[i].lower() in STEPS + ['all']:
         steps.append(sys.argv[i])
         i += 1
     if i < len(sys.argv):
         try:
-            opts, args = getopt(sys.argv[i:], "c:msvh",
-                                ["configfile=", "foldids=", "macroavg",
-                                 "continue", "sync", "nosync", "simulate", "verbose", "help"])
+            opts, args = getopt(sys.argv[i:], "c:j:msvh",
+                                ["configfile=", "foldids=", "jobs=", "slots=", "executor=", "macroavg", "bootstrap=",
+                                 "continue", "resume", "force", "sync", "nosync", "simulate", "verbose", "help"])
             steps.extend(args)
         except GetoptError, e:
             sys.stderr.write("%s\n" % str(e))
@@ -626,12 +2457,44 @@ if __name__ == '__main__':
                 simulate = True
             elif o == '--foldids':
                 foldids = a
+            elif o in ('-j', '--jobs'):
+                try:
+                    jobs = int(a)
+                    if jobs < 1: raise ValueError
+                except ValueError:
+                    sys.stderr.write("Option %s requires a positive integer as argument!\n" % o)
+                    sys.exit(1)
+            elif o == '--slots':
+                try:
+                    slots = int(a)
+                    if slots < 1: raise ValueError
+                except ValueError:
+                    sys.stderr.write("Option %s requires a positive integer as argument!\n" % o)
+                    sys.exit(1)
+            elif o == '--executor':
+                if not a.lower() in EXECUTORS:
+                    sys.stderr.write("Invalid executor: %s! Valid executors are: %s\n" % (a, ', '.join(EXECUTORS)))
+                    sys.exit(1)
+                executor = a.lower()
+            elif o == '--continue':
+                continue_ = True
+            elif o == '--resume':
+                resume = True
+            elif o == '--force':
+                force = True
             elif o == '--sync':
                 sync = True
             elif o == '--nosync':
                 sync = False
             elif o in ('-m', '--macroavg'):
                 avgmode = 2
+            elif o == '--bootstrap':
+                try:
+                    replicates = int(a)
+                    if replicates < 0: raise ValueError
+                except ValueError:
+                    sys.stderr.write("Option %s requires a non-negative integer as argument!\n" % o)
+                    sys.exit(1)
             elif o in ('-c', '--configfile'):
                 configfile = a
             else:
@@ -642,9 +2505,9 @@ if __name__ == '__main__':
         sys.exit(1)
     for i in range(len(steps)):
         steps[i] = steps[i].lower()
-        if not steps[i] in STEPS:
+        if steps[i] != 'all' and not steps[i] in STEPS:
             sys.stderr.write("Invalid processing step: %s! Valid steps are: %s\n"
-                                % (steps[i], ', '.join(STEPS)))
+                                % (steps[i], ', '.join(STEPS + ['all'])))
             sys.exit(1)
     if not os.path.isfile(configfile):
         if configfile == 'crossval.cfg':
@@ -660,9 +2523,22 @@ if __name__ == '__main__':
         cfg.readfp(open(configfile), configfile)
         # add configuration values given by command-line
         if foldids: cfg.set(SETTINGS, 'foldids', foldids)
+        if jobs:    cfg.set(SETTINGS, 'jobs',    str(jobs))
+        elif not cfg.has_option(SETTINGS, 'jobs'):
+                    cfg.set(SETTINGS, 'jobs',    '1')
+        if slots:   cfg.set(SETTINGS, 'slots',   str(slots))
+        elif not cfg.has_option(SETTINGS, 'slots'):
+                    cfg.set(SETTINGS, 'slots',   '1')
+        if executor: cfg.set(SETTINGS, 'executor', executor)
         cfg.set(SETTINGS, 'sync',      str(sync))
         cfg.set(SETTINGS, 'continue',  str(continue_))
+        cfg.set(SETTINGS, 'resume',    str(resume))
+        cfg.set(SETTINGS, 'force',     str(force))
         cfg.set(SETTINGS, 'avgmode',   str(avgmode))
+        if replicates is not None:
+            cfg.set(SETTINGS, 'bootstrap', str(replicates))
+        elif not cfg.has_option(SETTINGS, 'bootstrap'):
+            cfg.set(SETTINGS, 'bootstrap', '0')
         cfg.set(SETTINGS, 'verbose',   str(verbose))
         cfg.set(SETTINGS, 'simulate',  str(simulate))
         cfg.set(SETTINGS, 'configdir', os.path.dirname(configfile))
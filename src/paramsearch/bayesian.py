@@ -16,14 +16,11 @@ import java.io.FileReader as FileReader
 import weka.core.Instances as Instances
 import weka.classifiers.bayes.NaiveBayes as NaiveBayes
 import weka.classifiers.bayes.NaiveBayesMultinomial as NaiveBayesMultinomial 
-import weka.classifiers.Evaluation as Evaluation
-import weka.core.Range as Range
 import weka.core.SelectedTag as SelectedTag
 
 import java.lang.StringBuffer as StringBuffer
 import java.lang.String as String
 import java.lang.Boolean as Boolean
-import java.util.Random as Random
 
 from . import util
 
@@ -46,36 +43,17 @@ def allAttributesPositive(data):
 def Bayes_ParamFinder(data):
     # -----------------------  Evaluation of Naive Bayes without kernel estimation
     naivebayes = NaiveBayes()
-    evaluation = Evaluation(data)
-    output = util.get_buffer_for_predictions()[0]
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    random = Random(1)
-    numFolds = min(10,data.numInstances())
-    evaluation.crossValidateModel(naivebayes,data,numFolds,random,[output, attRange, outputDistribution])
-    acc_naivebayes = evaluation.pctCorrect()
+    acc_naivebayes = util.cross_validate(naivebayes, data)
     print "Naive Bayesisn accuracy (without kernel density estimation): ", acc_naivebayes
     # -----------------------  Evaluation of Naive Bayes with kernel estimation
     naivebayes = NaiveBayes()
     naivebayes.setUseKernelEstimator(Boolean(True))   # use kernel density estimation
-    evaluation = Evaluation(data)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    random = Random(1)
-    numFolds = min(10,data.numInstances())
-    evaluation.crossValidateModel(naivebayes,data,numFolds,random,[output, attRange, outputDistribution])
-    acc_naivebayes_withkernel = evaluation.pctCorrect()
+    acc_naivebayes_withkernel = util.cross_validate(naivebayes, data)
     print "Naive Bayesisn accuracy (with kernel density estimation): ", acc_naivebayes_withkernel
     # -----------------------  Evaluation of Naive bayes multinomial
     naivebayesmultinomial = NaiveBayesMultinomial()
-    evaluation = Evaluation(data)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    random = Random(1)
     if (allAttributesPositive(data)):  # multinomial bayes classifier only work on positive attributes
-        numFolds = min(10,data.numInstances())
-        evaluation.crossValidateModel(naivebayesmultinomial,data,numFolds,random,[output, attRange, outputDistribution])
-        acc_naivemultinomialbayes = evaluation.pctCorrect()
+        acc_naivemultinomialbayes = util.cross_validate(naivebayesmultinomial, data)
     else:
         acc_naivemultinomialbayes = 0
     print "Naive Multinomial Bayesisn accuracy : ", acc_naivemultinomialbayes
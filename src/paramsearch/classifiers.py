@@ -0,0 +1,228 @@
+##############################################################################
+# @file  classifiers.py
+# @brief Construction of classifiers with the best parameters found.
+#
+# Copyright (c) 2011, 2012 University of Pennsylvania. All rights reserved.
+# See http://www.rad.upenn.edu/sbia/software/license.html or COPYING file.
+#
+# Contact: SBIA Group <sbia-software at uphs.upenn.edu>
+##############################################################################
+
+import string as JyString
+
+import java.lang.Boolean as Boolean
+import java.lang.String as String
+
+# SMO imports
+import weka.classifiers.functions.SMO as SMO
+import weka.classifiers.functions.supportVector.PolyKernel as PolyKernel
+import weka.classifiers.functions.supportVector.RBFKernel as RBFKernel
+
+# Logistic imports
+import weka.classifiers.functions.Logistic as Logistic
+
+# Simple Logistic imports
+import weka.classifiers.functions.SimpleLogistic as SimpleLogistic
+
+# Random Forest imports
+import weka.classifiers.trees.RandomForest as RandomForest
+
+# Bayesian imports
+import weka.classifiers.bayes.NaiveBayes as NaiveBayes
+import weka.classifiers.bayes.NaiveBayesMultinomial as NaiveBayesMultinomial
+
+# Bagging imports
+import weka.classifiers.meta.Bagging as Bagging
+
+# AdaBoostM1 imports
+import weka.classifiers.meta.AdaBoostM1 as AdaBoostM1
+
+# ============================================================================
+# auxiliary functions
+# ============================================================================
+
+# ----------------------------------------------------------------------------
+# convert string to boolean
+def str2bool(st):
+    map = {"false":False, "true":True}
+    b = map[String(JyString.lower(st)).trim()]
+    return b
+
+# ============================================================================
+# classifiers
+# ============================================================================
+
+# Each of the following functions returns a new classifier which is configured
+# with the given parameters, but not trained yet. If probability is True, the
+# classifier is set up to estimate class probabilities if this requires other
+# settings, i.e., logistic models are fit to the outputs of SMO classifiers.
+
+# ----------------------------------------------------------------------------
+# logistic classifier
+def logistic(trainData,params,exparams,probability=False):
+    ridge = float(params[0])
+    maxIt = int(float(params[1]))
+    print "Ridge=%s, maxIt=%s" %(str(ridge),str(maxIt))
+    logistic = Logistic()
+    logistic.setMaxIts(maxIt)
+    logistic.setRidge(ridge)
+    return logistic
+
+# ----------------------------------------------------------------------------
+# bagging on logistic classifier
+def bagging_logistic(trainData,params,exparams,probability=False):
+    IsOptBagOnOptLog = str2bool(params[0])
+    logistic = Logistic()
+    bagging = Bagging()
+    if IsOptBagOnOptLog:    # optimal bagging is based on optimal logistic
+        ridge = float(exparams[0])
+        maxIt = int(float(exparams[1]))
+        logistic.setMaxIts(maxIt)
+        bagSizePercent = int(float(params[1]))
+        bagging.setBagSizePercent(bagSizePercent)
+    else:   # ridge parameter is also optimized in the process
+        ridge = float(params[1])
+    numIterations = int(float(params[2]))
+    bagging.setNumIterations(numIterations)
+    logistic.setRidge(ridge)
+    bagging.setClassifier(logistic)
+    return bagging
+
+# ----------------------------------------------------------------------------
+# SMO classifier
+def smo(trainData,params,exparams,probability=False):
+    kerType = str2bool(params[0])
+    cValue = float(params[1])
+    kerParam = float(params[2])
+    if kerType:     # RBF kernel
+        kernel = RBFKernel()
+        kernel.setGamma(kerParam)
+    else:       # Polynomial kernel
+        kernel = PolyKernel()
+        kernel.setExponent(kerParam)
+    smo = SMO()
+    smo.setKernel(kernel)
+    smo.setC(cValue)
+    if probability:
+        smo.setBuildLogisticModels(Boolean(True))   # build a logistic on the top of svm output
+    return smo
+
+# ----------------------------------------------------------------------------
+# random-forest classifier
+def random_forest(trainData,params,exparams,probability=False):
+    numTrees = int(float(params[0]))
+    numFeatures = int(float(params[1]))
+    randomforest = RandomForest()
+    randomforest.setNumTrees(numTrees)
+    randomforest.setNumFeatures(numFeatures)
+    return randomforest
+
+# ----------------------------------------------------------------------------
+# bayesian classifier
+def bayesian(trainData,params,exparams,probability=False):
+    IsOptMultinomialBayes   = str2bool(params[0])
+    IsOptNaiveKernelDensity = str2bool(params[1])
+    if IsOptMultinomialBayes:    # optimal bayesian classifier is multinomial
+        bayes = NaiveBayesMultinomial()
+    else:
+        bayes = NaiveBayes()
+        if IsOptNaiveKernelDensity:   # use kernel density estimation
+            bayes.setUseKernelEstimator(Boolean(True))
+    return bayes
+
+# ----------------------------------------------------------------------------
+# bagging over SMO
+def baggin_smo(trainData,params,exparams,probability=False):
+    IsOptBagOnOptSMO =  str2bool(params[0])
+    if IsOptBagOnOptSMO:    # optimal bagging is based on optimal SMO thus I should use extra params
+        kerType =  str2bool(params[0])
+        cValue = float(exparams[1])
+        kerParam = float(exparams[2])
+        if kerType:     # RBF kernel
+            kernel = RBFKernel()
+            kernel.setGamma(kerParam)
+        else:       # Polynomial kernel
+            kernel = PolyKernel()
+            kernel.setExponent(kerParam)
+        bagSizePercent = int(float(params[1]))
+        numIterations = int(float(params[2]))
+        smo = SMO()
+        bagging = Bagging()
+        smo.setKernel(kernel)
+        smo.setC(cValue)
+        bagging.setBagSizePercent(bagSizePercent)
+        bagging.setNumIterations(numIterations)
+        bagging.setClassifier(smo)
+    else:   # optimal bagging is based on linear SMO
+        cValue = float(params[1])
+        numIterations = int(float(params[2]))
+        smo = SMO()
+        bagging = Bagging()
+        kernel = PolyKernel()
+        smo.setKernel(kernel)
+        smo.setC(cValue)
+        bagging.setNumIterations(numIterations)
+        bagging.setClassifier(smo)
+    if probability:
+        smo.setBuildLogisticModels(Boolean(True))
+    return bagging
+
+# ----------------------------------------------------------------------------
+# simple-logistic classifier
+def simple_logistic(trainData,params,exparams,probability=False):
+    heuristicStop = int(float(params[0]))
+    numBoostingIterations = int(float(params[1]))
+    simplelogistic = SimpleLogistic()
+    simplelogistic.setHeuristicStop(heuristicStop)
+    simplelogistic.setNumBoostingIterations(numBoostingIterations)
+    if (trainData.numInstances()<5):   # special case for small sample size
+        simplelogistic.setUseCrossValidation(False)
+    return simplelogistic
+
+# ----------------------------------------------------------------------------
+# AdaboostM1 on simple-logistic classifier
+def adaboostM1_simple_logistic(trainData,params,exparams,probability=False):
+    IsOptBoostOnOptSimpLog = str2bool(params[0])
+    simplelogistic = SimpleLogistic()
+    adaboostm = AdaBoostM1()
+    if IsOptBoostOnOptSimpLog:  # optimal adaboost is based on optimal simple logisatic
+        heuristicStop = int(float(exparams[0]))
+        numBoostingIterations = int(float(exparams[1]))
+        weightThreshold = int(float(params[1]))
+        numIterations = int(float(params[2]))
+        simplelogistic.setHeuristicStop(heuristicStop)
+        simplelogistic.setNumBoostingIterations(numBoostingIterations)
+        adaboostm.setWeightThreshold(weightThreshold)
+        adaboostm.setNumIterations(numIterations)
+    else:
+        numBoostingIterations = int(float(params[1]))
+        numIterations = int(float(params[2]))
+        simplelogistic.setNumBoostingIterations(numBoostingIterations)
+        adaboostm.setNumIterations(numIterations)
+    adaboostm.setClassifier(simplelogistic)
+    return adaboostm
+
+# ============================================================================
+# constants
+# ============================================================================
+
+# Attention: Must be following the definition of the classifier functions!
+
+CLASSIFIER = {
+    'BaggingLogistic':       bagging_logistic,
+    'Logistic':              logistic,
+    'SimpleLogistic':        simple_logistic,
+    'SMO':                   smo,
+    'RandomForest':          random_forest,
+    'Bayesian':              bayesian,
+    'BaggingSMO':            baggin_smo,
+    'BoostedSimpleLogistic': adaboostM1_simple_logistic
+}
+
+## @brief Classifiers whose extra parameters are the best parameters of
+#         the base classifier, where spaces are removed from the names.
+META_TO_CORE_CLASSIFIER = {
+    'BaggingLogistic':       'Logistic',
+    'BaggingSMO':            'SMO',
+    'BoostedSimpleLogistic': 'SimpleLogistic'
+}
@@ -0,0 +1,237 @@
+##############################################################################
+# @file  kernels.py
+# @brief Cross-validation of SMO classifiers with precomputed kernel matrices.
+#
+# Copyright (c) 2012 University of Pennsylvania. All rights reserved.
+# See http://www.rad.upenn.edu/sbia/software/license.html or COPYING file.
+#
+# Contact: SBIA Group <sbia-software at uphs.upenn.edu>
+##############################################################################
+
+import threading
+
+import weka.core.Attribute as Attribute
+import weka.core.FastVector as FastVector
+import weka.core.Instances as Instances
+import weka.core.SelectedTag as SelectedTag
+import weka.core.Utils as Utils
+import weka.core.matrix.Matrix as Matrix
+import weka.classifiers.Evaluation as Evaluation
+import weka.classifiers.functions.SMO as SMO
+import weka.classifiers.functions.supportVector.Kernel as Kernel
+import weka.filters.Filter as Filter
+import weka.filters.unsupervised.attribute.NominalToBinary as NominalToBinary
+import weka.filters.unsupervised.attribute.Normalize as Normalize
+import weka.filters.unsupervised.attribute.ReplaceMissingValues as ReplaceMissingValues
+import weka.filters.unsupervised.attribute.Standardize as Standardize
+try:
+    import weka.core.DenseInstance as DenseInstance  # Weka 3.7 and later
+except ImportError:
+    import weka.core.Instance as DenseInstance
+try:
+    import weka.classifiers.functions.supportVector.PrecomputedKernelMatrixKernel as PrecomputedKernelMatrixKernel
+except ImportError:
+    PrecomputedKernelMatrixKernel = None
+
+from . import util
+
+# ============================================================================
+# kernel matrices
+# ============================================================================
+
+# ----------------------------------------------------------------------------
+# maximum number of entries of all cached kernel matrices, i.e., 256 MB
+_maxCacheSize = 2 ** 25
+
+# ----------------------------------------------------------------------------
+# kernel matrices of the folds returned by util.get_folds(), where the key of
+# each matrix is the tuple of kernel class, kernel options, SMO filter type,
+# and fold index, and the keys of the matrices in the order of their last use
+#
+# If the matrices exceed _maxCacheSize entries, the least recently used
+# matrices are removed. Hence, the cells of a grid should be evaluated
+# grouped by their kernel (see group()).
+_cache = {'folds': None, 'matrices': {}, 'keys': [], 'size': 0}
+_lock  = threading.Lock()
+
+# ----------------------------------------------------------------------------
+# copy training and testing set of a fold with the filters applied by SMO
+#
+# The filters are set up on the training instances which SMO uses to train
+# the classifier, i.e., without instances of missing class or zero weight.
+def _filter(smo, train, test):
+    fitData = Instances(train)
+    fitData.deleteWithMissingClass()
+    for i in range(fitData.numInstances() - 1, -1, -1):
+        if fitData.instance(i).weight() == 0: fitData.delete(i)
+    filters = [ReplaceMissingValues()]
+    for i in range(train.numAttributes()):
+        if i != train.classIndex() and not train.attribute(i).isNumeric():
+            filters.append(NominalToBinary())
+            break
+    filterType = smo.getFilterType().getSelectedTag().getID()
+    if filterType == SMO.FILTER_NORMALIZE:
+        filters.append(Normalize())
+    elif filterType == SMO.FILTER_STANDARDIZE:
+        filters.append(Standardize())
+    for f in filters:
+        f.setInputFormat(fitData)
+        fitData = Filter.useFilter(fitData, f)
+        train = Filter.useFilter(train, f)
+        test  = Filter.useFilter(test,  f)
+    return train, test
+
+# ----------------------------------------------------------------------------
+# compute kernel matrix of all instances of a fold, where the rows of the
+# training instances precede those of the testing instances
+def _compute(smo, train, test):
+    (train, test) = _filter(smo, train, test)
+    data = Instances(train)
+    for i in range(test.numInstances()):
+        data.add(test.instance(i))
+    kernel = Kernel.makeCopy(smo.getKernel())
+    kernel.buildKernel(data)
+    n = data.numInstances()
+    matrix = Matrix(n, n)
+    for i in range(n):
+        instance = data.instance(i)
+        for j in range(i + 1):
+            value = kernel.eval(i, j, instance)
+            matrix.set(i, j, value)
+            matrix.set(j, i, value)
+    kernel.clean()
+    return matrix
+
+# ----------------------------------------------------------------------------
+# get kernel matrix of a fold, which is computed only once per kernel unless
+# it was removed from the cache meanwhile
+def _get_matrix(smo, folds, index):
+    key = group(smo) + (index,)
+    _lock.acquire()
+    try:
+        if _cache['folds'] is not folds:
+            _cache['folds']    = folds
+            _cache['matrices'] = {}
+            _cache['keys']     = []
+            _cache['size']     = 0
+        matrix = _cache['matrices'].get(key)
+        if matrix is not None:
+            _cache['keys'].remove(key)
+            _cache['keys'].append(key)
+    finally:
+        _lock.release()
+    if matrix is None:
+        (train, test) = folds[index]
+        matrix = _compute(smo, train, test)
+        _lock.acquire()
+        try:
+            if _cache['folds'] is folds and not _cache['matrices'].has_key(key):
+                _cache['matrices'][key] = matrix
+                _cache['keys'].append(key)
+                _cache['size'] = _cache['size'] + matrix.getRowDimension() * matrix.getColumnDimension()
+                while _cache['size'] > _maxCacheSize and len(_cache['keys']) > 1:
+                    removed = _cache['matrices'].pop(_cache['keys'].pop(0))
+                    _cache['size'] = _cache['size'] - removed.getRowDimension() * removed.getColumnDimension()
+        finally:
+            _lock.release()
+    return matrix
+
+# ============================================================================
+# cross-validation
+# ============================================================================
+
+# ----------------------------------------------------------------------------
+# copy training and testing set of a fold, where each instance is replaced by
+# its index in the kernel matrix and the class value
+#
+# The training set contains only the instances which SMO would use to train
+# the classifier, as SMO does not remove any instance if its checks are off.
+def _index_sets(train, test):
+    n = train.numInstances() + test.numInstances()
+    values = FastVector(n)
+    for i in range(n): values.addElement(str(i))
+    attributes = FastVector(2)
+    attributes.addElement(Attribute('index', values))
+    attributes.addElement(train.classAttribute().copy())
+    sets = []
+    offset = 0
+    for data in (train, test):
+        indices = Instances('kernel-index', attributes, data.numInstances())
+        indices.setClassIndex(1)
+        for i in range(data.numInstances()):
+            instance = data.instance(i)
+            if data is train and (instance.classIsMissing() or instance.weight() == 0): continue
+            indices.add(DenseInstance(instance.weight(), [float(offset + i), instance.classValue()]))
+        sets.append(indices)
+        offset = offset + data.numInstances()
+    return sets[0], sets[1]
+
+# ----------------------------------------------------------------------------
+## @brief Key of the kernel matrices used to cross-validate an SMO classifier.
+#
+# SMO classifiers with the same key, i.e., which differ only in parameters
+# such as C, share the kernel matrices. Can be passed to
+# util.cross_validate_grid() such that these are evaluated one after another.
+#
+# @returns Tuple of kernel class, kernel options, and filter type of an SMO
+#          classifier or @c None for other classifiers.
+def group(classifier):
+    if not isinstance(classifier, SMO): return None
+    kernel = classifier.getKernel()
+    return (kernel.getClass().getName(), Utils.joinOptions(kernel.getOptions()),
+            classifier.getFilterType().getSelectedTag().getID())
+
+# ----------------------------------------------------------------------------
+## @brief Whether an SMO classifier can be cross-validated by cross_validate().
+#
+# Besides the classifier and the Weka version, the number of instances of
+# the dataset must be small enough such that the kernel matrix of a fold,
+# which contains all instances, fits into the cache.
+def supported(classifier, data=None):
+    return PrecomputedKernelMatrixKernel is not None \
+           and hasattr(PrecomputedKernelMatrixKernel, 'setKernelMatrix') \
+           and isinstance(classifier, SMO) \
+           and (data is None or data.numInstances() * data.numInstances() <= _maxCacheSize)
+
+# ----------------------------------------------------------------------------
+## @brief Cross-validate SMO classifier using kernel matrices computed once.
+#
+# The kernel matrix of the training and testing instances of each fold (see
+# util.get_folds()) is computed once per kernel and its parameters with the
+# same filters as those applied by SMO and reused for every value of the
+# complexity parameter C. The SMO classifier of each fold is then trained on
+# instances which only reference the rows of this matrix. Hence, a sweep over
+# C costs mostly the time of the SMO optimizer itself. The accuracy equals
+# the one computed by util.cross_validate() up to rounding differences of
+# linear kernels, whose outputs SMO otherwise computes from explicit weights.
+#
+# Other classifiers, SMO classifiers if the Weka version lacks a
+# PrecomputedKernelMatrixKernel whose matrix can be set, and datasets whose
+# kernel matrices are too large (see supported()) are evaluated by
+# util.cross_validate().
+#
+# @param [in] classifier  SMO classifier configured with its parameters.
+# @param [in] data        Dataset.
+# @param [in] foldIndices Indices of the folds to evaluate, all if None.
+#
+# @returns Percentage of correctly classified instances.
+def cross_validate(classifier, data, foldIndices=None):
+    if not supported(classifier, data):
+        return util.cross_validate(classifier, data, foldIndices)
+    folds = util.get_folds(data)
+    if foldIndices is None: foldIndices = range(len(folds))
+    evaluation = None
+    for index in foldIndices:
+        (train, test) = _index_sets(folds[index][0], folds[index][1])
+        kernel = PrecomputedKernelMatrixKernel()
+        kernel.setKernelMatrix(_get_matrix(classifier, folds, index))
+        smo = util.ClassifierFactory.makeCopy(classifier)
+        smo.setKernel(kernel)
+        smo.setFilterType(SelectedTag(SMO.FILTER_NONE, SMO.TAGS_FILTER))
+        smo.turnChecksOff()
+        if evaluation is None: evaluation = Evaluation(train)
+        # the class priors of the original training set as crossValidateModel()
+        evaluation.setPriors(folds[index][0])
+        smo.buildClassifier(train)
+        evaluation.evaluateModel(smo, test, [])
+    return evaluation.pctCorrect()
@@ -13,8 +13,6 @@ import sys
 import java.io.FileReader as FileReader
 import weka.core.Instances as Instances
 import weka.classifiers.functions.Logistic as Logistic
-import weka.classifiers.Evaluation as Evaluation
-import weka.core.Range as Range
 import weka.classifiers.meta.GridSearch as GridSearch
 import weka.core.SelectedTag as SelectedTag
 import weka.filters.AllFilter as AllFilters
@@ -22,35 +20,96 @@ import weka.filters.AllFilter as AllFilters
 import java.lang.StringBuffer as StringBuffer
 import java.lang.String as String
 import java.lang.Boolean as Boolean
-import java.util.Random as Random
 
 from . import util
+from . import ridgepath
 
 # ----------------------------------------------------------------------------
-def myGridSearch(data,RBound,MBound):
+# search the best ridge value and maximum number of iterations with Weka's
+# GridSearch, returns the tuple of Logistic classifier, ridge exponent, and
+# maximum number of iterations of the best cell
+def _wekaGridSearch(data,RBound,MBound):
+    gridsearch = GridSearch()
+    acctag = gridsearch.getEvaluation()
+    acctag = SelectedTag('ACC',acctag.getTags())
+    gridsearch.setEvaluation(acctag)
+    allfilters = AllFilters()
+    gridsearch.setFilter(allfilters)
+    gridsearch.setGridIsExtendable(Boolean(True))
+    logistic = Logistic()
+    gridsearch.setClassifier(logistic)
+    gridsearch.setXProperty(String('classifier.maxIts'))
+    gridsearch.setYProperty(String('classifier.ridge'))
+    gridsearch.setXExpression(String('I'))
+    gridsearch.setYExpression(String('pow(BASE,I)'))
+    gridsearch.setXMin(MBound[0])
+    gridsearch.setXMax(MBound[1])
+    gridsearch.setXStep(MBound[2])
+    gridsearch.setYMin(RBound[0])
+    gridsearch.setYMax(RBound[1])
+    gridsearch.setYStep(RBound[2])
+    gridsearch.setYBase(10)
+    gridsearch.buildClassifier(data)
+    bestValues = gridsearch.getValues()
+    bestlogistic = Logistic()
+    bestlogistic.setMaxIts(int(bestValues.x))
+    bestlogistic.setRidge(pow(10,bestValues.y))
+    return bestlogistic, bestValues.y, int(bestValues.x)
+
+# ----------------------------------------------------------------------------
+def myGridSearch(data,RBound,MBound,numSlots=1,searchMode='grid'):
     bestlogistic = None
     best_acc     = -float('inf')
     class bestValues(object):
         m = float('nan')
         r = float('nan')
-    for r in range(RBound[0],RBound[1]+RBound[2],RBound[2]):
-        for m in range(MBound[0],MBound[1]+MBound[2],MBound[2]):
+    exponents  = range(RBound[0],RBound[1]+RBound[2],RBound[2])
+    iterations = range(MBound[0],MBound[1]+MBound[2],MBound[2])
+    # the cells which are trained until convergence (MaxIts = -1) are
+    # cross-validated by one warm-started path of ridge values per fold
+    # unless the dataset has too many attributes for the Newton solver
+    usePath = (-1 in iterations) and ridgepath.supported(data)
+    if usePath: iterations.remove(-1)
+    # tuples of accuracy, ridge exponent, MaxIts, and Logistic classifier of
+    # the best cells found by the different searches
+    candidates = []
+    if usePath:
+        path = ridgepath.cross_validate_path(data, [pow(10,r) for r in exponents])
+        best = util.get_best_cell(path)
+        if (best >= 0):
             logistic = Logistic()
-            logistic.setMaxIts(int(m))
-            logistic.setRidge(pow(10,r))
-            evaluation = Evaluation(data)
-            output = util.get_buffer_for_predictions()[0]
-            attRange = Range()  # no additional attributes output
-            outputDistribution = Boolean(False)  # we don't want distribution
-            random = Random(1)
-            numFolds = min(10,data.numInstances())
-            evaluation.crossValidateModel(logistic,data,numFolds,random,[output, attRange, outputDistribution])
-            acc = evaluation.pctCorrect()
-            if (acc>best_acc):
-                bestlogistic = logistic
-                best_acc = acc
-                bestValues.m = int(m)
-                bestValues.r = pow(10,r)
+            logistic.setMaxIts(-1)
+            logistic.setRidge(pow(10,exponents[best]))
+            # accuracy of the Logistic classifier itself instead of the path
+            candidates.append((util.cross_validate(logistic, data), exponents[best], -1, logistic))
+    # the other cells are searched by GridSearch as before, which trains
+    # fewer classifiers than cross-validating every cell; for small datasets
+    # and in "halving" search mode, the cells are cross-validated using
+    # numSlots threads, where in "halving" search mode only the best of these
+    # are evaluated on all folds
+    if iterations and data.numInstances() > 10 and searchMode == 'grid':     # grid search does 10-fold cross validation; hence number of samples must be more than 10
+        (logistic, r, m) = _wekaGridSearch(data, RBound, [iterations[0], iterations[-1], MBound[2]])
+        candidates.append((util.cross_validate(logistic, data), r, m, logistic))
+    elif iterations:
+        cells     = []
+        logistics = []
+        for r in exponents:
+            for m in iterations:
+                logistic = Logistic()
+                logistic.setMaxIts(int(m))
+                logistic.setRidge(pow(10,r))
+                cells.append((r, m))
+                logistics.append(logistic)
+        accuracies = util.cross_validate_grid(logistics, data, numSlots, None, searchMode)
+        best = util.get_best_cell(accuracies)
+        if (best >= 0):
+            candidates.append((accuracies[best], cells[best][0], cells[best][1], logistics[best]))
+    for (acc, r, m, logistic) in candidates:
+        if (acc > best_acc):
+            bestlogistic = logistic
+            best_acc = acc
+            bestValues.m = int(m)
+            bestValues.r = pow(10,r)
     print "Best accuracy: ", best_acc
     print "Best values:   M = ", bestValues.m, ", Ridge = ", bestValues.r
     print "-----------------------------------------"
@@ -58,55 +117,13 @@ def myGridSearch(data,RBound,MBound):
 
 # ----------------------------------------------------------------------------
 # searching for the best parameters for the Logistic classifier
-def Logistic_ParamFinder(data): 
+def Logistic_ParamFinder(data,numSlots=1,searchMode='grid'): 
     # Possible set for Ridge-value
     RBounds = [-10,2,1]
     # possible set for maximum Iteration
     MBounds = [-1,10,1]
-    if (data.numInstances()>10):     # grid search does 10-fold cross validation; hence number of samples must be more than 10
-        gridsearch = GridSearch()
-        acctag = gridsearch.getEvaluation()
-        acctag = SelectedTag('ACC',acctag.getTags())
-        gridsearch.setEvaluation(acctag)
-        allfilters = AllFilters()
-        gridsearch.setFilter(allfilters)
-        gridsearch.setGridIsExtendable(Boolean(True))
-        logistic = Logistic()
-        gridsearch.setClassifier(logistic)
-        gridsearch.setXProperty(String('classifier.maxIts'))
-        gridsearch.setYProperty(String('classifier.ridge'))
-        gridsearch.setXExpression(String('I'))
-        gridsearch.setYExpression(String('pow(BASE,I)'))
-        gridsearch.setXMin(MBounds[0])
-        gridsearch.setXMax(MBounds[1])
-        gridsearch.setXStep(MBounds[2])
-        gridsearch.setYMin(RBounds[0])
-        gridsearch.setYMax(RBounds[1])
-        gridsearch.setYStep(RBounds[2])
-        gridsearch.setYBase(10)
-        print "searching for logistic lcassifier Max Iteration = [", MBounds[0], ",", MBounds[1], "], Ridge = [ 10E", RBounds[0], ",10E", RBounds[1], "] ...."
-        gridsearch.buildClassifier(data)
-        bestValues = gridsearch.getValues()
-        # -----------------------  Evaluation
-        bestlogistic = Logistic()
-        bestlogistic.setMaxIts(int(bestValues.x))
-        bestlogistic.setRidge(pow(10,bestValues.y))
-        evaluation = Evaluation(data)
-        output = util.get_buffer_for_predictions()[0]
-        attRange = Range()  # no additional attributes output
-        outputDistribution = Boolean(False)  # we don't want distribution
-        random = Random(1)
-        numFolds = min(10,data.numInstances())
-        evaluation.crossValidateModel(bestlogistic,data,numFolds,random,[output, attRange, outputDistribution])
-        acc = evaluation.pctCorrect()
-        print "best accuracy: ", acc
-        print "best logistic classifier with Ridge = ", bestlogistic.getRidge(), " Max Iteration = ", bestlogistic.getMaxIts()
-        OptLog = bestlogistic
-        OptLogp1 = bestlogistic.getRidge()
-        OptLogp2 = bestlogistic.getMaxIts()
-        OptLogAcc = acc
-    else:
-        OptLog, OptLogp1, OptLogp2, OptLogAcc = myGridSearch(data,RBounds,MBounds)
+    print "searching for logistic classifier Max Iteration = [", MBounds[0], ",", MBounds[1], "], Ridge = [ 10E", RBounds[0], ",10E", RBounds[1], "] ...."
+    OptLog, OptLogp1, OptLogp2, OptLogAcc = myGridSearch(data,RBounds,MBounds,numSlots,searchMode)
     Description = 'Logistic classifier OptRidge = ' + str(OptLogp1) + \
             ', OptMaxIts = ' + str(OptLogp2) + ', OptAcc = ' + str(OptLogAcc)
     print "-----------------------------------------"
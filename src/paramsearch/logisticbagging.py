@@ -14,8 +14,6 @@ import java.io.FileReader as FileReader
 import weka.core.Instances as Instances
 import weka.classifiers.functions.Logistic as Logistic
 import weka.classifiers.meta.Bagging as Bagging
-import weka.classifiers.Evaluation as Evaluation
-import weka.core.Range as Range
 import weka.classifiers.meta.GridSearch as GridSearch
 import weka.core.SelectedTag as SelectedTag
 import weka.filters.AllFilter as AllFilters
@@ -23,9 +21,9 @@ import weka.filters.AllFilter as AllFilters
 import java.lang.StringBuffer as StringBuffer
 import java.lang.String as String
 import java.lang.Boolean as Boolean
-import java.util.Random as Random
 
 from . import util
+from . import ridgepath
 
 # ----------------------------------------------------------------------------
 # searching for the best parameters for the boosted Logisitc
@@ -33,7 +31,7 @@ from . import util
 #   1) it tries to boost the best Logistic by grid-searching for bagSizePercent and Iteration
 #   2) it tries to logistic by grid-searching for the best Ridge-value and num Iteration of the bagging procedure
 #   param1 is Ridge-value and param2 is maxIts value
-def BaggingLogistic_ParamFinder(data, param1, param2):
+def BaggingLogistic_ParamFinder(data, param1, param2, numSlots=1):
     # Possible set for Ridge-value
     RBounds = [-10,2,1]
     # possible set bag size percent
@@ -51,6 +49,7 @@ def BaggingLogistic_ParamFinder(data, param1, param2):
     gridsearch.setGridIsExtendable(Boolean(False))
     logistic = Logistic()
     bagging = Bagging()
+    util.set_num_execution_slots(bagging, numSlots)
     logistic.setRidge(param1)
     logistic.setMaxIts(param2)
     bagging.setClassifier(logistic)
@@ -72,58 +71,60 @@ def BaggingLogistic_ParamFinder(data, param1, param2):
     # ------------------------------ Evaluation
     logistic = Logistic()
     bestbagging1 = Bagging()
+    util.set_num_execution_slots(bestbagging1, numSlots)
     logistic.setRidge(param1)
     logistic.setMaxIts(param2)
     bestbagging1.setBagSizePercent(int(bestValues1.x))
     bestbagging1.setNumIterations(int(bestValues1.y))
     bestbagging1.setClassifier(logistic)
-    evaluation = Evaluation(data)
-    output = output = util.get_buffer_for_predictions()[0]
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    random = Random(1)
-    numFolds = min(10,data.numInstances())
-    evaluation.crossValidateModel(bestbagging1,data,numFolds,random,[output, attRange, outputDistribution])
-    best_acc1 = evaluation.pctCorrect()
+    best_acc1 = util.cross_validate(bestbagging1, data)
     print "best accuracy by bagging the optimal Logistic classifier: ", best_acc1
     print "Optimal Bag size Percent: ", bestValues1.x, " Optimal number of Iterations: ", bestValues1.y
     print "-----------------------------------------"
     # -------------------------------------------------------------------------------------------------------------------------
-    # in this section we set the weak classifier to the linear SMO and optimize over c-value of the SMO and number of iteration  
-    logistic = Logistic()
-    bagging = Bagging()
-    bagging.setClassifier(logistic)
-    gridsearch.setClassifier(bagging)
-    gridsearch.setXProperty(String('classifier.classifier.ridge'))
-    gridsearch.setYProperty(String('classifier.numIterations'))
-    gridsearch.setXExpression(String('pow(BASE,I)'))
-    gridsearch.setYExpression(String('I'))
-    gridsearch.setXBase(10)
-    gridsearch.setGridIsExtendable(Boolean(True))
-    gridsearch.setXMin(RBounds[0])
-    gridsearch.setXMax(RBounds[1])
-    gridsearch.setXStep(RBounds[2])
-    gridsearch.setYMin(ItrBound[0])
-    gridsearch.setYMax(ItrBound[1])
-    gridsearch.setYStep(ItrBound[2])
+    # in this section we optimize over the ridge-value of the logistic and number of iteration
+    # the bagged logistics of all cells are cross-validated by one warm-started path of ridge
+    # values per bag and fold, where the ensembles of fewer iterations use the first bags,
+    # unless the dataset has too many attributes for the Newton solver of the path
     print "searching for ridge bound  = [10^", RBounds[0], ",10^", RBounds[1], "], # Iteration = [", ItrBound[0], ",", ItrBound[1], "] ...."
-    gridsearch.buildClassifier(data)
-    #bestbagging = gridsearch.getBestClassifier()
-    bestValues2 = gridsearch.getValues()
+    if ridgepath.supported(data):
+        exponents  = range(RBounds[0], RBounds[1]+RBounds[2], RBounds[2])
+        iterations = range(ItrBound[0], ItrBound[1]+ItrBound[2], ItrBound[2])
+        accuracies = ridgepath.cross_validate_bagged_path(data, [pow(10,r) for r in exponents], iterations)
+        best = max(0, util.get_best_cell(accuracies))
+        class bestValues2(object):
+            x = float('nan')
+            y = float('nan')
+        bestValues2.x = exponents[best / len(iterations)]
+        bestValues2.y = iterations[best % len(iterations)]
+    else:
+        logistic = Logistic()
+        bagging = Bagging()
+        util.set_num_execution_slots(bagging, numSlots)
+        bagging.setClassifier(logistic)
+        gridsearch.setClassifier(bagging)
+        gridsearch.setXProperty(String('classifier.classifier.ridge'))
+        gridsearch.setYProperty(String('classifier.numIterations'))
+        gridsearch.setXExpression(String('pow(BASE,I)'))
+        gridsearch.setYExpression(String('I'))
+        gridsearch.setXBase(10)
+        gridsearch.setGridIsExtendable(Boolean(True))
+        gridsearch.setXMin(RBounds[0])
+        gridsearch.setXMax(RBounds[1])
+        gridsearch.setXStep(RBounds[2])
+        gridsearch.setYMin(ItrBound[0])
+        gridsearch.setYMax(ItrBound[1])
+        gridsearch.setYStep(ItrBound[2])
+        gridsearch.buildClassifier(data)
+        bestValues2 = gridsearch.getValues()
     # ------------------ Evaluation
     logistic = Logistic()
     bestbagging2 = Bagging()
+    util.set_num_execution_slots(bestbagging2, numSlots)
     logistic.setRidge(pow(10,bestValues2.x))
     bestbagging2.setNumIterations(int(bestValues2.y))
     bestbagging2.setClassifier(logistic)    
-    evaluation = Evaluation(data)
-    output = output = util.get_buffer_for_predictions()[0]
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    random = Random(1)
-    numFolds = min(10,data.numInstances())
-    evaluation.crossValidateModel(bestbagging2,data,numFolds,random,[output, attRange, outputDistribution])
-    best_acc2 = evaluation.pctCorrect()
+    best_acc2 = util.cross_validate(bestbagging2, data)
     print "best accuracy by bagging the Logistic classifier (with optimization over ridge): ", best_acc2
     print "Optimal Ridge value : ", bestValues2.x , "Optimal number of Iteration : ", bestValues2.y
     print "-----------------------------------------"
@@ -0,0 +1,126 @@
+##############################################################################
+# @file  models.py
+# @brief Persistent store of trained classifiers.
+#
+# Copyright (c) 2012 University of Pennsylvania. All rights reserved.
+# See http://www.rad.upenn.edu/sbia/software/license.html or COPYING file.
+#
+# Contact: SBIA Group <sbia-software at uphs.upenn.edu>
+##############################################################################
+
+import os
+import sys
+
+import jarray
+
+import java.io.FileInputStream as FileInputStream
+import java.security.MessageDigest as MessageDigest
+import java.lang.String as String
+
+import weka.core.Utils as Utils
+import weka.core.SerializationHelper as SerializationHelper
+
+# ----------------------------------------------------------------------------
+# hexadecimal digest of MessageDigest
+def _hexdigest(md):
+    return ''.join(['%02x' % (b & 0xff) for b in md.digest()])
+
+# ----------------------------------------------------------------------------
+## @brief Compute MD5 hash of content of file.
+def filehash(path):
+    md = MessageDigest.getInstance('MD5')
+    buf = jarray.zeros(1048576, 'b')
+    f = FileInputStream(path)
+    try:
+        n = f.read(buf)
+        while n > 0:
+            md.update(buf, 0, n)
+            n = f.read(buf)
+    finally:
+        f.close()
+    return _hexdigest(md)
+
+# ----------------------------------------------------------------------------
+## @brief Store of trained classifiers in a directory.
+#
+# A trained classifier is identified by a hash of the content of the ARFF file
+# with the training data, the options used to preprocess this data, and the
+# class name and options of the classifier. The latter include the options of
+# base classifiers of meta-classifiers. Hence, a model is reused whenever the
+# same classifier with the same parameters is trained on the same data again,
+# e.g., when another test set is classified or class probabilities are output.
+# The models are stored using Weka's serialization.
+class ModelStore(object):
+
+    # ------------------------------------------------------------------------
+    def __init__(self, directory):
+        self.directory = directory
+        self.hashes    = {}
+
+    # ------------------------------------------------------------------------
+    ## @brief Compute MD5 hash of content of file, each file is read only once.
+    def filehash(self, path):
+        if not self.hashes.has_key(path):
+            self.hashes[path] = filehash(path)
+        return self.hashes[path]
+
+    # ------------------------------------------------------------------------
+    ## @brief Get key of a classifier trained on the given data.
+    #
+    # @param [in] arffFile      ARFF file of training data.
+    # @param [in] preprocessing Dictionary of options used to preprocess the data.
+    # @param [in] classifier    Classifier configured with its parameters.
+    def key(self, arffFile, preprocessing, classifier):
+        keys = preprocessing.keys()
+        keys.sort()
+        parts = [self.filehash(arffFile)]
+        parts.extend(['%s=%s' % (k, preprocessing[k]) for k in keys])
+        parts.append(classifier.getClass().getName())
+        # the number of threads used to train the classifier does not change it
+        options = classifier.getOptions()
+        Utils.getOption('num-slots', options)
+        parts.append(Utils.joinOptions(options))
+        md = MessageDigest.getInstance('MD5')
+        md.update(String('\0'.join(parts)).getBytes('UTF-8'))
+        return _hexdigest(md)
+
+    # ------------------------------------------------------------------------
+    ## @brief Train classifier or load it if it was trained before.
+    #
+    # @param [in] classifier    Classifier configured with its parameters.
+    # @param [in] data          Preprocessed training data.
+    # @param [in] arffFile      ARFF file of training data.
+    # @param [in] preprocessing Dictionary of options used to preprocess the data.
+    #
+    # @returns Trained classifier.
+    def build(self, classifier, data, arffFile, preprocessing):
+        modelFile = os.path.join(self.directory, self.key(arffFile, preprocessing, classifier) + '.model')
+        if os.path.isfile(modelFile):
+            try:
+                model = SerializationHelper.read(modelFile)
+                print "Loaded trained classifier from %s" % modelFile
+                return model
+            except:
+                sys.stderr.write("Failed to read trained classifier from %s: %s\n" % (modelFile, sys.exc_info()[1]))
+        classifier.buildClassifier(data)
+        if not os.path.isdir(self.directory): os.makedirs(self.directory)
+        # write to temporary file first such that other processes never read
+        # an incomplete model
+        tmpFile = '%s.%s.tmp' % (modelFile, id(classifier))
+        SerializationHelper.write(tmpFile, classifier)
+        try:
+            os.rename(tmpFile, modelFile)
+        except OSError:
+            # rename does not replace an existing file on all platforms
+            if os.path.isfile(modelFile): os.remove(tmpFile)
+            else:                         raise
+        print "Saved trained classifier to %s" % modelFile
+        return classifier
+
+# ----------------------------------------------------------------------------
+## @brief Train classifier, using the model store if given.
+def build(store, classifier, data, arffFile, preprocessing):
+    if store is None:
+        classifier.buildClassifier(data)
+        return classifier
+    return store.build(classifier, data, arffFile, preprocessing)
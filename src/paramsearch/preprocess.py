@@ -0,0 +1,258 @@
+##############################################################################
+# @file  preprocess.py
+# @brief Preprocessing of datasets and persistent cache of preprocessed data.
+#
+# Copyright (c) 2011, 2012 University of Pennsylvania. All rights reserved.
+# See http://www.rad.upenn.edu/sbia/software/license.html or COPYING file.
+#
+# Contact: SBIA Group <sbia-software at uphs.upenn.edu>
+##############################################################################
+
+import os
+import sys
+
+import jarray
+
+import java.io.File as File
+import java.io.FileReader as FileReader
+import java.lang.Object as Object
+import java.lang.Boolean as Boolean
+import java.lang.String as String
+import java.security.MessageDigest as MessageDigest
+
+import weka.core.Instances as Instances
+import weka.core.SerializationHelper as SerializationHelper
+import weka.core.converters.ArffLoader as ArffLoader
+import weka.filters.Filter as Filter
+import weka.filters.unsupervised.instance.RemoveWithValues as RemoveWithValues
+import weka.filters.unsupervised.attribute.Remove as AttributeRemove
+
+from . import models
+
+# ============================================================================
+# preprocessing
+# ============================================================================
+
+# ----------------------------------------------------------------------------
+## @brief Preprocess dataset read from ARFF file.
+#
+# @param [in] Data   Dataset. Note that it is modified if neither IDs nor
+#                    instances are removed.
+# @param [in] option Dictionary of preprocessing options, i.e.,
+#                    'idFlag' (last attribute is ID which is removed),
+#                    'rmClassFlag' and 'rmClass' (remove instances of the
+#                    class with the given index), and 'weightFlag' (weight
+#                    instances to balance the number of samples per class).
+#
+# @returns Tuple of preprocessed dataset, whose class attribute is the last
+#          attribute, and dataset of the IDs of the instances or an empty
+#          list if the option 'idFlag' is False.
+def PreprocessData(Data,option):
+    IDs = []
+    if (option['idFlag']):    # means that the last attribute is id
+        attributeremove = AttributeRemove()
+        attributeremove.setInvertSelection(Boolean(True))  # remove every attribute but the last one which is ID
+        attributeremove.setAttributeIndices(String(str(Data.numAttributes())))
+        attributeremove.setInputFormat(Data)
+        IDs = Filter.useFilter(Data, attributeremove)
+        attributeremove = AttributeRemove()
+        attributeremove.setInvertSelection(Boolean(False))  # remove IDs from dataset
+        attributeremove.setAttributeIndices(String(str(Data.numAttributes())))
+        attributeremove.setInputFormat(Data)
+        Data = Filter.useFilter(Data, attributeremove)
+    # set the class Index - the index of the dependent variable
+    Data.setClassIndex(Data.numAttributes() - 1)
+    # remove of the classes
+    if (option['rmClassFlag']):    # means that instances with specified class label must be removed
+        ClassLabel = option['rmClass']
+        removewithvalues = RemoveWithValues()
+        removewithvalues.setAttributeIndex(String('last'))
+        removewithvalues.setNominalIndices(String(str(ClassLabel)))
+        removewithvalues.setInputFormat(Data)
+        newData = Filter.useFilter(Data, removewithvalues)
+    else:
+        newData = Data
+    if (option['weightFlag']):    # it means that instances should be weighted according to number of samples
+        # class values of all instances obtained by a single call
+        classValues = newData.attributeToDoubleArray(newData.classIndex())
+        # if there is only two classes, do it as before
+        if (Data.numClasses()==2):
+            # weight instances with reciprocal weight with number of samples,
+            # where the first class is the one of the second instance
+            c1 = classValues[1]
+            numInstancesC1 = len([v for v in classValues if v == c1])
+            numInstancesC2 = len(classValues) - numInstancesC1
+            # calculate weights
+            weightC1 = numInstancesC2 /(numInstancesC2 + numInstancesC1 + 0.0)
+            weightC2 = numInstancesC1 /(numInstancesC2 + numInstancesC1 + 0.0)
+            # assign weight to instances of classes
+            for cnt in range(0,len(classValues)):
+                if (classValues[cnt] == c1):
+                    newData.instance(cnt).setWeight(weightC1)
+                else:
+                    newData.instance(cnt).setWeight(weightC2)
+        # if number of class are more than two then ....
+        elif (Data.numClasses()>2):
+            # the number of samples per class are counted before instances are removed
+            AttributeStats = Data.attributeStats(Data.classIndex()).nominalCounts
+            weightPerClass = {}
+            sumWeigths = 0.0
+            for cnt in range(0,Data.numClasses()):
+                w = 1.0 / (AttributeStats[cnt] + 0.0)
+                weightPerClass[cnt] = w
+                sumWeigths = sumWeigths + w
+            # normalize weights
+            for k in weightPerClass.keys():
+                weightPerClass[k] = weightPerClass[k]/sumWeigths
+            # assign weight to instances of classes
+            for cnt in range(0,len(classValues)):
+                newData.instance(cnt).setWeight(weightPerClass[classValues[cnt]])
+    return newData, IDs
+
+# ----------------------------------------------------------------------------
+## @brief Read and preprocess dataset from ARFF file one instance at a time.
+#
+# The instances are read incrementally by Weka's ArffLoader and passed through
+# the same filters as by PreprocessData(), which all process one instance at a
+# time. Hence, the memory needed does not depend on the size of the dataset.
+# Note that the instances are not weighted, because the weights depend on the
+# number of instances per class of the whole dataset. They are not needed to
+# classify the instances, however.
+class DataStream(object):
+
+    # ------------------------------------------------------------------------
+    ## @brief Open ARFF file.
+    #
+    # @param [in] arffFile ARFF file.
+    # @param [in] option   Dictionary of preprocessing options, see PreprocessData().
+    def __init__(self, arffFile, option):
+        self.loader = ArffLoader()
+        self.loader.setFile(File(arffFile))
+        self.header    = self.loader.getStructure()
+        self.idFilter  = None
+        self.filters   = []
+        structure = self.header
+        if (option['idFlag']):    # means that the last attribute is id
+            self.idFilter = AttributeRemove()
+            self.idFilter.setInvertSelection(Boolean(True))
+            self.idFilter.setAttributeIndices(String(str(structure.numAttributes())))
+            self.idFilter.setInputFormat(structure)
+            attributeremove = AttributeRemove()
+            attributeremove.setInvertSelection(Boolean(False))
+            attributeremove.setAttributeIndices(String(str(structure.numAttributes())))
+            attributeremove.setInputFormat(structure)
+            self.filters.append(attributeremove)
+            structure = attributeremove.getOutputFormat()
+        structure.setClassIndex(structure.numAttributes() - 1)
+        if (option['rmClassFlag']):
+            removewithvalues = RemoveWithValues()
+            removewithvalues.setAttributeIndex(String('last'))
+            removewithvalues.setNominalIndices(String(str(option['rmClass'])))
+            removewithvalues.setInputFormat(structure)
+            self.filters.append(removewithvalues)
+            structure = removewithvalues.getOutputFormat()
+        ## Header of the preprocessed instances.
+        self.structure = structure
+
+    # ------------------------------------------------------------------------
+    ## @brief Read next instance which is not removed.
+    #
+    # @returns Tuple of preprocessed instance and its ID, where the ID is None
+    #          if the option 'idFlag' is False, or None at the end of the file.
+    def next(self):
+        while True:
+            instance = self.loader.getNextInstance(self.header)
+            if instance is None:
+                self.loader.reset()
+                return None
+            ID = None
+            if self.idFilter is not None:
+                self.idFilter.input(instance)
+                ID = self.idFilter.output().toString()
+            for f in self.filters:
+                if not f.input(instance):
+                    instance = None
+                    break
+                instance = f.output()
+            if instance is not None: return (instance, ID)
+
+# ============================================================================
+# cache
+# ============================================================================
+
+# ----------------------------------------------------------------------------
+## @brief Cache of preprocessed datasets in a directory.
+#
+# A preprocessed dataset is identified by a hash of the content of the ARFF
+# file and the preprocessing options. It is stored together with the dataset
+# of the IDs using Weka's serialization, which is much faster to read than
+# parsing the ARFF file and preprocessing the data again. Hence, the search
+# for the best parameters, the classification, and the ranking of the basis
+# vectors on the data of the same fold share the preprocessed data.
+class DataCache(object):
+
+    # ------------------------------------------------------------------------
+    def __init__(self, directory):
+        self.directory = directory
+        self.hashes    = {}
+
+    # ------------------------------------------------------------------------
+    ## @brief Get key of dataset preprocessed with the given options.
+    def key(self, arffFile, option):
+        if not self.hashes.has_key(arffFile):
+            self.hashes[arffFile] = models.filehash(arffFile)
+        keys = option.keys()
+        keys.sort()
+        parts = [self.hashes[arffFile]]
+        parts.extend(['%s=%s' % (k, option[k]) for k in keys])
+        md = MessageDigest.getInstance('MD5')
+        md.update(String('\0'.join(parts)).getBytes('UTF-8'))
+        return ''.join(['%02x' % (b & 0xff) for b in md.digest()])
+
+    # ------------------------------------------------------------------------
+    ## @brief Read and preprocess ARFF file or load the preprocessed data.
+    #
+    # @returns Tuple of preprocessed dataset and dataset of IDs as returned
+    #          by PreprocessData().
+    def load(self, arffFile, option):
+        dataFile = os.path.join(self.directory, self.key(arffFile, option) + '.data')
+        if os.path.isfile(dataFile):
+            try:
+                objects = SerializationHelper.readAll(dataFile)
+                print "Loaded preprocessed data from %s" % dataFile
+                if len(objects) > 1: return objects[0], objects[1]
+                return objects[0], []
+            except:
+                sys.stderr.write("Failed to read preprocessed data from %s: %s\n" % (dataFile, sys.exc_info()[1]))
+        (data, IDs) = PreprocessData(readArff(arffFile), option)
+        if not os.path.isdir(self.directory): os.makedirs(self.directory)
+        # write to temporary file first such that other processes never read
+        # incomplete data
+        tmpFile = '%s.%s.tmp' % (dataFile, id(data))
+        if option['idFlag']: objects = [data, IDs]
+        else:                objects = [data]
+        SerializationHelper.writeAll(tmpFile, jarray.array(objects, Object))
+        try:
+            os.rename(tmpFile, dataFile)
+        except OSError:
+            # rename does not replace an existing file on all platforms
+            if os.path.isfile(dataFile): os.remove(tmpFile)
+            else:                        raise
+        print "Saved preprocessed data to %s" % dataFile
+        return data, IDs
+
+# ----------------------------------------------------------------------------
+## @brief Read dataset from ARFF file.
+def readArff(arffFile):
+    f = FileReader(arffFile)
+    try:
+        return Instances(f)
+    finally:
+        f.close()
+
+# ----------------------------------------------------------------------------
+## @brief Read and preprocess ARFF file, using the data cache if given.
+def load(cache, arffFile, option):
+    if cache is None:
+        return PreprocessData(readArff(arffFile), option)
+    return cache.load(arffFile, option)
@@ -13,8 +13,6 @@ import sys
 import java.io.FileReader as FileReader
 import weka.core.Instances as Instances
 import weka.classifiers.trees.RandomForest as RandomForest
-import weka.classifiers.Evaluation as Evaluation
-import weka.core.Range as Range
 import weka.classifiers.meta.GridSearch as GridSearch
 import weka.core.SelectedTag as SelectedTag
 import weka.filters.AllFilter as AllFilters
@@ -22,36 +20,37 @@ import weka.filters.AllFilter as AllFilters
 import java.lang.StringBuffer as StringBuffer
 import java.lang.String as String
 import java.lang.Boolean as Boolean
-import java.util.Random as Random
 
 from . import util
 
 
 # ----------------------------------------------------------------------------
-def myGridSearch(data,NTreeBounds,NFeaturesBounds):
+def myGridSearch(data,NTreeBounds,NFeaturesBounds,numSlots=1,searchMode='grid'):
     best_acc = -float('inf')
     bestrandomforest = None
     class bestValues(object):
         t = float('nan')
         f = float('nan')
+    # cross-validate the cells of the grid using numSlots threads, where the
+    # trees of each forest are built by the thread evaluating the cell, and in
+    # "halving" search mode only the best cells are evaluated on all folds
+    cells         = []
+    randomforests = []
     for t in range(NTreeBounds[0],NTreeBounds[1]+NTreeBounds[2],NTreeBounds[2]):
         for f in range(NFeaturesBounds[0],NFeaturesBounds[1]+NFeaturesBounds[2],NFeaturesBounds[2]):
             randomforest = RandomForest()
             randomforest.setNumTrees(int(t))
             randomforest.setNumFeatures(int(f))
-            evaluation = Evaluation(data)
-            output = output = util.get_buffer_for_predictions()[0]
-            attRange = Range()  # no additional attributes output
-            outputDistribution = Boolean(False)  # we don't want distribution
-            random = Random(1)
-            numFolds = min(10,data.numInstances())
-            evaluation.crossValidateModel(randomforest,data,numFolds,random,[output, attRange, outputDistribution])
-            acc = evaluation.pctCorrect()
-            if (acc>best_acc):
-                bestrandomforest = randomforest
-                best_acc = acc
-                bestValues.t = t
-                bestValues.f = f
+            cells.append((t, f))
+            randomforests.append(randomforest)
+    accuracies = util.cross_validate_grid(randomforests, data, numSlots, None, searchMode)
+    best = util.get_best_cell(accuracies)
+    if (best >= 0):
+        (t, f) = cells[best]
+        bestrandomforest = randomforests[best]
+        best_acc = accuracies[best]
+        bestValues.t = t
+        bestValues.f = f
     print "Best accuracy:", best_acc
     print "Best values:  NTreeBounds = ", bestValues.t, ", NFeaturesBounds = ", bestValues.f
     print "-----------------------------------------"
@@ -59,12 +58,12 @@ def myGridSearch(data,NTreeBounds,NFeaturesBounds):
  
 # ----------------------------------------------------------------------------
 # searching for the best parameters for the Random Forest classifier
-def RandomForest_ParamFinder(data): 
+def RandomForest_ParamFinder(data,numSlots=1,searchMode='grid'): 
     # possible set for Number of trees
     NTreeBounds = [1,20,1]
     # possible set for number of features
     NFeaturesBounds = [0,20,1]
-    if (data.numInstances()>10):     # grid search does 10-fold cross validation; hence number of samples must be more than 10
+    if (data.numInstances()>10 and searchMode == 'grid'):     # grid search does 10-fold cross validation; hence number of samples must be more than 10
         gridsearch = GridSearch()
         acctag = gridsearch.getEvaluation()
         acctag = SelectedTag('ACC',acctag.getTags())
@@ -73,6 +72,7 @@ def RandomForest_ParamFinder(data):
         gridsearch.setFilter(allfilters)
         gridsearch.setGridIsExtendable(Boolean(True))
         randomforest = RandomForest()
+        util.set_num_execution_slots(randomforest, numSlots)
         gridsearch.setClassifier(randomforest)
         gridsearch.setXProperty(String('classifier.numTrees'))
         gridsearch.setYProperty(String('classifier.numFeatures'))
@@ -90,16 +90,10 @@ def RandomForest_ParamFinder(data):
         bestValues = gridsearch.getValues()
         # -----------------------  Evaluation
         bestrandomforest = RandomForest()
+        util.set_num_execution_slots(bestrandomforest, numSlots)
         bestrandomforest.setNumTrees(int(bestValues.x))
         bestrandomforest.setNumFeatures(int(bestValues.y))
-        evaluation = Evaluation(data)
-        output = output = util.get_buffer_for_predictions()[0]
-        attRange = Range()  # no additional attributes output
-        outputDistribution = Boolean(False)  # we don't want distribution
-        random = Random(1)
-        numFolds = min(10,data.numInstances())
-        evaluation.crossValidateModel(bestrandomforest,data,numFolds,random,[output, attRange, outputDistribution])
-        acc = evaluation.pctCorrect()
+        acc = util.cross_validate(bestrandomforest, data)
         print "best accuracy: ", acc
         print "best random-forest classifier with NumTrees=",bestValues.x , ", NumFeatures = ", bestValues.y
         OptRndFrst = bestrandomforest
@@ -107,7 +101,7 @@ def RandomForest_ParamFinder(data):
         OptRndFrstp2 = bestValues.y
         OptRndFrstAcc = acc
     else:
-        OptRndFrst, OptRndFrstp1, OptRndFrstp2, OptRndFrstAcc = myGridSearch(data,NTreeBounds,NFeaturesBounds) 
+        OptRndFrst, OptRndFrstp1, OptRndFrstp2, OptRndFrstAcc = myGridSearch(data,NTreeBounds,NFeaturesBounds,numSlots,searchMode)
     Description = 'Random-Forest classifier: OptNumTrees = ' + str(OptRndFrstp1) + \
             ', OptNumFeatures = ' + str(OptRndFrstp2) + ', OptAcc = ' + str(OptRndFrstAcc)
     print "-----------------------------------------"
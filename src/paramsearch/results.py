@@ -0,0 +1,319 @@
+##############################################################################
+# @file  results.py
+# @brief Buffered writers of result tables and class probabilities.
+#
+# Copyright (c) 2012 University of Pennsylvania. All rights reserved.
+# See http://www.rad.upenn.edu/sbia/software/license.html or COPYING file.
+#
+# Contact: SBIA Group <sbia-software at uphs.upenn.edu>
+##############################################################################
+
+import os
+import csv
+
+import java.io.RandomAccessFile as RandomAccessFile
+import java.io.FileOutputStream as FileOutputStream
+import java.io.BufferedOutputStream as BufferedOutputStream
+import java.io.DataOutputStream as DataOutputStream
+
+# ----------------------------------------------------------------------------
+## @brief Table of results whose cells are identified by row ID and column name.
+#
+# The cells are collected in memory and written to the CSV file at once by
+# write(). The first row of the CSV file contains the column names and the
+# first column the row IDs, i.e., the same layout which was formerly created
+# by calling "pyxel.py -d <file> <id> <column> <value>" for each cell.
+class ResultTable(object):
+
+    # ------------------------------------------------------------------------
+    def __init__(self):
+        self.rows    = []
+        self.columns = []
+        self.cells   = {}
+
+    # ------------------------------------------------------------------------
+    ## @brief Set value of a cell, adding a new row and/or column if needed.
+    def set(self, rowid, column, value):
+        if not self.cells.has_key(rowid):
+            self.rows.append(rowid)
+            self.cells[rowid] = {}
+        if not column in self.columns:
+            self.columns.append(column)
+        self.cells[rowid][column] = str(value)
+
+    # ------------------------------------------------------------------------
+    ## @brief Get value of a cell or the default value if the cell is empty.
+    def get(self, rowid, column, default=''):
+        if not self.cells.has_key(rowid): return default
+        value = self.cells[rowid].get(column, '')
+        if value == '': return default
+        return value
+
+    # ------------------------------------------------------------------------
+    ## @brief Merge table with existing CSV file and replace the file.
+    #
+    # The cells of this table overwrite the cells of the existing table,
+    # while all other rows and columns of the existing file are preserved.
+    # The file is locked while it is read and written such that processes
+    # which write to the same file do not lose each others results. The new
+    # table is written to a temporary file first, which is then renamed such
+    # that readers never see a partially written table.
+    def write(self, filename):
+        print "Saving results to file %s" % filename
+        outdir = os.path.dirname(filename)
+        if outdir and not os.path.isdir(outdir): os.makedirs(outdir)
+        (lockfile, lock) = _lock(filename)
+        try:
+            (corner, rows, columns, cells) = _read(filename)
+            for rowid in self.rows:
+                if not cells.has_key(rowid):
+                    rows.append(rowid)
+                    cells[rowid] = {}
+                cells[rowid].update(self.cells[rowid])
+            for column in self.columns:
+                if not column in columns: columns.append(column)
+            tmpfile = filename + '.tmp'
+            f = open(tmpfile, 'wb')
+            try:
+                writer = csv.writer(f)
+                writer.writerow([corner] + columns)
+                for rowid in rows:
+                    writer.writerow([rowid] + [cells[rowid].get(column, '') for column in columns])
+            finally:
+                f.close()
+            _rename(tmpfile, filename)
+        finally:
+            _unlock(filename, lockfile, lock)
+
+# ----------------------------------------------------------------------------
+## @brief Table of results whose rows are written as they are computed.
+#
+# In contrast to ResultTable, the rows are not kept in memory but written to
+# a temporary file by append(). When the table is closed, the rows are merged
+# with the existing CSV file line by line, where the cells of the appended
+# rows overwrite the cells of the existing table as by ResultTable.write().
+# Only the IDs of the appended rows and the remaining cells of existing rows
+# with the same ID are kept in memory. Unlike ResultTable.write(), the rows
+# which are overwritten are moved to the position of the appended row.
+class StreamingTable(object):
+
+    # ------------------------------------------------------------------------
+    ## @brief Start new table.
+    #
+    # @param [in] filename Name of CSV file.
+    # @param [in] columns  Names of columns of this table.
+    def __init__(self, filename, columns):
+        self.filename = filename
+        self.columns  = list(columns)
+        outdir = os.path.dirname(filename)
+        if outdir and not os.path.isdir(outdir): os.makedirs(outdir)
+        self.partfile = '%s.%s.part' % (filename, id(self))
+        self.part     = open(self.partfile, 'wb')
+        self.writer   = csv.writer(self.part)
+
+    # ------------------------------------------------------------------------
+    ## @brief Append row with the values of the columns of this table.
+    def append(self, rowid, values):
+        self.writer.writerow([rowid] + [str(value) for value in values])
+
+    # ------------------------------------------------------------------------
+    ## @brief Discard appended rows, leaving the CSV file unchanged.
+    def abort(self):
+        self.part.close()
+        if os.path.isfile(self.partfile): os.remove(self.partfile)
+
+    # ------------------------------------------------------------------------
+    ## @brief Merge appended rows with existing CSV file and replace the file.
+    def close(self):
+        self.part.close()
+        print "Saving results to file %s" % self.filename
+        # IDs of appended rows
+        appended = {}
+        f = open(self.partfile, 'rb')
+        try:
+            for row in csv.reader(f):
+                if row: appended[row[0]] = True
+        finally:
+            f.close()
+        (lockfile, lock) = _lock(self.filename)
+        try:
+            tmpfile = self.filename + '.tmp'
+            out = open(tmpfile, 'wb')
+            try:
+                writer  = csv.writer(out)
+                columns = None
+                kept    = {}
+                # copy rows of existing table which are not overwritten and
+                # keep the other cells of those which are
+                if os.path.isfile(self.filename):
+                    f = open(self.filename, 'rb')
+                    try:
+                        reader = csv.reader(f)
+                        for row in reader:
+                            if not row: continue
+                            if columns is None:
+                                columns = row[1:]
+                                numColumns = len(columns)
+                                for column in self.columns:
+                                    if not column in columns: columns.append(column)
+                                writer.writerow([row[0]] + columns)
+                                continue
+                            cells = row[1:numColumns + 1]
+                            if appended.has_key(row[0]):
+                                values = kept.setdefault(row[0], {})
+                                for i in range(len(cells)):
+                                    if cells[i] != '' and not columns[i] in self.columns:
+                                        values[columns[i]] = cells[i]
+                            else:
+                                writer.writerow([row[0]] + cells + [''] * (len(columns) - len(cells)))
+                    finally:
+                        f.close()
+                if columns is None:
+                    columns = list(self.columns)
+                    writer.writerow([''] + columns)
+                # copy appended rows
+                index = [(column in self.columns and self.columns.index(column) + 1) or 0 for column in columns]
+                f = open(self.partfile, 'rb')
+                try:
+                    for row in csv.reader(f):
+                        if not row: continue
+                        values = kept.get(row[0], {})
+                        writer.writerow([row[0]] + [(i and row[i]) or values.get(column, '') for column, i in zip(columns, index)])
+                finally:
+                    f.close()
+            finally:
+                out.close()
+            _rename(tmpfile, self.filename)
+        finally:
+            _unlock(self.filename, lockfile, lock)
+        os.remove(self.partfile)
+
+# ----------------------------------------------------------------------------
+## @brief Read table from CSV file.
+#
+# @returns Result table, which is empty if the file does not exist.
+def read(filename):
+    table = ResultTable()
+    (corner, table.rows, table.columns, table.cells) = _read(filename)
+    return table
+
+# ----------------------------------------------------------------------------
+## @brief Add class probabilities to result table.
+#
+# One column named "<header>-<label>" is added for each class and one row
+# for each instance, which is identified by its ID.
+def add_probabilities(table, header, ids, classes, probs):
+    columns = ['%s-%s' % (header, label) for label in classes]
+    for i in range(len(ids)):
+        p = probs[i]
+        for k in range(len(columns)):
+            table.set(ids[i], columns[k], repr(p[k]))
+
+# ----------------------------------------------------------------------------
+## @brief Write matrix of class probabilities.
+#
+# If the file name ends with ".npy", the matrix is written as NumPy array of
+# 64-bit floating point numbers, where the rows correspond to the instances
+# in the order of the data set and the columns to the class labels in the
+# order of the class attribute. Otherwise, one column named
+# "<header>-<label>" is added for each class to the result table in the
+# CSV file, where the rows are identified by the IDs of the instances.
+#
+# @param [in] filename Name of output file.
+# @param [in] header   Prefix of column names.
+# @param [in] ids      IDs of instances.
+# @param [in] classes  Class labels.
+# @param [in] probs    Class probabilities of each instance.
+def write_probabilities(filename, header, ids, classes, probs):
+    if filename.endswith('.npy'):
+        _write_npy(filename, probs, len(classes))
+    else:
+        table = ResultTable()
+        add_probabilities(table, header, ids, classes, probs)
+        table.write(filename)
+
+# ----------------------------------------------------------------------------
+# write matrix of doubles to NumPy file (format version 1.0, big-endian)
+def _write_npy(filename, rows, numColumns):
+    print "Saving results to file %s" % filename
+    outdir = os.path.dirname(filename)
+    if outdir and not os.path.isdir(outdir): os.makedirs(outdir)
+    header = "{'descr': '>f8', 'fortran_order': False, 'shape': (%d, %d), }" % (len(rows), numColumns)
+    # pad header with spaces such that the data is aligned to 64 bytes
+    header = header + ' ' * (63 - (10 + len(header)) % 64) + '\n'
+    tmpfile = filename + '.tmp'
+    out = DataOutputStream(BufferedOutputStream(FileOutputStream(tmpfile)))
+    try:
+        out.writeBytes('\x93NUMPY')
+        out.write(1)
+        out.write(0)
+        out.write(len(header) & 0xff)
+        out.write(len(header) >> 8)
+        out.writeBytes(header)
+        for row in rows:
+            for k in range(numColumns):
+                out.writeDouble(row[k])
+    finally:
+        out.close()
+    _rename(tmpfile, filename)
+
+# ----------------------------------------------------------------------------
+# lock table such that processes which write to the same file do not lose
+# each others results, returns the tuple of lock file and lock
+#
+# The lock file is never removed. A process which waits for the lock of a
+# removed lock file would otherwise acquire it while another process holds
+# the lock of a newly created lock file of the same name.
+def _lock(filename):
+    lockfile = RandomAccessFile(filename + '.lock', 'rw')
+    try:
+        return (lockfile, lockfile.getChannel().lock())
+    except:
+        lockfile.close()
+        raise
+
+# ----------------------------------------------------------------------------
+# release lock acquired by _lock()
+def _unlock(filename, lockfile, lock):
+    try:
+        lock.release()
+    finally:
+        lockfile.close()
+
+# ----------------------------------------------------------------------------
+# rename temporary file, replacing the existing file
+def _rename(tmpfile, filename):
+    try:
+        os.rename(tmpfile, filename)
+    except OSError:
+        # rename does not replace an existing file on all platforms
+        if not os.path.exists(filename): raise
+        os.remove(filename)
+        os.rename(tmpfile, filename)
+
+# ----------------------------------------------------------------------------
+# read table from CSV file, returns empty table if file does not exist
+def _read(filename):
+    corner  = ''
+    rows    = []
+    columns = []
+    cells   = {}
+    if not os.path.isfile(filename): return (corner, rows, columns, cells)
+    f = open(filename, 'rb')
+    try:
+        reader = csv.reader(f)
+        for row in reader:
+            if not row: continue
+            if reader.line_num == 1:
+                corner  = row[0]
+                columns = row[1:]
+                continue
+            rowid = row[0]
+            if not cells.has_key(rowid):
+                rows.append(rowid)
+                cells[rowid] = {}
+            for i in range(1, min(len(row), len(columns) + 1)):
+                cells[rowid][columns[i - 1]] = row[i]
+    finally:
+        f.close()
+    return (corner, rows, columns, cells)
@@ -0,0 +1,340 @@
+##############################################################################
+# @file  ridgepath.py
+# @brief Cross-validation of Logistic classifiers along a path of ridge values.
+#
+# Copyright (c) 2012 University of Pennsylvania. All rights reserved.
+# See http://www.rad.upenn.edu/sbia/software/license.html or COPYING file.
+#
+# Contact: SBIA Group <sbia-software at uphs.upenn.edu>
+##############################################################################
+
+import math
+
+import java.lang.RuntimeException as RuntimeException
+import java.util.Random as Random
+import weka.classifiers.functions.Logistic as Logistic
+import weka.core.Instances as Instances
+import weka.core.matrix.Matrix as Matrix
+import weka.filters.Filter as Filter
+import weka.filters.unsupervised.attribute.NominalToBinary as NominalToBinary
+import weka.filters.unsupervised.attribute.RemoveUseless as RemoveUseless
+import weka.filters.unsupervised.attribute.ReplaceMissingValues as ReplaceMissingValues
+
+from . import util
+
+# ----------------------------------------------------------------------------
+# maximum number of Newton iterations per ridge value
+_maxIterations = 50
+
+# ----------------------------------------------------------------------------
+# Newton iterations stop when the step changes no coefficient by more than this
+_tolerance = 1e-8
+
+# ----------------------------------------------------------------------------
+# maximum number of coefficients, i.e., the number of columns of the design
+# matrix times the number of classes minus one, for which the ridge path is
+# used, as each Newton iteration solves a dense linear system of this size
+# whose cost grows cubically, i.e., 8e6 operations for this value
+_maxDimension = 200
+
+# ----------------------------------------------------------------------------
+# smallest ridge value which is fitted by the path
+#
+# For smaller ridge values, the objective is nearly flat along directions of
+# collinear attributes or has no minimum at all if the training set is
+# separable, such that the Newton iterations and the optimizer of Logistic
+# may stop at different coefficients. The path was checked against Logistic
+# only down to this value (see test/test_ridgepath.py), hence, smaller ridge
+# values are fitted by Logistic itself.
+_minRidge = 1e-4
+
+# ============================================================================
+# Newton solver
+# ============================================================================
+
+# ----------------------------------------------------------------------------
+# design matrices of the training and testing set of a fold
+#
+# The instances are preprocessed as done by Logistic, i.e., the filters
+# ReplaceMissingValues, RemoveUseless, and NominalToBinary are set up on the
+# training instances of known class and the attributes are standardized by
+# their weighted mean and standard deviation. The first column of each design
+# matrix is the intercept. Returns for each set the tuple of design matrix,
+# class indices, and instance weights, where instances of missing class are
+# left out.
+def _design(train, test):
+    train = Instances(train)
+    train.deleteWithMissingClass()
+    test = Instances(test)
+    test.deleteWithMissingClass()
+    for f in (ReplaceMissingValues(), RemoveUseless(), NominalToBinary()):
+        f.setInputFormat(train)
+        train = Filter.useFilter(train, f)
+        test  = Filter.useFilter(test,  f)
+    columns = [j for j in range(train.numAttributes()) if j != train.classIndex()]
+    mean  = [0.0] * len(columns)
+    sd    = [0.0] * len(columns)
+    total = 0.0
+    for i in range(train.numInstances()):
+        instance = train.instance(i)
+        weight = instance.weight()
+        total = total + weight
+        for c in range(len(columns)):
+            x = instance.value(columns[c])
+            mean[c] = mean[c] + weight * x
+            sd[c]   = sd[c]   + weight * x * x
+    for c in range(len(columns)):
+        if total > 0: mean[c] = mean[c] / total
+        if total > 1: sd[c] = math.sqrt(abs(sd[c] - total * mean[c] * mean[c]) / (total - 1))
+        else:         sd[c] = 0.0
+    sets = []
+    for data in (train, test):
+        X = Matrix(data.numInstances(), len(columns) + 1)
+        y = []
+        w = []
+        for i in range(data.numInstances()):
+            instance = data.instance(i)
+            X.set(i, 0, 1.0)
+            for c in range(len(columns)):
+                x = instance.value(columns[c])
+                if sd[c] != 0: x = (x - mean[c]) / sd[c]
+                X.set(i, c + 1, x)
+            y.append(int(instance.classValue()))
+            w.append(instance.weight())
+        sets.append((X, y, w))
+    return sets[0], sets[1]
+
+# ----------------------------------------------------------------------------
+# class probabilities and penalized negative log-likelihood of Logistic
+#
+# The coefficients B are a matrix with one column per class but the last,
+# whose scores are zero. As in Logistic, the ridge penalty is the sum of the
+# squared coefficients excluding the intercepts in the first row of B.
+def _evaluate(X, B, y, w, ridge):
+    probs = []
+    nll   = 0.0
+    S = X.times(B).getArray()
+    for i in range(len(y)):
+        scores = list(S[i]) + [0.0]
+        m = max(scores)
+        e = [math.exp(s - m) for s in scores]
+        total = sum(e)
+        probs.append([v / total for v in e])
+        nll = nll - w[i] * (scores[y[i]] - m - math.log(total))
+    penalty = 0.0
+    A = B.getArray()
+    for a in range(1, len(A)):
+        for b in A[a]: penalty = penalty + b * b
+    return probs, nll + ridge * penalty
+
+# ----------------------------------------------------------------------------
+# minimize the objective of Logistic for a ridge value by Newton's method
+#
+# The iterations start at the given coefficients, i.e., the solution of the
+# previous ridge value on the path, and halve the step until the objective
+# does not increase. The blocks of the gradient and Hessian are computed by
+# products of matrices, where Xt is the transpose of the design matrix X.
+def _fit(X, Xt, y, w, numClasses, ridge, B):
+    n = len(y)
+    D = X.getColumnDimension()
+    L = numClasses - 1
+    ones = Matrix(1, D, 1.0)
+    (probs, f) = _evaluate(X, B, y, w, ridge)
+    for iteration in range(_maxIterations):
+        gradient = Matrix(D * L, 1)
+        hessian  = Matrix(D * L, D * L)
+        for k in range(L):
+            r = Matrix(n, 1)
+            for i in range(n):
+                r.set(i, 0, w[i] * (probs[i][k] - ((y[i] == k and 1.0) or 0.0)))
+            g = Xt.times(r)
+            for a in range(1, D):
+                g.set(a, 0, g.get(a, 0) + 2 * ridge * B.get(a, k))
+            gradient.setMatrix(k * D, (k + 1) * D - 1, 0, 0, g)
+            for l in range(k, L):
+                c = Matrix(n, 1)
+                for i in range(n):
+                    c.set(i, 0, w[i] * probs[i][k] * (((k == l) and 1.0 or 0.0) - probs[i][l]))
+                h = Xt.times(X.arrayTimes(c.times(ones)))
+                if k == l:
+                    for a in range(1, D): h.set(a, a, h.get(a, a) + 2 * ridge)
+                hessian.setMatrix(k * D, (k + 1) * D - 1, l * D, (l + 1) * D - 1, h)
+                if k != l:
+                    hessian.setMatrix(l * D, (l + 1) * D - 1, k * D, (k + 1) * D - 1, h.transpose())
+        try:
+            step = hessian.solve(gradient)
+        except RuntimeException:
+            # singular Hessian, e.g., of collinear attributes and a tiny ridge
+            step = hessian.plus(Matrix.identity(D * L, D * L).times(1e-8)).solve(gradient)
+        delta = Matrix(D, L)
+        for k in range(L):
+            delta.setMatrix(0, D - 1, k, k, step.getMatrix(k * D, (k + 1) * D - 1, 0, 0))
+        t = 1.0
+        (candidate, candProbs, candF) = (None, None, None)
+        while t > 1e-10:
+            candidate = B.minus(delta.times(t))
+            (candProbs, candF) = _evaluate(X, candidate, y, w, ridge)
+            if candF <= f: break
+            t = t / 2
+        if not candF <= f: break
+        (B, probs, f) = (candidate, candProbs, candF)
+        if delta.normInf() * t < _tolerance: break
+    return B
+
+# ----------------------------------------------------------------------------
+# class probabilities of the testing instances of known class predicted by
+# Logistic trained until convergence, which is used for ridge values below
+# _minRidge
+def _logistic(train, test, ridge):
+    logistic = Logistic()
+    logistic.setRidge(ridge)
+    logistic.buildClassifier(train)
+    probs = []
+    for i in range(test.numInstances()):
+        instance = test.instance(i)
+        if instance.classIsMissing(): continue
+        probs.append(list(logistic.distributionForInstance(instance)))
+    return probs
+
+# ----------------------------------------------------------------------------
+# fit Logistic to the training set for each ridge value, where the ridge
+# values down to _minRidge are fitted from the largest to the smallest and
+# each fit is warm-started from the previous one
+#
+# Returns the testing set as returned by _design() and for each ridge value
+# the class probabilities of the testing instances.
+def _path(train, test, ridges):
+    (trainSet, testSet) = _design(train, test)
+    (X, y, w) = trainSet
+    B = Matrix(X.getColumnDimension(), train.numClasses() - 1)
+    Xt = X.transpose()
+    order = [r for r in range(len(ridges)) if ridges[r] >= _minRidge]
+    order.sort(lambda a, b: cmp(ridges[b], ridges[a]))
+    probs = [None] * len(ridges)
+    for r in order:
+        B = _fit(X, Xt, y, w, train.numClasses(), ridges[r], B)
+        probs[r] = _evaluate(testSet[0], B, testSet[1], testSet[2], 0.0)[0]
+    for r in range(len(ridges)):
+        if probs[r] is None: probs[r] = _logistic(train, test, ridges[r])
+    return testSet, probs
+
+# ----------------------------------------------------------------------------
+# number of coefficients of Logistic for a dataset, where nominal attributes
+# with more than two values are counted as the binary attributes created by
+# NominalToBinary and attributes removed by RemoveUseless are counted, too
+def _dimension(data):
+    D = 1
+    for j in range(data.numAttributes()):
+        if j == data.classIndex(): continue
+        attribute = data.attribute(j)
+        if attribute.isNominal() and attribute.numValues() > 2:
+            D = D + attribute.numValues()
+        else:
+            D = D + 1
+    return D * (data.numClasses() - 1)
+
+# ----------------------------------------------------------------------------
+# percentage of correctly classified instances given the summed weights
+def _pct(correct, total):
+    if total > 0: return 100.0 * correct / total
+    return 0.0
+
+# ============================================================================
+# cross-validation
+# ============================================================================
+
+# ----------------------------------------------------------------------------
+## @brief Whether the ridge path of a dataset is cheap enough to be computed.
+#
+# The Newton iterations of the path solve a dense linear system whose size
+# is the number of coefficients of Logistic. For datasets with many attributes
+# or classes, Logistic's own optimizer, which does not solve such a system,
+# is faster and the Logistic classifiers should be cross-validated by
+# util.cross_validate() instead.
+def supported(data):
+    return _dimension(data) <= _maxDimension
+
+# ----------------------------------------------------------------------------
+## @brief Cross-validate Logistic classifiers for a sequence of ridge values.
+#
+# Instead of training a Logistic classifier from scratch for each ridge value,
+# the ridge values are fitted in order from the strongest to the weakest
+# regularization on the training set of each fold (see util.get_folds()),
+# where each fit starts at the coefficients of the previous one. As the
+# solution changes only little between neighbouring ridge values, each fit
+# takes only a few Newton iterations and the whole path of a fold costs about
+# as much as a single fit. The objective is the one of Logistic with the
+# default maximum number of iterations (-1), i.e., until convergence, hence,
+# the accuracies equal those of util.cross_validate() up to the tolerance of
+# the optimizers. Ridge values below 1e-4, for which this was not checked,
+# are not on the path but fitted by Logistic itself. See supported() for the
+# datasets the path is suited for.
+#
+# @param [in] data   Dataset.
+# @param [in] ridges Ridge values.
+#
+# @returns Percentage of correctly classified instances for each ridge value.
+def cross_validate_path(data, ridges):
+    correct = [0.0] * len(ridges)
+    total   = 0.0
+    for train, test in util.get_folds(data):
+        ((X, y, w), probs) = _path(train, test, ridges)
+        total = total + sum(w)
+        for r in range(len(ridges)):
+            for i in range(len(y)):
+                if util.get_predicted_class(probs[r][i]) == y[i]:
+                    correct[r] = correct[r] + w[i]
+    return [_pct(c, total) for c in correct]
+
+# ----------------------------------------------------------------------------
+## @brief Cross-validate bagged Logistic classifiers for a grid of ridge values
+#         and numbers of bagging iterations.
+#
+# The bags of each fold are drawn by resampling its training set with weights
+# using one random number generator per fold, which is seeded by the given
+# seed, and a path of ridge values (see cross_validate_path()) is fitted to
+# each bag. These bags need not be those drawn by Bagging, hence, the
+# accuracies are estimates of those of the bagged classifiers of the same
+# parameters but may differ from util.cross_validate() of these. The class probabilities of the bags are summed up in
+# order, such that the ensembles of all numbers of iterations are evaluated
+# by the same paths, i.e., max(iterations) paths per fold instead of one
+# ensemble per cell of the grid.
+#
+# @param [in] data           Dataset.
+# @param [in] ridges         Ridge values.
+# @param [in] iterations     Numbers of bagging iterations.
+# @param [in] bagSizePercent Size of each bag in percent of the training set.
+# @param [in] seed           Seed of the random number generator of the bags.
+#
+# @returns Percentage of correctly classified instances for each cell of the
+#          grid, where the cells are ordered by ridge value first.
+def cross_validate_bagged_path(data, ridges, iterations, bagSizePercent=100, seed=1):
+    correct = [[0.0] * len(iterations) for r in ridges]
+    total   = 0.0
+    for train, test in util.get_folds(data):
+        random  = Random(seed)
+        bagSize = train.numInstances() * bagSizePercent / 100
+        sums    = None
+        for j in range(max(iterations)):
+            bag = train.resampleWithWeights(random)
+            if bagSize < train.numInstances():
+                bag.randomize(random)
+                bag = Instances(bag, 0, bagSize)
+            ((X, y, w), probs) = _path(bag, test, ridges)
+            if sums is None:
+                sums = probs
+                total = total + sum(w)
+            else:
+                for r in range(len(ridges)):
+                    for i in range(len(y)):
+                        sums[r][i] = [a + b for a, b in zip(sums[r][i], probs[r][i])]
+            if not (j + 1) in iterations: continue
+            column = iterations.index(j + 1)
+            for r in range(len(ridges)):
+                for i in range(len(y)):
+                    if util.get_predicted_class(sums[r][i]) == y[i]:
+                        correct[r][column] = correct[r][column] + w[i]
+    accuracies = []
+    for r in range(len(ridges)):
+        accuracies.extend([_pct(c, total) for c in correct[r]])
+    return accuracies
@@ -13,8 +13,6 @@ import sys
 import java.io.FileReader as FileReader
 import weka.core.Instances as Instances
 import weka.classifiers.functions.SimpleLogistic as SimpleLogistic
-import weka.classifiers.Evaluation as Evaluation
-import weka.core.Range as Range
 import weka.classifiers.meta.GridSearch as GridSearch
 import weka.core.SelectedTag as SelectedTag
 import weka.filters.AllFilter as AllFilters
@@ -22,35 +20,35 @@ import weka.filters.AllFilter as AllFilters
 import java.lang.StringBuffer as StringBuffer
 import java.lang.String as String
 import java.lang.Boolean as Boolean
-import java.util.Random as Random
 
 from . import util
 
 # ----------------------------------------------------------------------------
-def myGridSearch(data,HsBounds,NumBoostBounds):
+def myGridSearch(data,HsBounds,NumBoostBounds,numSlots=1,searchMode='grid'):
     best_acc = -float('inf')
     class bestValues(object):
         b = float('nan')
         h = float('nan')
+    # cross-validate the cells of the grid using numSlots threads, where in
+    # "halving" search mode only the best cells are evaluated on all folds
+    cells           = []
+    simplelogistics = []
     for h in range(HsBounds[0],HsBounds[1]+HsBounds[2],HsBounds[2]):
         for b in range(NumBoostBounds[0],NumBoostBounds[1]+NumBoostBounds[2],NumBoostBounds[2]):
             simplelogistic = SimpleLogistic()
             simplelogistic.setHeuristicStop(int(h))
             simplelogistic.setNumBoostingIterations(int(b))
             simplelogistic.setUseCrossValidation(False)
-            evaluation = Evaluation(data)
-            output = output = util.get_buffer_for_predictions()[0]
-            attRange = Range()  # no additional attributes output
-            outputDistribution = Boolean(False)  # we don't want distribution
-            random = Random(1)
-            numFolds = min(10,data.numInstances())
-            evaluation.crossValidateModel(simplelogistic,data,numFolds,random,[output, attRange, outputDistribution])
-            acc = evaluation.pctCorrect()
-            if (acc>best_acc):
-                bestsimplelogistic = simplelogistic
-                best_acc = acc
-                bestValues.b = b
-                bestValues.h = h
+            cells.append((h, b))
+            simplelogistics.append(simplelogistic)
+    accuracies = util.cross_validate_grid(simplelogistics, data, numSlots, None, searchMode)
+    best = util.get_best_cell(accuracies)
+    if (best >= 0):
+        (h, b) = cells[best]
+        bestsimplelogistic = simplelogistics[best]
+        best_acc = accuracies[best]
+        bestValues.b = b
+        bestValues.h = h
     print "Best accuracy: ", best_acc
     print "Best values:   HsBounds = ", bestValues.h, ", NumBoostBounds = ", bestValues.b
     print "-----------------------------------------"
@@ -58,12 +56,12 @@ def myGridSearch(data,HsBounds,NumBoostBounds):
  
 # ----------------------------------------------------------------------------
 # searching for the best parameters for the Logistic classifier
-def SimpleLogistic_ParamFinder(data):   
+def SimpleLogistic_ParamFinder(data,numSlots=1,searchMode='grid'):   
     # Possible set for heuristic stop value
     HsBounds = [10,100,5]
     # Possible set for num of boosting
     NumBoostBounds = [0,100,10]
-    if (data.numInstances()>10):     # grid search does 10-fold cross validation; hence number of samples must be more than 10
+    if (data.numInstances()>10 and searchMode == 'grid'):     # grid search does 10-fold cross validation; hence number of samples must be more than 10
         gridsearch = GridSearch()
         acctag = gridsearch.getEvaluation()
         acctag = SelectedTag('ACC',acctag.getTags())
@@ -90,14 +88,7 @@ def SimpleLogistic_ParamFinder(data):
         bestsimplelogistic = SimpleLogistic()
         bestsimplelogistic.setHeuristicStop(int(bestValues.x))
         bestsimplelogistic.setNumBoostingIterations(int(bestValues.y))
-        evaluation = Evaluation(data)
-        output = util.get_buffer_for_predictions()[0]
-        attRange = Range()  # no additional attributes output
-        outputDistribution = Boolean(False)  # we don't want distribution
-        random = Random(1)
-        numFolds = min(10,data.numInstances())
-        evaluation.crossValidateModel(bestsimplelogistic,data,numFolds,random,[output, attRange, outputDistribution])
-        acc = evaluation.pctCorrect()
+        acc = util.cross_validate(bestsimplelogistic, data)
         print "best accuracy: ", acc
         print "best simple logistic classifier with Heuristic Stop=",bestsimplelogistic.getHeuristicStop() , "Num Boosting Iterations = ", bestsimplelogistic.getNumBoostingIterations()
         OptSimpLog = bestsimplelogistic
@@ -105,7 +96,7 @@ def SimpleLogistic_ParamFinder(data):
         OptSimpLogp2 = bestsimplelogistic.getNumBoostingIterations()
         OptSimpLogAcc = acc
     else:
-        OptSimpLog, OptSimpLogp1, OptSimpLogp2, OptSimpLogAcc = myGridSearch(data,HsBounds,NumBoostBounds)
+        OptSimpLog, OptSimpLogp1, OptSimpLogp2, OptSimpLogAcc = myGridSearch(data,HsBounds,NumBoostBounds,numSlots,searchMode)
     Description = 'Simple logistic classifier: OptHeuristicStop= ' + str(OptSimpLogp1) + \
             ', OptNumBoostingIterations=' + str(OptSimpLogp2) + ', OptAcc = ' + str(OptSimpLogAcc)
     print "-----------------------------------------"
@@ -14,8 +14,6 @@ import java.io.FileReader as FileReader
 import weka.core.Instances as Instances
 import weka.classifiers.functions.SimpleLogistic as SimpleLogistic
 import weka.classifiers.meta.AdaBoostM1 as AdaBoostM1
-import weka.classifiers.Evaluation as Evaluation
-import weka.core.Range as Range
 import weka.classifiers.meta.GridSearch as GridSearch
 import weka.core.SelectedTag as SelectedTag
 import weka.filters.AllFilter as AllFilters
@@ -23,7 +21,6 @@ import weka.filters.AllFilter as AllFilters
 import java.lang.StringBuffer as StringBuffer
 import java.lang.String as String
 import java.lang.Boolean as Boolean
-import java.util.Random as Random
 
 from . import util
 
@@ -76,14 +73,7 @@ def AdaBoostedSimpleLogistic_ParamFinder(data, param1, param2):
     bestadaboostm1.setWeightThreshold(int(bestValues1.x))
     bestadaboostm1.setNumIterations(int(bestValues1.y))
     bestadaboostm1.setClassifier(simplelogistic)
-    evaluation = Evaluation(data)
-    output = util.get_buffer_for_predictions()[0]
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    random = Random(1)
-    numFolds = min(10,data.numInstances())
-    evaluation.crossValidateModel(bestadaboostm1,data,numFolds,random,[output, attRange, outputDistribution])
-    best_acc1 = evaluation.pctCorrect()
+    best_acc1 = util.cross_validate(bestadaboostm1, data)
     print "best accuracy by boosting the optimal simple Logistic classifier: ", best_acc1
     print "Optimal weight Threshold  Percent : ", bestValues1.x , "Optimal number of Iterations : ", bestValues1.y
     print "-----------------------------------------"
@@ -113,14 +103,7 @@ def AdaBoostedSimpleLogistic_ParamFinder(data, param1, param2):
     simplelogistic.setNumBoostingIterations(int(bestValues2.x))
     bestadaboostm2.setNumIterations(int(bestValues2.y))
     bestadaboostm2.setClassifier(simplelogistic)    
-    evaluation = Evaluation(data)
-    output = util.get_buffer_for_predictions()[0]
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    random = Random(1)
-    numFolds = min(10,data.numInstances())
-    evaluation.crossValidateModel(bestadaboostm2,data,numFolds,random,[output, attRange, outputDistribution])
-    best_acc2 = evaluation.pctCorrect()
+    best_acc2 = util.cross_validate(bestadaboostm2, data)
     print "best accuracy by boosting the Simple Logistic classifier (with optimization over ridge): ", best_acc2
     print "Optimal number of boosting Iteration : ", bestValues2.x , "Optimal number of Iteration : ", bestValues2.y
     print "-----------------------------------------"
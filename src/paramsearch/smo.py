@@ -15,8 +15,6 @@ import weka.core.Instances as Instances
 import weka.classifiers.functions.SMO as SMO
 import weka.classifiers.functions.supportVector.PolyKernel as PolyKernel
 import weka.classifiers.functions.supportVector.RBFKernel as RBFKernel
-import weka.classifiers.Evaluation as Evaluation
-import weka.core.Range as Range
 import weka.classifiers.meta.GridSearch as GridSearch
 import weka.core.SelectedTag as SelectedTag
 import weka.filters.AllFilter as AllFilters
@@ -24,19 +22,23 @@ import weka.filters.AllFilter as AllFilters
 import java.lang.StringBuffer as StringBuffer
 import java.lang.String as String
 import java.lang.Boolean as Boolean
-import java.util.Random as Random
 
 from . import util
+from . import kernels
 
 # ----------------------------------------------------------------------------
-def myGridSearch(data,cBounds,GBound,eBounds):
+def myGridSearch(data,cBounds,GBound,eBounds,numSlots=1,searchMode='grid'):
     IsBestRBFKernel = False
     best_acc_poly = -float('inf')
     best_acc_rbf = -float('inf')
-    # Poly Kernel 
-    class bestValues_poly(object):
-        x = float('nan')
-        y = float('nan')
+    # the cells of the grids of both kernels are cross-validated at once
+    # using numSlots threads, where the kernel matrices of each exponent and
+    # gamma are computed once and reused for all C values, where the cells of
+    # each kernel are evaluated one after another such that only the matrices
+    # of few kernels are cached at a time, and in "halving" search mode only
+    # the best cells are evaluated on all folds
+    cells_poly = []
+    smos       = []
     for Cbnd in cBounds:
         for c in range(Cbnd[0],Cbnd[1]+Cbnd[2],Cbnd[2]):
             for e in range(eBounds[0],eBounds[1]+eBounds[2],eBounds[2]):
@@ -45,26 +47,9 @@ def myGridSearch(data,cBounds,GBound,eBounds):
                 kernel.setExponent(e)
                 smo.setC(c)
                 smo.setKernel(kernel)
-                evaluation = Evaluation(data)
-                output = util.get_buffer_for_predictions()[0]
-                attRange = Range()  # no additional attributes output
-                outputDistribution = Boolean(False)  # we don't want distribution
-                random = Random(1)
-                numFolds = min(10,data.numInstances())
-                evaluation.crossValidateModel(smo,data,numFolds,random,[output, attRange, outputDistribution])
-                acc = evaluation.pctCorrect()
-                if (acc>best_acc_poly):
-                    best_smo_poly = smo
-                    best_acc_poly = acc
-                    bestValues_poly.x = c
-                    bestValues_poly.y = e
-    print "Best accuracy (Poly Kernel): ", best_acc_poly
-    print "Best values (Poly Kernel):   C = ", bestValues_poly.x, ", exponent = ", bestValues_poly.y
-    print "-----------------------------------------"
-    # RBF Kernel
-    class bestValues_rbf(object):
-        x = float('nan')
-        y = float('nan')
+                cells_poly.append((c, e))
+                smos.append(smo)
+    cells_rbf = []
     for Cbnd in cBounds:
         for c in range(Cbnd[0],Cbnd[1]+Cbnd[2],Cbnd[2]):
             for g in range(GBound[0],GBound[1]+GBound[2],GBound[2]):
@@ -73,19 +58,30 @@ def myGridSearch(data,cBounds,GBound,eBounds):
                 kernel.setGamma(pow(10,g))
                 smo.setC(c)
                 smo.setKernel(kernel)
-                evaluation = Evaluation(data)
-                output = util.get_buffer_for_predictions()[0]
-                attRange = Range()  # no additional attributes output
-                outputDistribution = Boolean(False)  # we don't want distribution
-                random = Random(1)
-                numFolds = min(10,data.numInstances())
-                evaluation.crossValidateModel(smo,data,numFolds,random,[output, attRange, outputDistribution])
-                acc = evaluation.pctCorrect()
-                if (acc>best_acc_rbf):
-                    best_smo_rbf = smo
-                    best_acc_rbf = acc
-                    bestValues_rbf.x = c
-                    bestValues_rbf.y = g 
+                cells_rbf.append((c, g))
+                smos.append(smo)
+    accuracies = util.cross_validate_grid(smos, data, numSlots, kernels.cross_validate, searchMode, kernels.group)
+    # Poly Kernel 
+    class bestValues_poly(object):
+        x = float('nan')
+        y = float('nan')
+    best = util.get_best_cell(accuracies[:len(cells_poly)])
+    if (best >= 0):
+        best_smo_poly = smos[best]
+        best_acc_poly = accuracies[best]
+        (bestValues_poly.x, bestValues_poly.y) = cells_poly[best]
+    print "Best accuracy (Poly Kernel): ", best_acc_poly
+    print "Best values (Poly Kernel):   C = ", bestValues_poly.x, ", exponent = ", bestValues_poly.y
+    print "-----------------------------------------"
+    # RBF Kernel
+    class bestValues_rbf(object):
+        x = float('nan')
+        y = float('nan')
+    best = util.get_best_cell(accuracies[len(cells_poly):])
+    if (best >= 0):
+        best_smo_rbf = smos[len(cells_poly) + best]
+        best_acc_rbf = accuracies[len(cells_poly) + best]
+        (bestValues_rbf.x, bestValues_rbf.y) = cells_rbf[best]
     print "Best accuracy (RBF Kernel): ", best_acc_rbf
     print "Best values (RBF Kernel):   C = ", bestValues_rbf.x, ", gamma = ", bestValues_rbf.y
     if (best_acc_rbf > best_acc_poly):
@@ -108,14 +104,14 @@ def myGridSearch(data,cBounds,GBound,eBounds):
 
 # ----------------------------------------------------------------------------
 # searching for the best parameters for the SMO
-def SMO_ParamFinder(data):
+def SMO_ParamFinder(data,numSlots=1,searchMode='grid'):
     # Possible set for C-value
     cBounds = [[1,10,1],[10,100,10],[100,300,20]]
     # possible set for exponents
     eBounds = [1,3,1]
     # possible set for Gamma
     GBound = [-5,2,1]
-    if (data.numInstances()>10):     # grid search does 10-fold cross validation; hence number of samples must be more than 10
+    if (data.numInstances()>10 and searchMode == 'grid'):     # grid search does 10-fold cross validation; hence number of samples must be more than 10
         # Polynomials Kernel
         gridsearch = GridSearch()
         acctag = gridsearch.getEvaluation()
@@ -153,15 +149,8 @@ def SMO_ParamFinder(data):
             kernel.setExponent(bestValues.y)
             bestsmo.setC(bestValues.x)
             bestsmo.setKernel(kernel)
-            evaluation = Evaluation(data)
-            output = util.get_buffer_for_predictions()[0]
-            attRange = Range()  # no additional attributes output
-            outputDistribution = Boolean(False)  # we don't want distribution
-            random = Random(1)
-            numFolds = min(10,data.numInstances())
-            print "numFolds : ", numFolds
-            evaluation.crossValidateModel(bestsmo,data,numFolds,random,[output, attRange, outputDistribution])
-            acc = evaluation.pctCorrect()
+            print "numFolds : ", min(10,data.numInstances())
+            acc = kernels.cross_validate(bestsmo, data)
             if (acc>best_acc_poly):
                 best_smo_poly = bestsmo
                 best_acc_poly = acc
@@ -203,14 +192,7 @@ def SMO_ParamFinder(data):
             kernel.setGamma(pow(10,bestValues.y))
             bestsmo.setC(bestValues.x)
             bestsmo.setKernel(kernel)
-            evaluation = Evaluation(data)
-            output = util.get_buffer_for_predictions()[0]
-            attRange = Range()  # no additional attributes output
-            outputDistribution = Boolean(False)  # we don't want distribution
-            random = Random(1)
-            numFolds = min(10,data.numInstances())
-            evaluation.crossValidateModel(bestsmo,data,numFolds,random,[output, attRange, outputDistribution])
-            acc = evaluation.pctCorrect()
+            acc = kernels.cross_validate(bestsmo, data)
             if (acc>best_acc_rbf):
                 best_smo_rbf = bestsmo
                 best_acc_rbf = acc
@@ -236,8 +218,8 @@ def SMO_ParamFinder(data):
             OptSMOp2 = bestValues_poly.y
             OptSMOAcc = best_acc_poly
             OptSMOIsRBF = IsBestRBFKernel
-    else:    # we have very small ssample size
-        OptSMOIsRBF, best_smo, OptSMOp1, OptSMOp2, OptSMOAcc  = myGridSearch(data,cBounds,GBound,eBounds)
+    else:    # we have very small ssample size or search by successive halving
+        OptSMOIsRBF, best_smo, OptSMOp1, OptSMOp2, OptSMOAcc  = myGridSearch(data,cBounds,GBound,eBounds,numSlots,searchMode)
     if OptSMOIsRBF:
         Description = 'SMO classifier(RBF kernel): OptC=' + str(OptSMOp1) + \
                 ', OptGamma=' + str(OptSMOp2) + ', OptAcc=' + str(OptSMOAcc) 
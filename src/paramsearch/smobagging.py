@@ -16,8 +16,6 @@ import weka.classifiers.functions.SMO as SMO
 import weka.classifiers.functions.supportVector.PolyKernel as PolyKernel
 import weka.classifiers.functions.supportVector.RBFKernel as RBFKernel
 import weka.classifiers.meta.Bagging as Bagging
-import weka.classifiers.Evaluation as Evaluation
-import weka.core.Range as Range
 import weka.classifiers.meta.GridSearch as GridSearch
 import weka.core.SelectedTag as SelectedTag
 import weka.filters.AllFilter as AllFilters
@@ -25,7 +23,6 @@ import weka.filters.AllFilter as AllFilters
 import java.lang.StringBuffer as StringBuffer
 import java.lang.String as String
 import java.lang.Boolean as Boolean
-import java.util.Random as Random
 
 from . import util
 
@@ -38,7 +35,7 @@ from . import util
 #  param1, param2: based on values of the BestSMOIsRBFKernel, they can be interpreted as follows:
 #   BestSMOIsRBFKernel = true   ---> param1 is c-value and param2 is gamma value
 #   BestSMOIsRBFKernel = false  ---> param1 is c-value and param2 is exponent value
-def BaggingSMO_ParamFinder(data, BestSMOIsRBFKernel, param1, param2):
+def BaggingSMO_ParamFinder(data, BestSMOIsRBFKernel, param1, param2, numSlots=1):
     # Possible set for C-value
     cBounds = [[1,10,1],[10,100,10],[100,300,20]]
     # possible set bag size percent
@@ -56,6 +53,7 @@ def BaggingSMO_ParamFinder(data, BestSMOIsRBFKernel, param1, param2):
     gridsearch.setGridIsExtendable(Boolean(False))
     smo = SMO()
     bagging = Bagging()
+    util.set_num_execution_slots(bagging, numSlots)
     if BestSMOIsRBFKernel:
         kernel = RBFKernel()
         kernel.setGamma(param2)
@@ -85,19 +83,13 @@ def BaggingSMO_ParamFinder(data, BestSMOIsRBFKernel, param1, param2):
     # ------------------ Evaluation
     smo = SMO()
     bestbagging1 = Bagging()
+    util.set_num_execution_slots(bestbagging1, numSlots)
     smo.setKernel(kernel)
     smo.setC(param1)
     bestbagging1.setBagSizePercent(int(bestValues1.x))
     bestbagging1.setNumIterations(int(bestValues1.y))
     bestbagging1.setClassifier(smo)
-    evaluation = Evaluation(data)
-    output = util.get_buffer_for_predictions()[0]
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    random = Random(1)
-    numFolds = min(10,data.numInstances())
-    evaluation.crossValidateModel(bestbagging1,data,numFolds,random,[output, attRange, outputDistribution])
-    best_acc1 = evaluation.pctCorrect()
+    best_acc1 = util.cross_validate(bestbagging1, data)
     bestValues1 = gridsearch.getValues()
     print "best accuracy by bagging the optimal SMO classifier: ", best_acc1
     print "Optimal Bag size Percent : ", bestValues1.x , "Optimal number of Iteration : ", bestValues1.y
@@ -132,19 +124,13 @@ def BaggingSMO_ParamFinder(data, BestSMOIsRBFKernel, param1, param2):
         # ------------ Evaluation
         smo = SMO()
         bestbagging = Bagging()
+        util.set_num_execution_slots(bestbagging, numSlots)
         kernel = PolyKernel()
         smo.setKernel(kernel)
         smo.setC(bestValues.x)
         bestbagging.setNumIterations(int(bestValues.y))
         bestbagging.setClassifier(smo)
-        evaluation = Evaluation(data)
-        output = util.get_buffer_for_predictions()[0]
-        attRange = Range()  # no additional attributes output
-        outputDistribution = Boolean(False)  # we don't want distribution
-        random = Random(1)
-        numFolds = min(10,data.numInstances())
-        evaluation.crossValidateModel(bestbagging,data,numFolds,random,[output, attRange, outputDistribution])
-        acc = evaluation.pctCorrect()
+        acc = util.cross_validate(bestbagging, data)
         if (acc>best_acc2):
             bestbagging2 = bestbagging
             best_acc2 = acc
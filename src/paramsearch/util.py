@@ -8,10 +8,39 @@
 # Contact: SBIA Group <sbia-software at uphs.upenn.edu>
 ##############################################################################
 
+import math
+
 import weka.core.Version
 if not weka.core.Version().isOlder("3.7.0"):
     import weka.classifiers.evaluation.output.prediction.PlainText
 import java.lang.StringBuffer
+import java.util.Random
+import java.util.concurrent.Callable
+import java.util.concurrent.Executors
+import weka.core.Instances
+import weka.core.Utils
+import weka.classifiers.Evaluation
+try:
+    from weka.core import BatchPredictor
+except ImportError:
+    BatchPredictor = None
+try:
+    from weka.classifiers import AbstractClassifier as ClassifierFactory  # Weka 3.7 and later
+except ImportError:
+    from weka.classifiers import Classifier as ClassifierFactory
+
+# ----------------------------------------------------------------------------
+## @brief Modes of the search for the best cell of a parameter grid, default first.
+#
+# In "grid" mode, each cell is cross-validated on all folds. In "halving"
+# mode, the cells are cross-validated by successive halving instead (see
+# cross_validate_grid()).
+SEARCH_MODES = ['grid', 'halving']
+
+# ----------------------------------------------------------------------------
+# factor by which the number of cells is reduced by each rung of successive
+# halving, where the fraction 1/_halvingFactor of the cells is promoted
+_halvingFactor = 4
 
 # ----------------------------------------------------------------------------
 def get_buffer_for_predictions(instances=None):
@@ -24,3 +53,241 @@ def get_buffer_for_predictions(instances=None):
         output.setHeader(instances)
         output.setBuffer(buffer)
         return (output, buffer)
+
+# ----------------------------------------------------------------------------
+# get predictions recorded by an evaluation as columns of structured data
+#
+# Returns a dictionary of lists, where the i-th entry of each list belongs to
+# the i-th evaluated instance: 'index' (instance index), 'actual' and
+# 'predicted' (class labels, '?' if missing), 'distribution' (list of class
+# probabilities), and 'weight'. The Evaluation.predictions() are a FastVector
+# before Weka 3.7 and an ArrayList afterwards.
+def get_predictions(evaluation, instances):
+    predictions = evaluation.predictions()
+    classes     = instances.classAttribute()
+    if hasattr(predictions, 'get'): getter = predictions.get
+    else:                           getter = predictions.elementAt
+    columns = {'index': [], 'actual': [], 'predicted': [], 'distribution': [], 'weight': []}
+    for i in range(predictions.size()):
+        p = getter(i)
+        columns['index'].append(i)
+        for k, v in (('actual', p.actual()), ('predicted', p.predicted())):
+            if weka.core.Utils.isMissingValue(v): columns[k].append('?')
+            else:                                 columns[k].append(classes.value(int(v)))
+        columns['distribution'].append(list(p.distribution()))
+        columns['weight'].append(p.weight())
+    return columns
+
+# ----------------------------------------------------------------------------
+# set number of threads used to build the members of an ensemble classifier
+#
+# Bagging and RandomForest of Weka 3.7 and later build their members in
+# parallel using the given number of execution slots. Other classifiers such
+# as AdaBoostM1, whose members depend on each other, are not modified.
+# Returns whether the classifier supports multiple execution slots.
+def set_num_execution_slots(classifier, numSlots):
+    if not hasattr(classifier, 'setNumExecutionSlots'): return False
+    if numSlots > 1: classifier.setNumExecutionSlots(numSlots)
+    return True
+
+# ----------------------------------------------------------------------------
+# get class probabilities of all instances estimated by a trained classifier
+#
+# Classifiers which implement the BatchPredictor interface of Weka 3.8 and
+# later compute the matrix of class probabilities by a single Java call.
+# Otherwise, the distribution of each instance is computed one by one.
+def get_distributions(classifier, instances):
+    if BatchPredictor is not None and isinstance(classifier, BatchPredictor):
+        return classifier.distributionsForInstances(instances)
+    return [classifier.distributionForInstance(instances.instance(i)) for i in range(instances.numInstances())]
+
+# ----------------------------------------------------------------------------
+# get index of class predicted given the class probabilities of an instance
+#
+# This is the prediction recorded by Evaluation, i.e., the first class with
+# the maximum probability, or -1 (missing) if all probabilities are zero.
+def get_predicted_class(distribution):
+    predicted = -1
+    best = 0.0
+    for k in range(len(distribution)):
+        if distribution[k] > best:
+            predicted = k
+            best = distribution[k]
+    return predicted
+
+# ----------------------------------------------------------------------------
+# folds of the dataset most recently cross-validated by cross_validate()
+_folds = [None, []]
+
+# ----------------------------------------------------------------------------
+# get training and testing sets of the folds of a cross-validation
+#
+# The folds are the ones built by Evaluation.crossValidateModel() with
+# min(10, numInstances) folds and Random(1), i.e., a copy of the dataset is
+# randomized and stratified and each training set is randomized again using
+# the same random number generator. They are built only once per dataset
+# such that all classifiers are evaluated on the same folds without copying
+# the data for each evaluation. Returns the list of (train, test) tuples.
+def get_folds(data):
+    if _folds[0] is not data:
+        numFolds = min(10,data.numInstances())
+        random = java.util.Random(1)
+        copy = weka.core.Instances(data)
+        copy.randomize(random)
+        if copy.classAttribute().isNominal():
+            copy.stratify(numFolds)
+        folds = []
+        for i in range(numFolds):
+            train = copy.trainCV(numFolds, i, random)
+            test  = copy.testCV(numFolds, i)
+            folds.append((train, test))
+        _folds[0] = data
+        _folds[1] = folds
+    return _folds[1]
+
+# ----------------------------------------------------------------------------
+# cross-validate a classifier as done by the grid searches of this package
+# and return the percentage of correctly classified instances
+#
+# The result equals the one of Evaluation.crossValidateModel() with the folds
+# returned by get_folds(), which are shared by all evaluations of a dataset.
+# The folds are not modified, hence, they may be shared by multiple threads.
+# If foldIndices is given, only the folds with these indices are evaluated.
+def cross_validate(classifier, data, foldIndices=None):
+    folds = get_folds(data)
+    if foldIndices is None: foldIndices = range(len(folds))
+    evaluation = weka.classifiers.Evaluation(data)
+    for index in foldIndices:
+        (train, test) = folds[index]
+        evaluation.setPriors(train)
+        copiedClassifier = ClassifierFactory.makeCopy(classifier)
+        copiedClassifier.buildClassifier(train)
+        evaluation.evaluateModel(copiedClassifier, test, [])
+    return evaluation.pctCorrect()
+
+# ----------------------------------------------------------------------------
+# cross-validation of one cell of a parameter grid run by a worker thread
+class _GridCell(java.util.concurrent.Callable):
+
+    def __init__(self, classifier, data, validate):
+        self.classifier = classifier
+        self.data       = data
+        self.validate   = validate
+        self.accuracy   = None
+
+    def call(self):
+        self.accuracy = self.validate(self.classifier, self.data)
+        return None
+
+# ----------------------------------------------------------------------------
+# cross-validate the classifiers of all cells of a parameter grid
+#
+# The classifiers are configured with the parameters of each cell in grid
+# order. As the cells are independent of each other, they are evaluated by a
+# pool of numThreads Java threads. Each cell is evaluated on the same folds
+# (see get_folds()), hence, the results do not depend on the number of
+# threads. The cross-validation is done by the given function, which has the
+# same signature as cross_validate(), e.g., kernels.cross_validate() for SMO.
+# If the function group is given, which maps a classifier to a key, e.g.,
+# kernels.group(), the cells with the same key are evaluated one after another
+# such that these can share cached data, e.g., the kernel matrices of an SMO
+# kernel. The results do not depend on this order of evaluation.
+#
+# In "halving" search mode (see SEARCH_MODES), all cells are first evaluated
+# on a single fold only. The best 1/_halvingFactor of them is then promoted
+# to the next rung, where it is evaluated on more folds, until the remaining
+# cells are evaluated on all folds. The folds of each rung include those of
+# the previous rung, whose results are reused. With 10 folds, the rungs
+# evaluate 1, 3, and 10 folds, i.e., about a fifth of the classifiers are
+# trained compared to evaluating every cell on all folds. Note that this is
+# not the cost of the "grid" mode of the parameter finders, which search most
+# grids of datasets with more than 10 instances by Weka's GridSearch.
+#
+# Returns the list of accuracies in the order of the classifiers, where the
+# accuracy of cells which were not evaluated on all folds is None.
+def cross_validate_grid(classifiers, data, numThreads=1, validate=None, searchMode='grid', group=None):
+    if validate is None: validate = cross_validate
+    # build the folds shared by the threads before these are started
+    get_folds(data)
+    if searchMode == 'halving':
+        return _cross_validate_halving(classifiers, data, numThreads, validate, group)
+    cells = [_GridCell(classifier, data, validate) for classifier in classifiers]
+    _run_cells(cells, numThreads, group)
+    return [cell.accuracy for cell in cells]
+
+# ----------------------------------------------------------------------------
+# cross-validate cells of a parameter grid by successive halving
+def _cross_validate_halving(classifiers, data, numThreads, validate, group=None):
+    folds = get_folds(data)
+    # summed weights of the testing instances of known class of each fold
+    weights = []
+    for train, test in folds:
+        weight = 0.0
+        for i in range(test.numInstances()):
+            if not test.instance(i).classIsMissing(): weight = weight + test.instance(i).weight()
+        weights.append(weight)
+    # number of folds evaluated by each rung
+    rungs = [len(folds)]
+    while rungs[0] > 1: rungs.insert(0, int(math.ceil(rungs[0] / float(_halvingFactor))))
+    indices  = range(len(classifiers))
+    correct  = [0.0] * len(classifiers)
+    accuracy = [None] * len(classifiers)
+    numEvaluated = 0
+    for rung in range(len(rungs)):
+        if rung > 0:
+            # promote best cells, where ties are broken in grid order
+            numPromoted = max(1, int(math.ceil(len(indices) / float(_halvingFactor))))
+            indices = sorted(sorted(indices, key=lambda i: -accuracy[i])[:numPromoted])
+        foldIndices = range(numEvaluated, rungs[rung])
+        print "Successive halving: evaluating %d cells on folds %d to %d" \
+                % (len(indices), foldIndices[0] + 1, foldIndices[-1] + 1)
+        def validateFolds(classifier, data, foldIndices=foldIndices):
+            return validate(classifier, data, foldIndices)
+        cells = [_GridCell(classifiers[i], data, validateFolds) for i in indices]
+        _run_cells(cells, numThreads, group)
+        weight = sum([weights[f] for f in foldIndices])
+        total  = sum(weights[:rungs[rung]])
+        for k in range(len(indices)):
+            i = indices[k]
+            if weight > 0: correct[i] = correct[i] + cells[k].accuracy * weight / 100.0
+            if total  > 0: accuracy[i] = 100.0 * correct[i] / total
+            else:          accuracy[i] = 0.0
+        numEvaluated = rungs[rung]
+    accuracies = [None] * len(classifiers)
+    for i in indices: accuracies[i] = accuracy[i]
+    return accuracies
+
+# ----------------------------------------------------------------------------
+# evaluate cells of a parameter grid using numThreads Java threads, where the
+# cells are evaluated grouped by the keys of their classifiers if group is
+# given and otherwise in grid order
+def _run_cells(cells, numThreads, group=None):
+    if group is not None:
+        # groups in the order in which these first occur in the grid
+        order = {}
+        for cell in cells: order.setdefault(group(cell.classifier), len(order))
+        cells = sorted(cells, key=lambda cell: order[group(cell.classifier)])
+    if numThreads is None or numThreads < 2 or len(cells) < 2:
+        for cell in cells: cell.call()
+    else:
+        pool = java.util.concurrent.Executors.newFixedThreadPool(min(numThreads, len(cells)))
+        try:
+            futures = [pool.submit(cell) for cell in cells]
+            # wait for all cells in order, re-raises errors of workers
+            for future in futures: future.get()
+        finally:
+            pool.shutdownNow()
+
+# ----------------------------------------------------------------------------
+# get index of the best cell of a parameter grid given the accuracies of the
+# cells in grid order, where ties are broken in favor of the first cell, or
+# -1 if no accuracy is greater than minus infinity. Cells whose accuracy is
+# None, i.e., which were not evaluated on all folds, are skipped.
+def get_best_cell(accuracies):
+    best = -1
+    best_acc = -float('inf')
+    for i in range(len(accuracies)):
+        if (accuracies[i] is not None and accuracies[i] > best_acc):
+            best = i
+            best_acc = accuracies[i]
+    return best
@@ -17,8 +17,9 @@ from gondola import basis
 import sys
 import os as os
 import getopt
+import shlex
+import time
 import os.path
-import string as JyString
 
 # General Java imports
 import java.io.FileReader as FileReader
@@ -36,31 +37,21 @@ import weka.core.Range as Range
 import weka.filters.unsupervised.instance.RemoveWithValues as RemoveWithValues
 import weka.filters.unsupervised.attribute.Remove as AttributeRemove
 
-# SMO imports 
-import weka.classifiers.functions.SMO as SMO
-import weka.classifiers.functions.supportVector.PolyKernel as PolyKernel
-import weka.classifiers.functions.supportVector.RBFKernel as RBFKernel
-
-# Logistic imports
-import weka.classifiers.functions.Logistic as Logistic
-
-# Simple Logisitc imports
-import weka.classifiers.functions.SimpleLogistic as SimpleLogistic
-
-# Random Forests imports
-import weka.classifiers.trees.RandomForest as RandomForest
-
-# Bayesian imports
-import weka.classifiers.bayes.NaiveBayes as NaiveBayes
-import weka.classifiers.bayes.NaiveBayesMultinomial as NaiveBayesMultinomial 
+from gondola.paramsearch import util
+from gondola.paramsearch import results
+from gondola.paramsearch import classifiers
+from gondola.paramsearch import models
+from gondola.paramsearch import preprocess
 
-# Bagging imports
-import weka.classifiers.meta.Bagging as Bagging
+# ============================================================================
+# constants
+# ============================================================================
 
-# AdaBoostM1 imports
-import weka.classifiers.meta.AdaBoostM1 as AdaBoostM1
+# default number of testing instances classified at once by --streamTest
+STREAM_BATCH_SIZE = 1000
 
-from gondola.paramsearch import util
+# outputs of the evaluation on the training data selected by --trainEval
+TRAIN_EVAL_MODES = ['none', 'summary', 'full']
 
 # ============================================================================
 # help
@@ -80,26 +71,70 @@ Description:
   saves the results in two csv-files for test and train results.
 
   The available classifiers are:""" % {'EXENAME': EXENAME}
-    for cls in CLASSIFIER.keys():
+    for cls in classifiers.CLASSIFIER.keys():
         print "  - %s" % cls
     print """
 Options:
   [-r --trainArff]        Specifies the arff-file for training
   [-s --testArff]         Specifies the arff-file for testing
-  [-b --bestClassifier]   Specifies the name of the best classifiers
+  [-b --bestClassifier]   Specifies the name of the best classifiers. A comma-separated list of classifiers
+                          can be given together with the --bestParamsCSV option. All classifiers are then
+                          trained and evaluated on the same data, which is read and preprocessed only once,
+                          and the results of all classifiers are written to the same csv-files, where the
+                          name of the classifier is appended to the headers, e.g., "<hdrTest>-SMO-actual".
   [-p --bestParam]        Specifies the best parameters for the classifiers (embraced inside of parentheses)
+  [--bestParamsCSV]       Specifies the csv-file written by wekaParamSearchForClassifier from which the
+                          best parameters and extra parameters of all classifiers are read instead.
   [-l --removeLabel]      Specifies the labels which to be removed
   [-i --trainCSV]         Specifies the csv-file-name for the training 
+  [--trainEval]           Specifies which results of the training data are output (default: full):
+                          "full" writes the actual and predicted label of each training instance and the
+                          summary of the evaluation to the trainCSV, "summary" writes the summary only,
+                          and "none" skips the evaluation of the classifier on the training data, in which
+                          case nothing is written to the trainCSV. The --trainProbCSV option requires "full".
   [-j --testCSV]          Specifies the csv-file-name for the testing 
   [-a --hdrTrain]         Specifies the header of training 
   [-g --hdrTest]          Specifies the header of testing 
   [-x --extraParam]       Specifies extra parameters
   [-w --weightFlag]       Specifies whether classifiers should use weights to balance inbalanced classes (default: False)
+  [--modelCache]          Specifies a directory in which trained classifiers are stored. A classifier is
+                          loaded from this directory instead of being trained again if the same classifier
+                          with the same parameters was trained before on the same data, i.e., the content
+                          of the training arff-file and the removeLabel and weightFlag options are equal.
+  [--dataCache]           Specifies a directory in which the preprocessed training and testing data is stored.
+                          The data is loaded from this directory instead of reading and preprocessing the
+                          arff-file again if the same arff-file was preprocessed before with the same options.
+                          The directory can be shared with the other Weka tools of this package.
+  [--numSlots]            Specifies the number of threads used to train the members of Bagging and Random
+                          Forest classifiers in parallel (default: 1).
+  [--trainProbCSV]        Specifies the csv-file-name for the class probabilities of the training data
+  [--testProbCSV]         Specifies the csv-file-name for the class probabilities of the testing data.
+                          If any of these two options is given, the classifier is trained once to output
+                          the predicted labels, the class probabilities as written by
+                          wekaClassifierWithProbability, and the summary of the training evaluation.
+                          The probabilities are written with one column "<header>-<label>" per class,
+                          or as NumPy array with one row per instance if the file name ends with ".npy".
+                          SMO classifiers then fit logistic models to their outputs to estimate the
+                          probabilities, which are also used to predict the labels.
+  [--streamTest]          Read the testing data incrementally and classify it in batches of fixed size
+                          instead of loading the whole arff-file into memory. The results of each batch are
+                          written to a temporary file as they are computed and merged with the csv-files at
+                          the end. Hence, the memory needed does not depend on the size of the testing data.
+                          The testing data is not weighted and the --dataCache is not used for it, and the
+                          class probabilities cannot be written as NumPy array in this mode.
+  [--batchSize]           Specifies the number of testing instances classified at once by --streamTest
+                          (default: %(STREAM_BATCH_SIZE)d).
+  [-m --manifest]         Specifies a file with one classification task per line, where each line
+                          lists the above options of the task as shell-quoted arguments. All tasks
+                          are run one after the other by this process and each ARFF file is read
+                          only once. For each task, a line "Task <i> of <n> finished in <t> s" or
+                          "Task <i> of <n> failed in <t> s: <reason>" is printed. If a task fails,
+                          the remaining tasks are still run, but the exit code is non-zero.
 
 Examples:
   %(EXENAME)s --trainArff=$NMFTV_ResPATH/CV\(1_10\)-train-exp702-Features.arff --testArff=$NMFTV_ResPATH/CV\(1_10\)-test-exp702-Features.arff --bestClassifier="Bagging SMO" --bestParam="(1, 100.0, 10.0)" --removeLabel=1 --trainCSV=$HOME/train_alaki.csv --testCSV=$HOME/test_alaki.csv --hdrTrain="CV(1_10)-Class Label" --hdrTest="Class Label"  --extraParam="(0, 11.0, 2.0)"   --weightFlag
    I will describe it later...
-""" % {'EXENAME': EXENAME}
+""" % {'EXENAME': EXENAME, 'STREAM_BATCH_SIZE': STREAM_BATCH_SIZE}
     basis.print_contact()
 
 # ============================================================================
@@ -145,13 +180,6 @@ def splitparams(params):
     params = params.replace(')','')
     return [x.strip() for x in params.split(',')]
 
-# ----------------------------------------------------------------------------
-# convert string to boolean
-def str2bool(st):
-    map = {"false":False, "true":True}
-    b = map[String(JyString.lower(st)).trim()]
-    return b
-
 # ----------------------------------------------------------------------------
 # make a summary (dictionary) of evaluation model
 def makeTrainEvalSummary(evalModel):
@@ -171,496 +199,431 @@ def makeTrainEvalSummary(evalModel):
     return summary
 
 # ----------------------------------------------------------------------------
-# this function calls pyxel.py to write csv file
-def WriteCsvFile(CsvFilename,ID,Header,Value):
-    outPath = os.path.dirname(CsvFilename)
-    csvCommand = "pyxel.py "
-    cmdLine = csvCommand + " -d %s  %s  %s  %s -o %s" %\
-         ( '"' + CsvFilename + '"' ,\
-           '"' + ID + '"' ,\
-           '"' + Header + '"' , \
-           '"'  + Value + '"' ,
-           '"'  + outPath + '"')
-    print "Saving results for subject %s to file %s" % (ID, CsvFilename)
-    # TODO import pyxel module instead and its functions to perform this task
-    basis.execute(cmdLine)
+# read the best parameters and extra parameters of the named classifiers from
+# the csv-file written by wekaParamSearchForClassifier, the file is read once
+def ReadBestParams(CsvFilename,names):
+    table = results.read(CsvFilename)
+    # the names of the classifiers in the csv-file may contain spaces
+    rowids = {}
+    for rowid in table.rows:
+        rowids[rowid.replace(' ','')] = rowid
+    def grab(name):
+        name = name.replace(' ','')
+        if not rowids.has_key(name): return ''
+        return table.get(rowids[name],'Parameters')
+    params = {}
+    for name in names:
+        bestParam = grab(name)
+        if not bestParam:
+            raise Exception("No best parameters of %s classifier found in %s" % (name,CsvFilename))
+        extraParam = ''
+        if classifiers.META_TO_CORE_CLASSIFIER.has_key(name):
+            extraParam = grab(classifiers.META_TO_CORE_CLASSIFIER[name])
+        params[name] = (bestParam,extraParam)
+    return params
+
+# ----------------------------------------------------------------------------
+# get the result table of a csv-file, the tables are written once all
+# classifiers of a task are run
+def GetResultTable(tables,CsvFilename):
+    if not tables.has_key(CsvFilename):
+        tables[CsvFilename] = results.ResultTable()
+    return tables[CsvFilename]
+
+# ----------------------------------------------------------------------------
+# this function stores the summary of the training evaluation (see
+# makeTrainEvalSummary()) in the prediction column of the result table
+def StoreInCSVSummary(tables,CsvFilename,header,summary):
+    table = GetResultTable(tables,CsvFilename)
+    hdr = header + "-prediction"
+    for k in summary.keys():
+        table.set(k,hdr,str(summary[k]))
 
 # ----------------------------------------------------------------------------
-# this function stores accepts result buffer in addition to hear 
-# and IDs and write it into the csv-file
-def StoreInCSVResult(CsvFilename,header,resBuffer,ids,summary):
-    resBuffer = str(resBuffer)
-    lines = resBuffer.split('\n')
-    cnt = 0
-    for cntLine in range(1,len(lines)):
-        l  = lines[cntLine-1]
-        elements = l.split()
-        ID  = ids.instance(cnt).toString()
+# this function stores the predictions (see util.get_predictions()) in addition
+# to the header and IDs in the result table of the csv-file
+def StoreInCSVResult(tables,CsvFilename,header,predictions,ids,summary):
+    table = GetResultTable(tables,CsvFilename)
+    for i in range(len(predictions['index'])):
+        ID  = ids.instance(predictions['index'][i]).toString()
+        actual    = predictions['actual'][i]
+        predicted = predictions['predicted'][i]
         # fill the actual-label column
-        print "l = ", l
-        print "ID = ", ID
-        Value = l.split()[1].split(':')[1]
-        hdr = header + "-actual"
-        WriteCsvFile(CsvFilename,ID,hdr,Value)
+        table.set(ID,header + "-actual",actual)
         # fill the prediction-label column
-        Value = l.split()[2].split(':')[1]
-        hdr = header + "-prediction"
-        WriteCsvFile(CsvFilename,ID,hdr,Value)
+        table.set(ID,header + "-prediction",predicted)
         # fill incorrect-label flag column
-        if len(elements)==5:    # it has extra element ('+') denoting incorrect prediction  
+        if predicted == '?' or predicted != actual:
             Value = 'Y'
-        elif len(elements)==4:  # correct prediction
+        else:
             Value = 'N'
-        else:  # what?!
-            print "there is something wrong with the result buffer !!!"
-            return 1
-        hdr = header + "-incorrect"
-        WriteCsvFile(CsvFilename,ID,hdr,Value)
-        cnt = cnt + 1
+        table.set(ID,header + "-incorrect",Value)
     if not(summary==''):   # it means that training results are provided; thus summary should be written in the csv
-        hdr = header + "-prediction"
-        for k in summary.keys():
-            WriteCsvFile(CsvFilename,k,hdr,str(summary[k]))
-
-# ============================================================================
-# preprocessing
-# ============================================================================
+        StoreInCSVSummary(tables,CsvFilename,header,summary)
 
 # ----------------------------------------------------------------------------
-def PreprocessData(Data,option):
-    IDs = []
-    if (option['idFlag']):    # means that the last attribute is id
-        attributeremove = AttributeRemove()
-        attributeremove.setInvertSelection(Boolean(True))  # remove every attribute but the last one which is ID
-        attributeremove.setAttributeIndices(String(str(Data.numAttributes())))
-        attributeremove.setInputFormat(Data)
-        IDs = Filter.useFilter(Data, attributeremove)
-        attributeremove = AttributeRemove()
-        attributeremove.setInvertSelection(Boolean(False))  # remove IDs from dataset
-        attributeremove.setAttributeIndices(String(str(Data.numAttributes())))
-        attributeremove.setInputFormat(Data)
-        Data = Filter.useFilter(Data, attributeremove)
-    # set the class Index - the index of the dependent variable
-    Data.setClassIndex(Data.numAttributes() - 1)
-    # remove of the classes
-    if (option['rmClassFlag']):    # means that instances with specified class label must be removed
-        ClassLabel = option['rmClass']
-        removewithvalues = RemoveWithValues()
-        removewithvalues.setAttributeIndex(String('last'))
-        removewithvalues.setNominalIndices(String(str(ClassLabel)))
-        removewithvalues.setInputFormat(Data)
-        newData = Filter.useFilter(Data, removewithvalues)
+# this function stores the matrix of class probabilities, with one column per
+# class, in the result table of the csv-file or writes the NumPy file
+# (see results.write_probabilities())
+def StoreInCSVProb(tables,CsvFilename,header,ids,data,probs):
+    IDs = [ids.instance(cnt).toString() for cnt in range(0,ids.numInstances())]
+    classAttr = data.classAttribute()
+    classes = [classAttr.value(k) for k in range(0,classAttr.numValues())]
+    if CsvFilename.endswith('.npy'):
+        results.write_probabilities(CsvFilename,header,IDs,classes,probs)
     else:
-        newData = Data
-    if (option['weightFlag']):    # it means that instances should be weighted according to number of samples
-        # if there is only two classes, do it as before
-        if (Data.numClasses()==2):
-            # weight instances with reciprocal weight with number of samples
-            numInstancesC1 = 0
-            numInstancesC2 = 0
-            # get numerical value of the class attribute for the first class because we don't know it
-            classLabel = newData.instance(1).classAttribute()
-            c1 = newData.instance(1).value(classLabel)
-            # find number of instances per class
-            for   cnt  in   range(0,newData.numInstances()):
-                if (newData.instance(cnt).value(classLabel) == c1):
-                    numInstancesC1 = numInstancesC1 + 1
-                else:
-                    numInstancesC2 = numInstancesC2 + 1
-            # calculate weights
-            weightC1 = numInstancesC2 /(numInstancesC2 + numInstancesC1 + 0.0)
-            weightC2 = numInstancesC1 /(numInstancesC2 + numInstancesC1 + 0.0)
-            # assign weight to instances of classes
-            for cnt in range(0,newData.numInstances()):
-                if (newData.instance(cnt).value(classLabel) == c1):
-                    newData.instance(cnt).setWeight(weightC1)
-                else:
-                    newData.instance(cnt).setWeight(weightC2)
-        # if number of class are more than two then .... 
-        elif (Data.numClasses()>2):
-            numClasses = Data.numClasses()
-            stats = Data.attributeStats(Data.classIndex())
-            AttributeStats = stats.nominalCounts
-            classLabels = Data.instance(1).classAttribute()
-            # assign weight to instances of classes
-            cnt = 0
-            sumWeigths = 0.0
-            numInstancesPerClass = {}
-            weightPerClass = {}
-            mapClassLabels = {}
-            for e in classLabels.enumerateValues():
-                numInst = AttributeStats[cnt] + 0.0
-                w = 1.0 / numInst
-                mapClassLabels.update({e:cnt})
-                weightPerClass.update({cnt:w})
-                numInstancesPerClass.update({cnt:numInst})
-                sumWeigths = sumWeigths + w
-                cnt = cnt + 1 
-
-            # normalize weights
-            for k in weightPerClass.keys():
-                weightPerClass[k] = weightPerClass[k]/sumWeigths
-
-            for cnt in range(0,newData.numInstances()):
-                w = weightPerClass[ newData.instance(cnt).value(classLabels) ]
-                newData.instance(cnt).setWeight(w)
-    return newData, IDs
+        results.add_probabilities(GetResultTable(tables,CsvFilename),header,IDs,classes,probs)
 
 # ============================================================================
-# implementation of classifiers
+# evaluation
 # ============================================================================
 
 # ----------------------------------------------------------------------------
-# logistic classifier
-def logistic(trainData,testData,params,exparams):
-    ridge = float(params[0])
-    maxIt = int(float(params[1]))
-    print "Ridge=%s, maxIt=%s" %(str(ridge),str(maxIt))
-    logistic = Logistic()
-    logistic.setMaxIts(maxIt)
-    logistic.setRidge(ridge)
-    logistic.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    # evaluate it on the training
-    evaluation = Evaluation(trainData)
-    (trainOutput, trainBuffer) = util.get_buffer_for_predictions(trainData)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    evaluation.evaluateModel(logistic, trainData, [trainOutput, attRange, outputDistribution])
-    print "--> Evaluation:\n"
-    print evaluation.toSummaryString()
-    trainSummary = makeTrainEvalSummary(evaluation)
-    # evaluate it on testing
-    evaluation = Evaluation(testData)
-    (testOutput, testBuffer) = util.get_buffer_for_predictions(testData)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    evaluation.evaluateModel(logistic, testData, [testOutput, attRange, outputDistribution])
-    return trainBuffer, testBuffer, trainSummary
-
-# ----------------------------------------------------------------------------
-# bagging on logistic classifier
-def bagging_logistic(trainData,testData,params,exparams):
-    IsOptBagOnOptLog = str2bool(params[0])
-    logistic = Logistic()
-    bagging = Bagging()
-    if IsOptBagOnOptLog:    # optimal bagging is based on optimal logistic
-        ridge = float(exparams[0])
-        maxIt = int(float(exparams[1]))
-        logistic.setMaxIts(maxIt)
-        bagSizePercent = int(float(params[1]))
-        bagging.setBagSizePercent(bagSizePercent)
-    else:   # ridge parameter is also optimized in the process
-        ridge = float(params[1])
-    numIterations = int(float(params[2]))
-    bagging.setNumIterations(numIterations)
-    logistic.setRidge(ridge)
-    bagging.setClassifier(logistic)
-    bagging.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    # evaluate it on the training
-    evaluation = Evaluation(trainData)
-    (trainOutput, trainBuffer) = util.get_buffer_for_predictions(trainData)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    evaluation.evaluateModel(bagging, trainData, [trainOutput, attRange, outputDistribution])
-    print "--> Evaluation:\n"
-    print evaluation.toSummaryString()
-    trainSummary = makeTrainEvalSummary(evaluation)
-    # evaluate it on testing
-    evaluation = Evaluation(testData)
-    (testOutput, testBuffer) = util.get_buffer_for_predictions(testData)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    evaluation.evaluateModel(bagging, testData, [testOutput, attRange, outputDistribution])
-    return trainBuffer, testBuffer, trainSummary
-
-# ----------------------------------------------------------------------------
-# SMO classifier
-def smo(trainData,testData,params,exparams):
-    kerType = str2bool(params[0]) 
-    cValue = float(params[1])
-    kerParam = float(params[2])
-    if kerType:     # RBF kernel
-        kernel = RBFKernel()
-        kernel.setGamma(kerParam)
-    else:       # Polynomial kernel
-        kernel = PolyKernel()
-        kernel.setExponent(kerParam)
-    smo = SMO()
-    smo.setKernel(kernel)
-    smo.setC(cValue)
-    smo.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    # evaluate it on the training
-    evaluation = Evaluation(trainData)
-    (trainOutput, trainBuffer) = util.get_buffer_for_predictions(trainData)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    evaluation.evaluateModel(smo, trainData, [trainOutput, attRange, outputDistribution])
-    print "--> Evaluation:\n"
-    print evaluation.toSummaryString()
-    trainSummary = makeTrainEvalSummary(evaluation)
-    # evaluate it on testing
-    evaluation = Evaluation(testData)
-    (testOutput, testBuffer) = util.get_buffer_for_predictions(testData)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    evaluation.evaluateModel(smo, testData, [testOutput, attRange, outputDistribution])
-    return trainBuffer, testBuffer, trainSummary
-
-# ----------------------------------------------------------------------------
-# random-forest classifier
-def random_forest(trainData,testData,params,exparams):
-    numTrees = int(float(params[0]))
-    numFeatures = int(float(params[1]))
-    randomforest = RandomForest()
-    randomforest.setNumTrees(numTrees)
-    randomforest.setNumFeatures(numFeatures)
-    randomforest.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    # evaluate it on the training
-    evaluation = Evaluation(trainData)
-    (trainOutput, trainBuffer) = util.get_buffer_for_predictions(trainData)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    evaluation.evaluateModel(randomforest, trainData, [trainOutput, attRange, outputDistribution])
-    print "--> Evaluation:\n"
-    print evaluation.toSummaryString()
-    trainSummary = makeTrainEvalSummary(evaluation)
-    # evaluate it on testing
-    evaluation = Evaluation(testData)
-    (testOutput, testBuffer) = util.get_buffer_for_predictions(testData)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    evaluation.evaluateModel(randomforest, testData, [testOutput, attRange, outputDistribution])
-    return trainBuffer, testBuffer, trainSummary
-
-# ----------------------------------------------------------------------------
-# bayesian classifier
-def bayesian(trainData,testData,params,exparams):
-    IsOptMultinomialBayes   = str2bool(params[0]) 
-    IsOptNaiveKernelDensity = str2bool(params[1]) 
-    if IsOptMultinomialBayes:    # optimal bayesian classifier is multinomial
-        bayes = NaiveBayesMultinomial()
-    else:
-        bayes = NaiveBayes()
-        if IsOptNaiveKernelDensity:   # use kernel density estimation
-            bayes.setUseKernelEstimator(Boolean(True))   
-    bayes.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    # evaluate it on the training
-    evaluation = Evaluation(trainData)
-    (trainOutput, trainBuffer) = util.get_buffer_for_predictions(trainData)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    evaluation.evaluateModel(bayes, trainData, [trainOutput, attRange, outputDistribution])
-    print "--> Evaluation:\n"
-    print evaluation.toSummaryString()
-    trainSummary = makeTrainEvalSummary(evaluation)
-    # evaluate it on testing
-    evaluation = Evaluation(testData)
-    (testOutput, testBuffer) = util.get_buffer_for_predictions(testData)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    evaluation.evaluateModel(bayes, testData, [testOutput, attRange, outputDistribution])   
-    return trainBuffer, testBuffer, trainSummary
-
-# ----------------------------------------------------------------------------
-# bagging over SMO
-def baggin_smo(trainData,testData,params,exparams):
-    IsOptBagOnOptSMO =  str2bool(params[0]) 
-    if IsOptBagOnOptSMO:    # optimal bagging is based on optimal SMO thus I should use extra params
-        kerType =  str2bool(params[0]) 
-        cValue = float(exparams[1])
-        kerParam = float(exparams[2])
-        if kerType:     # RBF kernel
-            kernel = RBFKernel()
-            kernel.setGamma(kerParam)
-        else:       # Polynomial kernel
-            kernel = PolyKernel()
-            kernel.setExponent(kerParam)
-        bagSizePercent = int(float(params[1]))
-        numIterations = int(float(params[2]))
-        smo = SMO()
-        bagging = Bagging()
-        smo.setKernel(kernel)
-        smo.setC(cValue)
-        bagging.setBagSizePercent(bagSizePercent)
-        bagging.setNumIterations(numIterations)
-        bagging.setClassifier(smo)
-    else:   # optimal bagging is based on linear SMO
-        cValue = float(params[1])
-        numIterations = int(float(params[2]))
-        smo = SMO()
-        bagging = Bagging()
-        kernel = PolyKernel()
-        smo.setKernel(kernel)
-        smo.setC(cValue)
-        bagging.setNumIterations(numIterations)
-        bagging.setClassifier(smo)
-    bagging.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    # evaluate it on the training
-    evaluation = Evaluation(trainData)
-    (trainOutput, trainBuffer) = util.get_buffer_for_predictions(trainData)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    evaluation.evaluateModel(bagging, trainData, [trainOutput, attRange, outputDistribution])
-    print "--> Evaluation:\n"
-    print evaluation.toSummaryString()
-    trainSummary = makeTrainEvalSummary(evaluation)
-    # evaluate it on testing
-    evaluation = Evaluation(testData)
-    (testOutput, testBuffer) = util.get_buffer_for_predictions(testData)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    evaluation.evaluateModel(bagging, testData, [testOutput, attRange, outputDistribution])
-    return trainBuffer, testBuffer, trainSummary
-
-# ----------------------------------------------------------------------------
-# simple-logistic classifier
-def simple_logistic(trainData,testData,params,exparams):
-    heuristicStop = int(float(params[0]))
-    numBoostingIterations = int(float(params[1]))
-    simplelogistic = SimpleLogistic()
-    simplelogistic.setHeuristicStop(heuristicStop)
-    simplelogistic.setNumBoostingIterations(numBoostingIterations)
-    if (trainData.numInstances()<5):   # special case for small sample size
-        simplelogistic.setUseCrossValidation(False) 
-    simplelogistic.buildClassifier(trainData)  # only a trained classifier can be evaluated
+# evaluate trained classifier on training and testing data, the testing data
+# is not evaluated if it is None, i.e., if it is classified by classifyStream()
+#
+# The trainEval mode selects the results of the training data (see --trainEval),
+# where the predictions and the summary are None if they are not requested.
+# The predictions of the training data are not recorded in "summary" mode
+# if the Evaluation of the Weka version can discard them.
+def evaluate(classifier,trainData,testData,trainEval='full'):
+    trainPredictions = None
+    trainSummary     = None
     # evaluate it on the training
-    evaluation = Evaluation(trainData)
-    (trainOutput, trainBuffer) = util.get_buffer_for_predictions(trainData)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    evaluation.evaluateModel(simplelogistic, trainData, [trainOutput, attRange, outputDistribution])
-    print "--> Evaluation:\n"
-    print evaluation.toSummaryString()
-    trainSummary = makeTrainEvalSummary(evaluation)
+    if trainEval != 'none':
+        evaluation = Evaluation(trainData)
+        if trainEval == 'summary' and hasattr(evaluation, 'setDiscardPredictions'):
+            evaluation.setDiscardPredictions(True)
+        evaluation.evaluateModel(classifier, trainData, [])
+        if trainEval == 'full':
+            trainPredictions = util.get_predictions(evaluation, trainData)
+        print "--> Evaluation:\n"
+        print evaluation.toSummaryString()
+        trainSummary = makeTrainEvalSummary(evaluation)
     # evaluate it on testing
+    if testData is None: return trainPredictions, None, trainSummary
     evaluation = Evaluation(testData)
-    (testOutput, testBuffer) = util.get_buffer_for_predictions(testData)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    evaluation.evaluateModel(simplelogistic, testData, [testOutput, attRange, outputDistribution])
-    return trainBuffer, testBuffer, trainSummary
+    evaluation.evaluateModel(classifier, testData, [])
+    testPredictions = util.get_predictions(evaluation, testData)
+    return trainPredictions, testPredictions, trainSummary
 
 # ----------------------------------------------------------------------------
-# AdaboostM1 on simple-logistic classifier
-def adaboostM1_simple_logistic(trainData,testData,params,exparams):
-    IsOptBoostOnOptSimpLog = str2bool(params[0])  
-    simplelogistic = SimpleLogistic()
-    adaboostm = AdaBoostM1()
-    if IsOptBoostOnOptSimpLog:  # optimal adaboost is based on optimal simple logisatic 
-        heuristicStop = int(float(exparams[0]))
-        numBoostingIterations = int(float(exparams[1]))
-        weightThreshold = int(float(params[1]))
-        numIterations = int(float(params[2]))
-        simplelogistic.setHeuristicStop(heuristicStop)
-        simplelogistic.setNumBoostingIterations(numBoostingIterations)
-        adaboostm.setWeightThreshold(weightThreshold)
-        adaboostm.setNumIterations(numIterations)       
-    else:
-        numBoostingIterations = int(float(params[1]))
-        numIterations = int(float(params[2]))
-        simplelogistic.setNumBoostingIterations(numBoostingIterations)
-        adaboostm.setNumIterations(numIterations)       
-    adaboostm.setClassifier(simplelogistic)
-    adaboostm.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    # evaluate it on the training
-    evaluation = Evaluation(trainData)
-    (trainOutput, trainBuffer) = util.get_buffer_for_predictions(trainData)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    evaluation.evaluateModel(adaboostm, trainData, [trainOutput, attRange, outputDistribution])
-    print "--> Evaluation:\n"
-    print evaluation.toSummaryString()
-    trainSummary = makeTrainEvalSummary(evaluation)
-    # evaluate it on testing
-    evaluation = Evaluation(testData)
-    (testOutput, testBuffer) = util.get_buffer_for_predictions(testData)
-    attRange = Range()  # no additional attributes output
-    outputDistribution = Boolean(False)  # we don't want distribution
-    evaluation.evaluateModel(adaboostm, testData, [testOutput, attRange, outputDistribution])
-    return trainBuffer, testBuffer, trainSummary
-
-# ============================================================================
-# constants
-# ============================================================================
-
-# Attention: Must be following the definition of the classifier functions!
-
-CLASSIFIER = {
-    'BaggingLogistic':       bagging_logistic,
-    'Logistic':              logistic,
-    'SimpleLogistic':        simple_logistic,
-    'SMO':                   smo,
-    'RandomForest':          random_forest,
-    'Bayesian':              bayesian,
-    'BaggingSMO':            baggin_smo,
-    'BoostedSimpleLogistic': adaboostM1_simple_logistic
-}
+# classify testing data read incrementally in batches of fixed size, where
+# trained is the list of (classifier, hdrTest) tuples of the trained
+# classifiers, and write the results of all classifiers as computed by
+# StoreInCSVResult() and StoreInCSVProb() row by row to the csv-files
+def classifyStream(task,options,trained):
+    stream = preprocess.DataStream(task['testArff'], options)
+    classAttr = stream.structure.classAttribute()
+    classes = [classAttr.value(k) for k in range(0,classAttr.numValues())]
+    # columns of each csv-file in the order of the values of a row
+    filenames = []
+    columns = {}
+    def addColumns(CsvFilename,names):
+        if not columns.has_key(CsvFilename):
+            filenames.append(CsvFilename)
+            columns[CsvFilename] = []
+        columns[CsvFilename].extend(names)
+    for classifier, header in trained:
+        addColumns(task['testCSV'], [header + "-actual", header + "-prediction", header + "-incorrect"])
+        if task['testProbCSV']:
+            addColumns(task['testProbCSV'], ['%s-%s' % (header, label) for label in classes])
+    tables = {}
+    for filename in filenames:
+        tables[filename] = results.StreamingTable(filename, columns[filename])
+    try:
+        numInstances = 0
+        batch = Instances(stream.structure, task['batchSize'])
+        IDs = []
+        while True:
+            item = stream.next()
+            if item is not None:
+                batch.add(item[0])
+                IDs.append(item[1])
+            if batch.numInstances() == task['batchSize'] or (item is None and batch.numInstances() > 0):
+                rows = {}
+                for filename in filenames:
+                    rows[filename] = [[] for i in range(0,len(IDs))]
+                for classifier, header in trained:
+                    probs = util.get_distributions(classifier, batch)
+                    for i in range(0,len(IDs)):
+                        instance = batch.instance(i)
+                        if instance.classIsMissing(): actual = '?'
+                        else:                         actual = classAttr.value(int(instance.classValue()))
+                        predicted = util.get_predicted_class(probs[i])
+                        if predicted < 0: predicted = '?'
+                        else:             predicted = classes[predicted]
+                        if predicted == '?' or predicted != actual:
+                            Value = 'Y'
+                        else:
+                            Value = 'N'
+                        rows[task['testCSV']][i].extend([actual, predicted, Value])
+                        if task['testProbCSV']:
+                            rows[task['testProbCSV']][i].extend([repr(p) for p in probs[i]])
+                for filename in filenames:
+                    for i in range(0,len(IDs)):
+                        tables[filename].append(IDs[i], rows[filename][i])
+                numInstances = numInstances + len(IDs)
+                batch = Instances(stream.structure, task['batchSize'])
+                IDs = []
+            if item is None: break
+    except:
+        for filename in filenames:
+            tables[filename].abort()
+        raise
+    print "Classified %d testing instances" % numInstances
+    for filename in filenames:
+        tables[filename].close()
 
 # ============================================================================
 # main
 # ============================================================================
 
 # ----------------------------------------------------------------------------
-def main():
-    try:
-        opts, args = getopt.getopt(sys.argv[1:], "hr:s:b:p:l:i:j:a:g:x:w",\
-            ["help", "trainArff=", "testArff=","bestClassifier=","bestParam=","removeLabel="\
-            ,"trainCSV=","testCSV=","hdrTrain=","hdrTest=","extraParam=","weightFlag"])
-    except getopt.GetoptError, err:
-        sys.stderr.write("%s\n" % err)
-        return 1
-    extraParam = ""
-    weightFlag = False
-    rmClassFlag = False
-    removeLabel = 0
+# parse command-line arguments of a classification task
+def parseargs(argv):
+    opts, args = getopt.getopt(argv, "hm:r:s:b:p:l:i:j:a:g:x:w",\
+        ["help", "manifest=", "trainArff=", "testArff=","bestClassifier=","bestParam=","removeLabel="\
+        ,"trainCSV=","testCSV=","hdrTrain=","hdrTest=","extraParam=","weightFlag","modelCache=","dataCache=","numSlots=",\
+         "trainProbCSV=","testProbCSV=","bestParamsCSV=","streamTest","batchSize=","trainEval="])
+    task = {
+        'help':        False,
+        'manifest':    None,
+        'bestParam':   None,
+        'bestParamsCSV': None,
+        'extraParam':  "",
+        'weightFlag':  False,
+        'rmClassFlag': False,
+        'removeLabel': 0,
+        'modelCache':  None,
+        'dataCache':   None,
+        'numSlots':    None,
+        'trainProbCSV': None,
+        'testProbCSV':  None,
+        'streamTest':  False,
+        'batchSize':   STREAM_BATCH_SIZE,
+        'trainEval':   None,
+        'numOpts':     len(opts)
+    }
     for o, a in opts:
         if o in ("-h", "--help"):
-            usage()
-            return 0
+            task['help'] = True
+        elif o in ("-m", "--manifest"):
+            task['manifest'] = a
+            task['numOpts'] = task['numOpts'] - 1
         elif o in ("-r", "--trainArff"):
-            trainArff = a
+            task['trainArff'] = a
         elif o in ("-s", "--testArff"):
-            testArff = a 
+            task['testArff'] = a
         elif o in ("-b","--bestClassifier"):
-            bestClassifier = a
+            task['bestClassifier'] = a
         elif o in ("-p","--bestParam"):
-            bestParam = a
+            task['bestParam'] = a
+        elif o == "--bestParamsCSV":
+            task['bestParamsCSV'] = a
         elif o in ("-l","--removeLabel"):
-            rmClassFlag = True
-            removeLabel = int(float(a))
+            task['rmClassFlag'] = True
+            task['removeLabel'] = int(float(a))
         elif o in ("-i","--trainCSV"):
-            trainCSV = a
+            task['trainCSV'] = a
         elif o in ("-j","--testCSV"):
-            testCSV = a
+            task['testCSV'] = a
         elif o in ("-a","--hdrTrain"):
-            hdrTrain = a
+            task['hdrTrain'] = a
         elif o in ("-g","--hdrTest"):
-            hdrTest = a
+            task['hdrTest'] = a
         elif o in ("-x","--extraParam"):
-            extraParam = a
+            task['extraParam'] = a
         elif o in ("-w","--weightFlag"):
-            weightFlag = True
+            task['weightFlag'] = True
+        elif o == "--modelCache":
+            task['modelCache'] = a
+            task['numOpts'] = task['numOpts'] - 1
+        elif o == "--dataCache":
+            task['dataCache'] = a
+            task['numOpts'] = task['numOpts'] - 1
+        elif o == "--numSlots":
+            task['numSlots'] = int(a)
+            task['numOpts'] = task['numOpts'] - 1
+        elif o == "--trainProbCSV":
+            task['trainProbCSV'] = a
+            task['numOpts'] = task['numOpts'] - 1
+        elif o == "--testProbCSV":
+            task['testProbCSV'] = a
+            task['numOpts'] = task['numOpts'] - 1
+        elif o == "--streamTest":
+            task['streamTest'] = True
+            task['numOpts'] = task['numOpts'] - 1
+        elif o == "--batchSize":
+            task['batchSize'] = int(a)
+            task['numOpts'] = task['numOpts'] - 1
+        elif o == "--trainEval":
+            if not a in TRAIN_EVAL_MODES:
+                raise getopt.GetoptError("invalid value for option --trainEval: %s" % a)
+            task['trainEval'] = a
+            task['numOpts'] = task['numOpts'] - 1
         else:
             assert False, "unhandled option"
-    if len(opts) < 9:
-        usage()
+    return task
+
+# ----------------------------------------------------------------------------
+# read tasks from manifest file, one shell-quoted list of arguments per line
+def readmanifest(manifest):
+    tasks = []
+    f = open(manifest, 'r')
+    try:
+        for line in f.readlines():
+            line = line.strip()
+            if not line or line.startswith('#'): continue
+            task = parseargs(shlex.split(line))
+            if task['numOpts'] < 9 or task['manifest'] or task['help']:
+                raise getopt.GetoptError("invalid task in manifest %s: %s" % (manifest, line))
+            tasks.append(task)
+    finally:
+        f.close()
+    return tasks
+
+# ----------------------------------------------------------------------------
+# get model store or data cache of a directory, each is created only once
+def getStore(stores, factory, directory):
+    if not directory: return None
+    key = (factory, directory)
+    if not stores.has_key(key):
+        stores[key] = factory(directory)
+    return stores[key]
+
+# ----------------------------------------------------------------------------
+# read and preprocess ARFF file or load the preprocessed data from the data
+# cache, each file is preprocessed only once per options and process
+def loadData(arffFile, options, cache, dataCache):
+    keys = options.keys()
+    keys.sort()
+    key = (arffFile,) + tuple([(k, options[k]) for k in keys])
+    if not cache.has_key(key):
+        cache[key] = preprocess.load(dataCache, arffFile, options)
+    (data, ids) = cache[key]
+    return Instances(data), ids
+
+# ----------------------------------------------------------------------------
+# train classifiers, classify training and testing data, and store results
+def classify(task, cache, stores):
+    names = [name.strip() for name in task['bestClassifier'].split(',') if name.strip()]
+    # get best parameters of classifiers
+    if task['bestParamsCSV']:
+        params = ReadBestParams(task['bestParamsCSV'], names)
+    elif len(names) == 1 and task['bestParam'] is not None:
+        params = {names[0]: (task['bestParam'], task['extraParam'])}
+    else:
+        raise getopt.GetoptError("option --bestParamsCSV required unless --bestParam of a single classifier is given")
+    if len(names) > 1:
+        for probCSV in (task['trainProbCSV'], task['testProbCSV']):
+            if probCSV and probCSV.endswith('.npy'):
+                raise getopt.GetoptError("class probabilities of more than one classifier cannot be written to %s" % probCSV)
+    trainEval = task['trainEval'] or 'full'
+    if task['trainProbCSV'] and trainEval != 'full':
+        raise getopt.GetoptError("option --trainProbCSV requires --trainEval full")
+    if task['streamTest']:
+        if task['testProbCSV'] and task['testProbCSV'].endswith('.npy'):
+            raise getopt.GetoptError("class probabilities cannot be written to %s with option --streamTest" % task['testProbCSV'])
+        if task['batchSize'] < 1:
+            raise getopt.GetoptError("invalid batch size: %d" % task['batchSize'])
+    # read and preprocess train/test data
+    options = {'idFlag':True, 'weightFlag': task['weightFlag'], 'rmClassFlag': task['rmClassFlag'], 'rmClass': task['removeLabel']}
+    dataCache = getStore(stores, preprocess.DataCache, task['dataCache'])
+    newTrainData, trainIDs = loadData(task['trainArff'], options, cache, dataCache)
+    if task['streamTest']:
+        newTestData, testIDs = None, None
+    else:
+        newTestData, testIDs = loadData(task['testArff'], options, cache, dataCache)
+    probability = (task['trainProbCSV'] or task['testProbCSV']) and True or False
+    store = getStore(stores, models.ModelStore, task['modelCache'])
+    # train and evaluate each classifier on the same data
+    tables  = {}
+    failed  = []
+    trained = []
+    for name in names:
+        hdrTrain = task['hdrTrain']
+        hdrTest  = task['hdrTest']
+        if len(names) > 1:
+            hdrTrain = hdrTrain + '-' + name.replace(' ','')
+            hdrTest  = hdrTest  + '-' + name.replace(' ','')
+        try:
+            # train classifier or load previously trained classifier
+            classifier = classifiers.CLASSIFIER[name](newTrainData, splitparams(params[name][0]),
+                                                      splitparams(params[name][1]), probability)
+            if task['numSlots']: util.set_num_execution_slots(classifier, task['numSlots'])
+            classifier = models.build(store, classifier, newTrainData, task['trainArff'], options)
+            # run classifier
+            trainResult, testResult, trainSummary = evaluate(classifier, newTrainData, newTestData, trainEval)
+        except:
+            if len(names) == 1: raise
+            sys.stderr.write("Classifier %s failed: %s\n" % (name, sys.exc_info()[1]))
+            failed.append(name)
+            continue
+        # store results in spreadsheet
+        if trainResult is not None:
+            StoreInCSVResult(tables, task['trainCSV'], hdrTrain, trainResult, trainIDs, trainSummary)
+        elif trainSummary is not None:
+            StoreInCSVSummary(tables, task['trainCSV'], hdrTrain, trainSummary)
+        if testResult is not None:
+            StoreInCSVResult(tables, task['testCSV'],  hdrTest,  testResult,  testIDs,  '')
+        if task['streamTest']: trained.append((classifier, hdrTest))
+        # store class probabilities recorded by the evaluation
+        if task['trainProbCSV']:
+            StoreInCSVProb(tables, task['trainProbCSV'], hdrTrain, trainIDs, newTrainData, trainResult['distribution'])
+        if task['testProbCSV'] and testResult is not None:
+            StoreInCSVProb(tables, task['testProbCSV'],  hdrTest,  testIDs,  newTestData,  testResult['distribution'])
+    # write combined result tables
+    filenames = tables.keys()
+    filenames.sort()
+    for filename in filenames:
+        tables[filename].write(filename)
+    # classify streamed testing data by all trained classifiers at once
+    if task['streamTest'] and trained:
+        classifyStream(task, options, trained)
+    if failed:
+        raise Exception("%d of %d classifiers failed: %s" % (len(failed), len(names), ', '.join(failed)))
+
+# ----------------------------------------------------------------------------
+def main():
+    try:
+        task = parseargs(sys.argv[1:])
+        if task['help']:
+            usage()
+            return 0
+        if task['manifest']:
+            tasks = readmanifest(task['manifest'])
+        elif task['numOpts'] < 9:
+            usage()
+            return 1
+        else:
+            tasks = [task]
+    except getopt.GetoptError, err:
+        sys.stderr.write("%s\n" % err)
+        return 1
+    cache  = {}
+    stores = {}
+    if not task['manifest']:
+        classify(task, cache, stores)
+        return 0
+    # run all tasks of manifest, continue with next task if one fails
+    numFailed = 0
+    for i in range(len(tasks)):
+        start = time.time()
+        try:
+            if not tasks[i]['modelCache']: tasks[i]['modelCache'] = task['modelCache']
+            if not tasks[i]['dataCache']:  tasks[i]['dataCache']  = task['dataCache']
+            if not tasks[i]['numSlots']:   tasks[i]['numSlots']   = task['numSlots']
+            if task['streamTest']:         tasks[i]['streamTest'] = True
+            if not tasks[i]['trainEval']:  tasks[i]['trainEval']  = task['trainEval']
+            if tasks[i]['batchSize'] == STREAM_BATCH_SIZE: tasks[i]['batchSize'] = task['batchSize']
+            classify(tasks[i], cache, stores)
+            print "Task %d of %d finished in %.3f s" % (i + 1, len(tasks), time.time() - start)
+        except:
+            print "Task %d of %d failed in %.3f s: %s" % (i + 1, len(tasks), time.time() - start, sys.exc_info()[1])
+            numFailed = numFailed + 1
+    if numFailed > 0:
         return 1
-    # reading training files
-    f = FileReader(trainArff)
-    traindata = Instances(f)
-    # reading testing files
-    f = FileReader(testArff)
-    testdata = Instances(f)
-    # remove and edit train/test data
-    options = {'idFlag':True, 'weightFlag': weightFlag, 'rmClassFlag': rmClassFlag, 'rmClass': removeLabel}
-    newTrainData, trainIDs = PreprocessData(traindata, options)
-    newTestData,  testIDs  = PreprocessData(testdata,  options)
-    # run classifier
-    handler = CLASSIFIER[bestClassifier]
-    trainResult, testResult, trainSummary = handler(newTrainData, newTestData, splitparams(bestParam), splitparams(extraParam))
-    # store results in spreadsheet
-    StoreInCSVResult(trainCSV, hdrTrain, trainResult, trainIDs, trainSummary)
-    StoreInCSVResult(testCSV,  hdrTest,  testResult,  testIDs,  '')
     return 0
 
 if __name__ == '__main__': sys.exit(main())
@@ -18,10 +18,8 @@ import sys
 import os as os
 import getopt
 import os.path
-import string as JyString
 
 # General Java imports
-import java.io.FileReader as FileReader
 import java.lang.StringBuffer as StringBuffer
 import java.lang.Boolean as Boolean
 import java.lang.String as String
@@ -31,34 +29,15 @@ import weka.filters.Filter as Filter
 import weka.core.Instances as Instances
 import weka.core.Utils as Utils
 import weka.core.AttributeStats as AttributeStats
-import weka.classifiers.Evaluation as Evaluation
-import weka.core.Range as Range
-import weka.filters.unsupervised.instance.RemoveWithValues as RemoveWithValues
-import weka.filters.unsupervised.attribute.Remove as AttributeRemove
 
-# SMO imports 
-import weka.classifiers.functions.SMO as SMO
-import weka.classifiers.functions.supportVector.PolyKernel as PolyKernel
-import weka.classifiers.functions.supportVector.RBFKernel as RBFKernel
+# result tables
+from gondola.paramsearch import util
+from gondola.paramsearch import results
 
-# Logistic imports
-import weka.classifiers.functions.Logistic as Logistic
-
-# Simple Logisitc imports
-import weka.classifiers.functions.SimpleLogistic as SimpleLogistic
-
-# Random Forests imports
-import weka.classifiers.trees.RandomForest as RandomForest
-
-# Bayesian imports
-import weka.classifiers.bayes.NaiveBayes as NaiveBayes
-import weka.classifiers.bayes.NaiveBayesMultinomial as NaiveBayesMultinomial 
-
-# Bagging imports
-import weka.classifiers.meta.Bagging as Bagging
-
-# AdaBoostM1 imports
-import weka.classifiers.meta.AdaBoostM1 as AdaBoostM1
+# classifiers
+from gondola.paramsearch import classifiers
+from gondola.paramsearch import models
+from gondola.paramsearch import preprocess
 
 
 # ============================================================================
@@ -79,7 +58,7 @@ Description:
   saves the results in two csv-files for test and train results.
 
   The available classifiers are:""" % {'EXENAME': EXENAME}
-    for cls in CLASSIFIER.keys():
+    for cls in classifiers.CLASSIFIER.keys():
         print "  - %s" % cls
     print """
 Options:
@@ -90,10 +69,23 @@ Options:
   [-l --removeLabel]      Specifies the labels which to be removed
   [-i --trainCSV]         Specifies the csv-file-name for the training 
   [-j --testCSV]          Specifies the csv-file-name for the testing 
+                          The class probabilities are written to these files with one column
+                          "<hdrTest>-<label>" per class. If a file name ends with ".npy", the
+                          probabilities are instead written as NumPy array with one row per
+                          instance in the order of the arff-file and one column per class.
   [-a --hdrTrain]         Specifies the header of training 
   [-g --hdrTest]          Specifies the header of testing 
   [-x --extraParam]       Specifies extra parameters
   [-w --weightFlag]       Specifies whether classifiers should use weights to balance inbalanced classes (default: False)
+  [--modelCache]          Specifies a directory in which trained classifiers are stored. A classifier is
+                          loaded from this directory instead of being trained again if the same classifier
+                          with the same parameters was trained before on the same data, i.e., the content
+                          of the training arff-file and the removeLabel and weightFlag options are equal.
+                          The directory can be shared with wekaClassifier.
+  [--dataCache]           Specifies a directory in which the preprocessed training and testing data is stored
+                          (see wekaClassifier).
+  [--numSlots]            Specifies the number of threads used to train the members of Bagging and Random
+                          Forest classifiers in parallel (default: 1).
 
 Examples:
   %(EXENAME)s --trainArff=$NMFTV_ResPATH/CV\(1_10\)-train-exp702-Features.arff --testArff=$NMFTV_ResPATH/CV\(1_10\)-test-exp702-Features.arff --bestClassifier="Bagging SMO" --bestParam="(1, 100.0, 10.0)" --removeLabel=1 --trainCSV=$HOME/train_alaki.csv --testCSV=$HOME/test_alaki.csv --hdrTrain="CV(1_10)-Class Label" --hdrTest="Class Label"  --extraParam="(0, 11.0, 2.0)"   --weightFlag
@@ -105,56 +97,6 @@ Examples:
 # auxiliary functions
 # ============================================================================
 
-# ----------------------------------------------------------------------------
-def getEvalwAUC(m):
-    return m.weightedAreaUnderROC()
-
-# ----------------------------------------------------------------------------
-def getEvalpctCrr(m):
-    return m.pctCorrect()
-
-# ----------------------------------------------------------------------------
-def getEvalpctInCrr(m):
-    return m.pctIncorrect() 
-
-# ----------------------------------------------------------------------------
-def getEvalwPct(m):
-    return m.weightedPrecision() 
-
-# ----------------------------------------------------------------------------
-def getEvalwTP(m):
-    return m.weightedTruePositiveRate() 
-
-# ----------------------------------------------------------------------------
-def getEvalwFP(m):
-    return m.weightedFalsePositiveRate() 
-
-# ----------------------------------------------------------------------------
-def getEvalCrr(m):
-    return m.correct()
-
-# ----------------------------------------------------------------------------
-def getEvalIncrr(m):
-    return m.incorrect() 
-
-# ----------------------------------------------------------------------------
-# make a summary (dictionary) of evaluation model
-def makeTrainEvalSummary(evalModel):
-    SUMMARY_IDS = {
-        '__wAuc__':     getEvalwAUC,
-        '__pctCrr__':   getEvalpctCrr,
-        '__pctInCrr__': getEvalpctInCrr,
-        '__wPct__':     getEvalwPct,
-        '__wTP__':      getEvalwTP,
-        '__wFP__':      getEvalwFP,
-        '__Crr__':      getEvalCrr,
-        '__Incrr__':    getEvalIncrr
-    }
-    summary = {}
-    for k in SUMMARY_IDS.keys():
-        summary[k] = SUMMARY_IDS[k](evalModel)
-    return summary
-
 # ----------------------------------------------------------------------------
 # split parameter string such as (10, 1) into the list [10, 1]
 def splitparams(params):
@@ -163,399 +105,13 @@ def splitparams(params):
     return [x.strip() for x in params.split(',')]
 
 # ----------------------------------------------------------------------------
-# convert string to boolean
-def str2bool(st):
-    map = {"false":False, "true":True}
-    b = map[String(JyString.lower(st)).trim()]
-    return b
-
-# ----------------------------------------------------------------------------
-# this function calls pyxel.py to write csv file
-def WriteCsvFile(CsvFilename,ID,Header,Value):
-    outPath = os.path.dirname(CsvFilename)
-    csvCommand = "pyxel.py "
-    cmdLine = csvCommand + " -d %s  %s  %s  %s -o %s" %\
-         ( '"' + CsvFilename + '"' ,\
-           '"' + ID + '"' ,\
-           '"' + Header + '"' , \
-           '"'  + Value + '"' ,
-           '"'  + outPath + '"')
-    print "Saving results for subject %s to file %s" % (ID, CsvFilename)
-    # TODO import pyxel module instead and its functions to perform this task
-    basis.execute(cmdLine)
-
-# ----------------------------------------------------------------------------
-# this function stores accepts result buffer in addition to hear 
-# and IDs and write it into the csv-file
-def StoreInCSVResult(CsvFilename,header,resBuffer,ids,summary):
-    resBuffer = str(resBuffer)
-    lines = resBuffer.split('\n')
-    cnt = 0
-    for cntLine in range(1,len(lines)):
-        l  = lines[cntLine-1]
-        elements = l.split()
-        ID  = ids.instance(cnt).toString()
-        # fill the actual-label column
-        print "l = ", l
-        print "ID = ", ID
-        Value = l.split()[1].split(':')[1]
-        hdr = header + "-actual"
-        WriteCsvFile(CsvFilename,ID,hdr,Value)
-        # fill the prediction-label column
-        Value = l.split()[2].split(':')[1]
-        hdr = header + "-prediction"
-        WriteCsvFile(CsvFilename,ID,hdr,Value)
-        # fill incorrect-label flag column
-        if len(elements)==5:    # it has extra element ('+') denoting incorrect prediction  
-            Value = 'Y'
-        elif len(elements)==4:  # correct prediction
-            Value = 'N'
-        else:  # what?!
-            print "there is something wrong with the result buffer !!!"
-            return 1
-        hdr = header + "-incorrect"
-        WriteCsvFile(CsvFilename,ID,hdr,Value)
-        cnt = cnt + 1
-    if not(summary==''):   # it means that training results are provided; thus summary should be written in the csv
-        hdr = header + "-prediction"
-        for k in summary.keys():
-            WriteCsvFile(CsvFilename,k,hdr,str(summary[k]))
-
-# ----------------------------------------------------------------------------
-# this function stores class probabilities and IDs a the csv-file
-def StoreInCSVProb(CsvFilename,header,ids,probs):
-    cnt = 0
-    for cnt in range(0,ids.numInstances()):
-        ID  = ids.instance(cnt).toString()
-        # fill the actual-label column
-        print "ID = ", ID
-        Value = str(list(probs[cnt]))
-        WriteCsvFile(CsvFilename,ID,header,Value)
-        cnt = cnt + 1
-
-# ============================================================================
-# preprocessing
-# ============================================================================
-
-# ----------------------------------------------------------------------------
-def PreprocessData(Data,option):
-    IDs = []
-    if (option['idFlag']):    # means that the last attribute is id
-        attributeremove = AttributeRemove()
-        attributeremove.setInvertSelection(Boolean(True))  # remove every attribute but the last one which is ID
-        attributeremove.setAttributeIndices(String(str(Data.numAttributes())))
-        attributeremove.setInputFormat(Data)
-        IDs = Filter.useFilter(Data, attributeremove)
-        attributeremove = AttributeRemove()
-        attributeremove.setInvertSelection(Boolean(False))  # remove IDs from dataset
-        attributeremove.setAttributeIndices(String(str(Data.numAttributes())))
-        attributeremove.setInputFormat(Data)
-        Data = Filter.useFilter(Data, attributeremove)
-    # set the class Index - the index of the dependent variable
-    Data.setClassIndex(Data.numAttributes() - 1)
-    # remove of the classes
-    if (option['rmClassFlag']):    # means that instances with specified class label must be removed
-        ClassLabel = option['rmClass']
-        removewithvalues = RemoveWithValues()
-        removewithvalues.setAttributeIndex(String('last'))
-        removewithvalues.setNominalIndices(String(str(ClassLabel)))
-        removewithvalues.setInputFormat(Data)
-        newData = Filter.useFilter(Data, removewithvalues)
-    else:
-        newData = Data
-    if (option['weightFlag']):    # it means that instances should be weighted according to number of samples
-        # if there is only two classes, do it as before
-        if (Data.numClasses()==2):
-            # weight instances with reciprocal weight with number of samples
-            numInstancesC1 = 0
-            numInstancesC2 = 0
-            # get numerical value of the class attribute for the first class because we don't know it
-            classLabel = newData.instance(1).classAttribute()
-            c1 = newData.instance(1).value(classLabel)
-            # find number of instances per class
-            for   cnt  in   range(0,newData.numInstances()):
-                if (newData.instance(cnt).value(classLabel) == c1):
-                    numInstancesC1 = numInstancesC1 + 1
-                else:
-                    numInstancesC2 = numInstancesC2 + 1
-            # calculate weights
-            weightC1 = numInstancesC2 /(numInstancesC2 + numInstancesC1 + 0.0)
-            weightC2 = numInstancesC1 /(numInstancesC2 + numInstancesC1 + 0.0)
-            # assign weight to instances of classes
-            for cnt in range(0,newData.numInstances()):
-                if (newData.instance(cnt).value(classLabel) == c1):
-                    newData.instance(cnt).setWeight(weightC1)
-                else:
-                    newData.instance(cnt).setWeight(weightC2)
-        # if number of class are more than two then .... 
-        elif (Data.numClasses()>2):
-            numClasses = Data.numClasses()
-            stats = Data.attributeStats(Data.classIndex())
-            AttributeStats = stats.nominalCounts
-            classLabels = Data.instance(1).classAttribute()
-            # assign weight to instances of classes
-            cnt = 0
-            sumWeigths = 0.0
-            numInstancesPerClass = {}
-            weightPerClass = {}
-            mapClassLabels = {}
-            for e in classLabels.enumerateValues():
-                numInst = AttributeStats[cnt] + 0.0
-                w = 1.0 / numInst
-                mapClassLabels.update({e:cnt})
-                weightPerClass.update({cnt:w})
-                numInstancesPerClass.update({cnt:numInst})
-                sumWeigths = sumWeigths + w
-                cnt = cnt + 1 
-
-            # normalize weights
-            for k in weightPerClass.keys():
-                weightPerClass[k] = weightPerClass[k]/sumWeigths
-
-            for cnt in range(0,newData.numInstances()):
-                w = weightPerClass[ newData.instance(cnt).value(classLabels) ]
-                newData.instance(cnt).setWeight(w)
-    return newData, IDs
-
-# ============================================================================
-# classifiers
-# ============================================================================
-
-# ----------------------------------------------------------------------------
-# logistic classifier
-def logistic(trainData,testData,params,exparams):
-    ridge = float(params[0])
-    maxIt = int(float(params[1]))
-    print "Ridge=%s, maxIt=%s" %(str(ridge),str(maxIt))
-    logistic = Logistic()
-    logistic.setMaxIts(maxIt)
-    logistic.setRidge(ridge)
-    logistic.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    classProb = [] 
-    for i in range(0,testData.numInstances()):
-        p = logistic.distributionForInstance(testData.instance(i))
-        classProb.append(p)
-    return classProb
-
-# ----------------------------------------------------------------------------
-# bagging on logistic classifier
-def bagging_logistic(trainData,testData,params,exparams):
-    IsOptBagOnOptLog = str2bool(params[0])
-    logistic = Logistic()
-    bagging = Bagging()
-    if IsOptBagOnOptLog:    # optimal bagging is based on optimal logistic
-        ridge = float(exparams[0])
-        maxIt = int(float(exparams[1]))
-        logistic.setMaxIts(maxIt)
-        bagSizePercent = int(float(params[1]))
-        bagging.setBagSizePercent(bagSizePercent)
-    else:   # ridge parameter is also optimized in the process
-        ridge = float(params[1])
-    numIterations = int(float(params[2]))
-    bagging.setNumIterations(numIterations)
-    logistic.setRidge(ridge)
-    bagging.setClassifier(logistic)
-    bagging.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    classProb = [] 
-    for i in range(0,testData.numInstances()):
-        p = bagging.distributionForInstance(testData.instance(i))
-        classProb.append(p)
-    return classProb
-
-# ----------------------------------------------------------------------------
-# SMO classifier
-def smo(trainData,testData,params,exparams):
-    kerType = str2bool(params[0]) 
-    cValue = float(params[1])
-    kerParam = float(params[2])
-    if kerType:     # RBF kernel
-        kernel = RBFKernel()
-        kernel.setGamma(kerParam)
-    else:       # Polynomial kernel
-        kernel = PolyKernel()
-        kernel.setExponent(kerParam)
-    smo = SMO()
-    smo.setKernel(kernel)
-    smo.setC(cValue)
-    smo.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    smo = SMO()
-    smo.setKernel(kernel)
-    smo.setC(cValue)
-    smo.setBuildLogisticModels(Boolean(True))   # build a logistic on the top of svm output
-    smo.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    classProb = [] 
-    for i in range(0,testData.numInstances()):
-        p = smo.distributionForInstance(testData.instance(i))
-        classProb.append(p)
-    return  classProb
-
-# ----------------------------------------------------------------------------
-# random-forest classifier
-def random_forest(trainData,testData,params,exparams):
-    numTrees = int(float(params[0]))
-    numFeatures = int(float(params[1]))
-    randomforest = RandomForest()
-    randomforest.setNumTrees(numTrees)
-    randomforest.setNumFeatures(numFeatures)
-    randomforest.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    classProb = [] 
-    for i in range(0,testData.numInstances()):
-        p = randomforest.distributionForInstance(testData.instance(i))
-        classProb.append(p)
-    return classProb
-
-# ----------------------------------------------------------------------------
-# bayesian classifier
-def bayesian(trainData,testData,params,exparams):
-    IsOptMultinomialBayes   = str2bool(params[0]) 
-    IsOptNaiveKernelDensity = str2bool(params[1]) 
-    if IsOptMultinomialBayes:    # optimal bayesian classifier is multinomial
-        bayes = NaiveBayesMultinomial()
-    else:
-        bayes = NaiveBayes()
-        if IsOptNaiveKernelDensity:   # use kernel density estimation
-            bayes.setUseKernelEstimator(Boolean(True))   
-    bayes.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    classProb = [] 
-    for i in range(0,testData.numInstances()):
-        p = bayes.distributionForInstance(testData.instance(i))
-        classProb.append(p)
-    return classProb
-
-# ----------------------------------------------------------------------------
-# bagging over SMO
-def baggin_smo(trainData,testData,params,exparams):
-    IsOptBagOnOptSMO =  str2bool(params[0]) 
-    if IsOptBagOnOptSMO:    # optimal bagging is based on optimal SMO thus I should use extra params
-        kerType =  str2bool(params[0]) 
-        cValue = float(exparams[1])
-        kerParam = float(exparams[2])
-        if kerType:     # RBF kernel
-            kernel = RBFKernel()
-            kernel.setGamma(kerParam)
-        else:       # Polynomial kernel
-            kernel = PolyKernel()
-            kernel.setExponent(kerParam)
-        bagSizePercent = int(float(params[1]))
-        numIterations = int(float(params[2]))
-        smo = SMO()
-        bagging = Bagging()
-        smo.setKernel(kernel)
-        smo.setC(cValue)
-        bagging.setBagSizePercent(bagSizePercent)
-        bagging.setNumIterations(numIterations)
-        bagging.setClassifier(smo)
-    else:   # optimal bagging is based on linear SMO
-        cValue = float(params[1])
-        numIterations = int(float(params[2]))
-        smo = SMO()
-        bagging = Bagging()
-        kernel = PolyKernel()
-        smo.setKernel(kernel)
-        smo.setC(cValue)
-        bagging.setNumIterations(numIterations)
-        bagging.setClassifier(smo)
-    bagging.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    # compute class probability
-    if IsOptBagOnOptSMO:    # optimal bagging is based on optimal SMO thus I should use extra params
-        kerType =  str2bool(params[0]) 
-        cValue = float(exparams[1])
-        kerParam = float(exparams[2])
-        if kerType:     # RBF kernel
-            kernel = RBFKernel()
-            kernel.setGamma(kerParam)
-        else:       # Polynomial kernel
-            kernel = PolyKernel()
-            kernel.setExponent(kerParam)
-        bagSizePercent = int(float(params[1]))
-        numIterations = int(float(params[2]))
-        smo = SMO()
-        bagging = Bagging()
-        smo.setKernel(kernel)
-        smo.setC(cValue)
-        smo.setBuildLogisticModels(Boolean(True))
-        bagging.setBagSizePercent(bagSizePercent)
-        bagging.setNumIterations(numIterations)
-        bagging.setClassifier(smo)
-    else:   # optimal bagging is based on linear SMO
-        cValue = float(params[1])
-        numIterations = int(float(params[2]))
-        smo = SMO()
-        bagging = Bagging()
-        kernel = PolyKernel()
-        smo.setKernel(kernel)
-        smo.setC(cValue)
-        smo.setBuildLogisticModels(Boolean(True))
-        bagging.setNumIterations(numIterations)
-        bagging.setClassifier(smo)
-    bagging.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    classProb = [] 
-    for i in range(0,testData.numInstances()):
-        p = bagging.distributionForInstance(testData.instance(i))
-        classProb.append(p)
-    return classProb
-
-# ----------------------------------------------------------------------------
-# simple-logistic classifier
-def simple_logistic(trainData,testData,params,exparams):
-    heuristicStop = int(float(params[0]))
-    numBoostingIterations = int(float(params[1]))
-    simplelogistic = SimpleLogistic()
-    simplelogistic.setHeuristicStop(heuristicStop)
-    simplelogistic.setNumBoostingIterations(numBoostingIterations)
-    if (trainData.numInstances()<5):   # special case for small sample size
-        simplelogistic.setUseCrossValidation(False) 
-    simplelogistic.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    classProb = [] 
-    for i in range(0,testData.numInstances()):
-        p = simplelogistic.distributionForInstance(testData.instance(i))
-        classProb.append(p)
-    return classProb
-
-# ----------------------------------------------------------------------------
-# AdaboostM1 on simple-logistic classifier
-def adaboostM1_simple_logistic(trainData,testData,params,exparams):
-    IsOptBoostOnOptSimpLog = str2bool(params[0])  
-    simplelogistic = SimpleLogistic()
-    adaboostm = AdaBoostM1()
-    if IsOptBoostOnOptSimpLog:  # optimal adaboost is based on optimal simple logisatic 
-        heuristicStop = int(float(exparams[0]))
-        numBoostingIterations = int(float(exparams[1]))
-        weightThreshold = int(float(params[1]))
-        numIterations = int(float(params[2]))
-        simplelogistic.setHeuristicStop(heuristicStop)
-        simplelogistic.setNumBoostingIterations(numBoostingIterations)
-        adaboostm.setWeightThreshold(weightThreshold)
-        adaboostm.setNumIterations(numIterations)       
-    else:
-        numBoostingIterations = int(float(params[1]))
-        numIterations = int(float(params[2]))
-        simplelogistic.setNumBoostingIterations(numBoostingIterations)
-        adaboostm.setNumIterations(numIterations)       
-    adaboostm.setClassifier(simplelogistic)
-    adaboostm.buildClassifier(trainData)  # only a trained classifier can be evaluated
-    classProb = [] 
-    for i in range(0,testData.numInstances()):
-        p = adaboostm.distributionForInstance(testData.instance(i))
-        classProb.append(p)
-    return classProb
-
-# ============================================================================
-# constants
-# ============================================================================
-
-# Attention: Must be following definition of classifier functions!
-
-CLASSIFIER = {
-    'BaggingLogistic':       bagging_logistic,
-    'Logistic':              logistic,
-    'SimpleLogistic':        simple_logistic,
-    'SMO':                   smo,
-    'RandomForest':          random_forest,
-    'Bayesian':              bayesian,
-    'BaggingSMO':            baggin_smo,
-    'BoostedSimpleLogistic': adaboostM1_simple_logistic
-}
+# this function stores the matrix of class probabilities, with one column per
+# class, in the csv-file or NumPy file (see results.write_probabilities())
+def StoreInCSVProb(CsvFilename,header,ids,data,probs):
+    IDs = [ids.instance(cnt).toString() for cnt in range(0,ids.numInstances())]
+    classAttr = data.classAttribute()
+    classes = [classAttr.value(k) for k in range(0,classAttr.numValues())]
+    results.write_probabilities(CsvFilename,header,IDs,classes,probs)
 
 # ============================================================================
 # main
@@ -566,7 +122,7 @@ def main():
     try:
         opts, args = getopt.getopt(sys.argv[1:], "hr:s:b:p:l:i:j:a:g:x:w",\
             ["help", "trainArff=", "testArff=","bestClassifier=","bestParam=","removeLabel="\
-            ,"trainCSV=","testCSV=","hdrTrain=","hdrTest=","extraParam=","weightFlag"])
+            ,"trainCSV=","testCSV=","hdrTrain=","hdrTest=","extraParam=","weightFlag","modelCache=","dataCache=","numSlots="])
     except getopt.GetoptError, err:
             sys.stderr.write("%s\n" % err)
             return 1
@@ -574,6 +130,10 @@ def main():
     weightFlag = False
     rmClassFlag = False
     removeLabel = 0
+    modelCache = None
+    dataCache = None
+    numSlots = 1
+    numOpts = len(opts)
     for o, a in opts:
         if o in ("-h", "--help"):
             usage()
@@ -601,28 +161,36 @@ def main():
             extraParam = a
         elif o in ("-w","--weightFlag"):
             weightFlag = True
+        elif o == "--modelCache":
+            modelCache = a
+            numOpts = numOpts - 1
+        elif o == "--dataCache":
+            dataCache = preprocess.DataCache(a)
+            numOpts = numOpts - 1
+        elif o == "--numSlots":
+            numSlots = int(a)
+            numOpts = numOpts - 1
         else:
             assert False, "unhandled option"
-    if len(opts) < 9:
+    if numOpts < 9:
         usage()
         return 1
-    # reading training files
-    f = FileReader(trainArff)
-    traindata = Instances(f)
-    # reading testing files
-    f = FileReader(testArff)
-    testdata = Instances(f)
-    # remove and edit train/test data
+    # read and preprocess train/test data
     options = {'idFlag':True, 'weightFlag': weightFlag, 'rmClassFlag': rmClassFlag, 'rmClass': removeLabel}
-    newTrainData, trainIDs = PreprocessData(traindata, options)
-    newTestData,  testIDs  = PreprocessData(testdata,  options)
+    newTrainData, trainIDs = preprocess.load(dataCache, trainArff, options)
+    newTestData,  testIDs  = preprocess.load(dataCache, testArff,  options)
+    # train classifier or load previously trained classifier
+    classifier = classifiers.CLASSIFIER[bestClassifier](newTrainData, splitparams(bestParam), splitparams(extraParam), True)
+    util.set_num_execution_slots(classifier, numSlots)
+    store = None
+    if modelCache: store = models.ModelStore(modelCache)
+    classifier = models.build(store, classifier, newTrainData, trainArff, options)
     # run classifier
-    handler = CLASSIFIER[bestClassifier]
-    trainProb = handler(newTrainData, newTrainData, splitparams(bestParam), splitparams(extraParam))
-    testProb  = handler(newTrainData, newTestData,  splitparams(bestParam), splitparams(extraParam))
+    trainProb = util.get_distributions(classifier, newTrainData)
+    testProb  = util.get_distributions(classifier, newTestData)
     # store results in spreadsheet
-    StoreInCSVProb(trainCSV, hdrTest, trainIDs, trainProb)
-    StoreInCSVProb(testCSV,  hdrTest, testIDs,  testProb)
+    StoreInCSVProb(trainCSV, hdrTest, trainIDs, newTrainData, trainProb)
+    StoreInCSVProb(testCSV,  hdrTest, testIDs,  newTestData,  testProb)
     return 0
 
 # ----------------------------------------------------------------------------
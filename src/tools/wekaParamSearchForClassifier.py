@@ -15,7 +15,6 @@ from gondola import basis
 
 # general imports
 import sys
-import os
 import getopt
 
 # Java general imports
@@ -44,6 +43,15 @@ from gondola.paramsearch.bayesian import *
 from gondola.paramsearch.randomforest import *
 from gondola.paramsearch.simplelogisticadaboost import *
 
+# result tables
+from gondola.paramsearch import results
+
+# grid search modes
+from gondola.paramsearch import util
+
+# preprocessing
+from gondola.paramsearch import preprocess
+
 
 # ============================================================================
 # help
@@ -76,6 +84,18 @@ Options:
   [-w --weightFlag]           If it is used, instances would be weighted according to number of samples in the corresponding class
   [-r --rmClass]              If it is used, all instances specified by this options will be removed from data set
   [-l --listOfClassifiers]     Specify the list of classifiers (Optional)
+  [--dataCache]               Specify a directory in which the preprocessed data is stored and from which it is
+                              loaded if the same arff file was preprocessed before with the same options (Optional)
+  [--numSlots]                Specify the number of threads used to train the members of the Bagging and Random Forest
+                              classifiers in parallel, and to cross-validate the cells of the parameter grids of the
+                              Logistic classifier as well as of the SMO, Simple Logistic, and Random Forest classifiers
+                              in parallel when searched without GridSearch, i.e., for data sets of at most 10 instances
+                              or by successive halving (Optional, default: 1)
+  [--searchMode]              Specify how the parameter grids of the SMO, Logistic, Simple Logistic, and Random Forest
+                              classifiers are searched: "grid" cross-validates all cells, using GridSearch except for
+                              Logistic with MaxIts -1 and data sets of at most 10 instances, while "halving"
+                              evaluates all cells on one fold only and promotes the best quarter of the cells to more
+                              folds until the remaining cells are evaluated on all 10 folds (Optional, default: grid)
 
   
 
@@ -91,108 +111,18 @@ Examples:
 """ % {'EXENAME': basis.exename()}
 
 
-# ============================================================================
-# preprocessing
-# ============================================================================
-
-# ----------------------------------------------------------------------------
-def PreprocessData(Data,option):
-    if (option['idFlag']):    # means that the last attribute is id
-        attributeremove = AttributeRemove()
-        attributeremove.setInvertSelection(Boolean(False))  # remove IDs from dataset
-        attributeremove.setAttributeIndices(String(str(Data.numAttributes())))
-        attributeremove.setInputFormat(Data)
-        Data = Filter.useFilter(Data, attributeremove)
-    # set the class Index - the index of the dependent variable
-    Data.setClassIndex(Data.numAttributes() - 1)
-    # remove of the classes
-    if (option['rmClassFlag']):    # means that instances with specified class label must be removed
-        ClassLabel = option['rmClass']
-        removewithvalues = RemoveWithValues()
-        removewithvalues.setAttributeIndex(String('last'))
-        removewithvalues.setNominalIndices(String(str(ClassLabel)))
-        removewithvalues.setInputFormat(Data)
-        newData = Filter.useFilter(Data, removewithvalues)
-    else:
-        newData = Data
-    if (option['weightFlag']):    # it means that instances should be weighted according to number of samples
-        # if there is only two classes, do it as before
-        if (Data.numClasses()==2):
-            # weight instances with reciprocal weight with number of samples
-            numInstancesC1 = 0
-            numInstancesC2 = 0
-            # get numerical value of the class attribute for the first class because we don't know it
-            classLabel = newData.instance(1).classAttribute()
-            c1 = newData.instance(1).value(classLabel)
-            # find number of instances per class
-            for cnt in range(0,newData.numInstances()):
-                if (newData.instance(cnt).value(classLabel) == c1):
-                    numInstancesC1 = numInstancesC1 + 1
-                else:
-                    numInstancesC2 = numInstancesC2 + 1
-            # calculate weights
-            weightC1 = numInstancesC2 /(numInstancesC2 + numInstancesC1 + 0.0)
-            weightC2 = numInstancesC1 /(numInstancesC2 + numInstancesC1 + 0.0)
-            # assign weight to instances of classes
-            for cnt in range(0,newData.numInstances()):
-                if (newData.instance(cnt).value(classLabel) == c1):
-                    newData.instance(cnt).setWeight(weightC1)
-                else:
-                    newData.instance(cnt).setWeight(weightC2)
-        # if number of class are more than two then .... 
-        elif (Data.numClasses()>2):
-            numClasses = Data.numClasses()
-            stats = Data.attributeStats(Data.classIndex())
-            AttributeStats = stats.nominalCounts
-            classLabels = Data.instance(1).classAttribute()
-            # assign weight to instances of classes
-            cnt = 0
-            sumWeigths = 0.0
-            numInstancesPerClass = {}
-            weightPerClass = {}
-            mapClassLabels = {}
-            for e in classLabels.enumerateValues():
-                numInst = AttributeStats[cnt] + 0.0
-                w = 1.0 / numInst
-                mapClassLabels.update({e:cnt})
-                weightPerClass.update({cnt:w})
-                numInstancesPerClass.update({cnt:numInst})
-                sumWeigths = sumWeigths + w
-                cnt = cnt + 1 
-
-            # normalize weights
-            for k in weightPerClass.keys():
-                weightPerClass[k] = weightPerClass[k]/sumWeigths
-
-            for cnt in range(0,newData.numInstances()):
-                w = weightPerClass[ newData.instance(cnt).value(classLabels) ]
-                newData.instance(cnt).setWeight(w)
-    return newData
-
 # ============================================================================
 # auxiliary functions
 # ============================================================================
 
-# ----------------------------------------------------------------------------
-# this function calls pyxel.py to write csv file
-def WriteCsvFile(CsvFilename,ID,Header,Value):
-    outPath = os.path.dirname(CsvFilename)
-    csvCommand = "pyxel.py "
-    cmdLine = csvCommand + " -d %s  %s  %s  %s -o %s" %\
-         ( '"' + CsvFilename + '"' ,\
-           '"' + ID + '"' ,\
-           '"' + Header + '"' , \
-           '"'  + Value + '"' ,
-           '"'  + outPath + '"')
-    print "Saving results for %s classifier to file %s" % (ID, CsvFilename)
-    basis.execute(cmdLine)
-
 # ----------------------------------------------------------------------------
 # this function takes five arguments and is aware what each class label means
 def StoreInCSVTable(CsvFilename,classifierName,accValue,Description,outParama):
-    WriteCsvFile(CsvFilename, classifierName, 'Accuracy',    str(accValue))
-    WriteCsvFile(CsvFilename, classifierName, 'Description', Description)
-    WriteCsvFile(CsvFilename, classifierName, 'Parameters',  str(outParama))
+    table = results.ResultTable()
+    table.set(classifierName, 'Accuracy',    str(accValue))
+    table.set(classifierName, 'Description', Description)
+    table.set(classifierName, 'Parameters',  str(outParama))
+    table.write(CsvFilename)
 
 # ============================================================================
 # main
@@ -202,7 +132,7 @@ def StoreInCSVTable(CsvFilename,classifierName,accValue,Description,outParama):
 def main():
     try:
         opts, args = getopt.getopt(sys.argv[1:], "ha:c:iwr:l:",\
-            ["help", "arffFile=", "csvFile=","idFlag","weightFlag","rmClass=","listOfClassifiers="])
+            ["help", "arffFile=", "csvFile=","idFlag","weightFlag","rmClass=","listOfClassifiers=","dataCache=","numSlots=","searchMode="])
     except getopt.GetoptError, err:
         usage()
         sys.stderr.write(err + '\n')
@@ -212,6 +142,10 @@ def main():
     rmClassFlag = False
     rmClass = 0
     listOfClassifier = ['Logistic','Bagging Logistic','SMO','Bagging SMO','Simple Logistic','Bayesian','Random Forest']
+    dataCache = None
+    numSlots = 1
+    searchMode = util.SEARCH_MODES[0]
+    numOpts = len(opts)
     for o, a in opts:
         if o in ("-h", "--help"):
             usage()
@@ -229,49 +163,59 @@ def main():
             rmClass = int(float(a))
         elif o in ("-l","--listOfClassifiers"):
             listOfClassifier = [x.strip() for x in a.split(',')]
+        elif o == "--dataCache":
+            dataCache = preprocess.DataCache(a)
+            numOpts = numOpts - 1
+        elif o == "--numSlots":
+            numSlots = int(a)
+            numOpts = numOpts - 1
+        elif o == "--searchMode":
+            searchMode = a.strip().lower()
+            if not searchMode in util.SEARCH_MODES:
+                sys.stderr.write("Invalid search mode: %s! Valid modes are: %s\n" % (a, ', '.join(util.SEARCH_MODES)))
+                return 1
+            numOpts = numOpts - 1
         else:
             assert False, "unhandled option"
-    if len(opts) < 3:
+    if numOpts < 3:
         usage()
         return 1
     # load data file
     print "Loading data..."
     print "-------------- Input arffFile: %s" % arffFile
     print "-------------- Output CsvFile: %s" % CsvFilename
-    # make sure that csv file does not exist there and you are creating it for the first time
-    if os.path.exists(CsvFilename): os.remove(CsvFilename)
-    file = FileReader(arffFile)
-    data = Instances(file)
+    # the rows of previously searched classifiers are kept, those of the
+    # searched classifiers are replaced when the results are merged into the file
     # remove one of the classes andweight instances properly to compensate imbalanced number of intances
     options = {'idFlag':idFlag, 'weightFlag': weightFlag, 'rmClassFlag': rmClassFlag, 'rmClass': rmClass}
-    newData = PreprocessData(data,options)
+    newData, IDs = preprocess.load(dataCache, arffFile, options)
     # Iterate over schmes to find optimal sets of parameters for each classifier
     if ('SMO' in listOfClassifier):
         # ----- SMO
-        OptSMOIsRBF, OptSMO, OptSMOp1, OptSMOp2, OptSMOAcc, Description = SMO_ParamFinder(newData)
+        OptSMOIsRBF, OptSMO, OptSMOp1, OptSMOp2, OptSMOAcc, Description = SMO_ParamFinder(newData, numSlots, searchMode)
         outParam = (OptSMOIsRBF, OptSMOp1, OptSMOp2)
         StoreInCSVTable(CsvFilename,'SMO',OptSMOAcc,Description,outParam)
     if ('Bagging SMO' in listOfClassifier):
         # ----- Bagging SMO
         IsOptBagOnOptSMO, OptBagSMO,  OptBagSMOp1, OptBagSMOp2, OptBagSMOAcc, Description = \
-        BaggingSMO_ParamFinder(newData, OptSMOIsRBF, OptSMOp1, OptSMOp2)
+        BaggingSMO_ParamFinder(newData, OptSMOIsRBF, OptSMOp1, OptSMOp2, numSlots)
         outParam = (IsOptBagOnOptSMO, OptBagSMOp1, OptBagSMOp2)
         StoreInCSVTable(CsvFilename,'Bagging SMO',OptBagSMOAcc,Description,outParam)
     if ('Logistic' in listOfClassifier):
         # ----- Logistic
-        OptLog, OptLogp1, OptLogp2, OptLogAcc, Description = Logistic_ParamFinder(newData)
+        OptLog, OptLogp1, OptLogp2, OptLogAcc, Description = Logistic_ParamFinder(newData, numSlots, searchMode)
         outParam = (OptLogp1, OptLogp2)
         StoreInCSVTable(CsvFilename,'Logistic',OptLogAcc,Description,outParam)
     if ('Bagging Logistic' in listOfClassifier):
         # ----- Bagging Logistic
         IsOptBagOnOptLog, OptBagLog,  OptBagLogp1, OptBagLogp2, OptBagLogAcc, Description  = \
-               BaggingLogistic_ParamFinder(newData, OptLogp1, OptLogp2)
+               BaggingLogistic_ParamFinder(newData, OptLogp1, OptLogp2, numSlots)
         outParam = (IsOptBagOnOptLog, OptBagLogp1, OptBagLogp2)
         StoreInCSVTable(CsvFilename,'Bagging Logistic',OptBagLogAcc,Description,outParam)
     if ('Simple Logistic' in listOfClassifier):
         # ----- Simple Logistic
         OptSimpLog, OptSimpLogp1, OptSimpLogp2, OptSimpLogAcc, Description = \
-               SimpleLogistic_ParamFinder(newData)
+               SimpleLogistic_ParamFinder(newData, numSlots, searchMode)
         outParam = (OptSimpLogp1, OptSimpLogp2)
         StoreInCSVTable(CsvFilename,'Simple Logistic',OptSimpLogAcc,Description,outParam)
     if ('Bayesian' in listOfClassifier):
@@ -281,7 +225,7 @@ def main():
         StoreInCSVTable(CsvFilename,'Bayesian',OptBayesAcc,Description,outParam)
     if ('Random Forest' in listOfClassifier):
         # ----- Find the best parameter for Random-Forest classifier
-        OptRndFrst, OptRndFrstp1, OptRndFrstp2, OptRndFrstAcc, Description = RandomForest_ParamFinder(newData)
+        OptRndFrst, OptRndFrstp1, OptRndFrstp2, OptRndFrstAcc, Description = RandomForest_ParamFinder(newData, numSlots, searchMode)
         outParam = ( OptRndFrstp1, OptRndFrstp2)
         StoreInCSVTable(CsvFilename,'Random Forest',OptRndFrstAcc,Description,outParam)
     return 0
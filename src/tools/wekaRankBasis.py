@@ -63,6 +63,9 @@ import weka.attributeSelection.SymmetricalUncertAttributeEval  as SymmetricalUnc
 # import different search method
 import weka.attributeSelection.Ranker as Ranker
 
+# preprocessing
+from gondola.paramsearch import preprocess
+
 
 
 EXEC_NAME = sys.argv[0]
@@ -97,6 +100,8 @@ Options:
                                   4. ReliefFAttributeRanking
                                   5. SymmetricalUncertAttributeRanking
                                   6. SignificanceAttributeRanking     (Note:  make sure that you have this addon in you CLASSPATH environment variable)
+  [--dataCache]                 Specify a directory in which the preprocessed data is stored and from which it is loaded
+                                if the same arff-file was preprocessed before with the same options (Optional)
 
 
 
@@ -113,84 +118,6 @@ def     str2bool(st):
         return b
 
 
-def	PreprocessData(Data,option):
-	IDs = []
-        if (option['idFlag']):    # means that the last attribute is id
-	    attributeremove = AttributeRemove()
-	    attributeremove.setInvertSelection(Boolean(True))  # remove every attribute but the last one which is ID
-	    attributeremove.setAttributeIndices(String(str(Data.numAttributes())))
-	    attributeremove.setInputFormat(Data)
-	    IDs = Filter.useFilter(Data, attributeremove)
-            attributeremove = AttributeRemove()
-            attributeremove.setInvertSelection(Boolean(False))  # remove IDs from dataset
-            attributeremove.setAttributeIndices(String(str(Data.numAttributes())))
-            attributeremove.setInputFormat(Data)
-            Data = Filter.useFilter(Data, attributeremove)
-	# set the class Index - the index of the dependent variable
-	Data.setClassIndex(Data.numAttributes() - 1)
-	# remove of the classes
-        if (option['rmClassFlag']):    # means that instances with specified class label must be removed
-            ClassLabel = option['rmClass']
-            removewithvalues = RemoveWithValues()
-            removewithvalues.setAttributeIndex(String('last'))
-            removewithvalues.setNominalIndices(String(str(ClassLabel)))
-            removewithvalues.setInputFormat(Data)
-            newData = Filter.useFilter(Data, removewithvalues)
-        else:
-            newData = Data
-        if (option['weightFlag']):    # it means that instances should be weighted according to number of samples
-            # if there is only two classes, do it as before
-            if (Data.numClasses()==2):
-                # weight instances with reciprocal weight with number of samples
-                numInstancesC1 = 0
-                numInstancesC2 = 0
-                # get numerical value of the class attribute for the first class because we don't know it
-                classLabel = newData.instance(1).classAttribute()
-                c1 = newData.instance(1).value(classLabel)
-                # find number of instances per class
-                for   cnt  in   range(0,newData.numInstances()):
-                    if (newData.instance(cnt).value(classLabel) == c1):
-        		numInstancesC1 = numInstancesC1 + 1
-    		    else:
-        		numInstancesC2 = numInstancesC2 + 1
-                # calculate weights
-                weightC1 = numInstancesC2 /(numInstancesC2 + numInstancesC1 + 0.0)
-                weightC2 = numInstancesC1 /(numInstancesC2 + numInstancesC1 + 0.0)
-                # assign weight to instances of classes
-                for cnt in range(0,newData.numInstances()):
-                    if (newData.instance(cnt).value(classLabel) == c1):
-            		newData.instance(cnt).setWeight(weightC1)
-        	    else:
-            		newData.instance(cnt).setWeight(weightC2)
-            # if number of class are more than two then .... 
-            elif (Data.numClasses()>2):
-                numClasses = Data.numClasses()
-                stats = Data.attributeStats(Data.classIndex())
-                AttributeStats = stats.nominalCounts
-                classLabels = Data.instance(1).classAttribute()
-                # assign weight to instances of classes
-                cnt = 0
-                sumWeigths = 0.0
-                numInstancesPerClass = {}
-                weightPerClass = {}
-                mapClassLabels = {}
-                for e in classLabels.enumerateValues():
-                    numInst = AttributeStats[cnt] + 0.0
-                    w = 1.0 / numInst
-                    mapClassLabels.update({e:cnt})
-                    weightPerClass.update({cnt:w})
-                    numInstancesPerClass.update({cnt:numInst})
-                    sumWeigths = sumWeigths + w
-                    cnt = cnt + 1 
-
-                # normalize weights
-                for k in weightPerClass.keys():
-                    weightPerClass[k] = weightPerClass[k]/sumWeigths
-
-                for cnt in range(0,newData.numInstances()):
-                    w = weightPerClass[ newData.instance(cnt).value(classLabels) ]
-                    newData.instance(cnt).setWeight(w)
-	return newData, IDs
 
 
 
@@ -331,7 +258,7 @@ handlerMapping = {'1':InfoGainAttributeRanking,\
 def main():
 	try:
           opts, args = getopt.getopt(sys.argv[1:], "ht:l:m:c:b:r:",\
-      		["help", "trainArff=","removeLabel=","basisLearning=","numChannels=","numBasis=","rankingMethods="])
+      		["help", "trainArff=","removeLabel=","basisLearning=","numChannels=","numBasis=","rankingMethods=","dataCache="])
   
   	except getopt.GetoptError, err:
     		usage()
@@ -340,6 +267,7 @@ def main():
 	weightFlag = False
         rmClassFlag = False
         removeLabel = 0
+        dataCache = None
         rankingMethodList = [handlerMapping['1'],handlerMapping['2'],handlerMapping['3'],handlerMapping['4'],handlerMapping['5']]
         basisLearning = []
         numReqOpt = 0
@@ -365,6 +293,8 @@ def main():
                         if  not((basisLearningMethod==1) or (basisLearningMethod==2)):
                            usage()
                            assert False, "basisLearning should be either 1 or 2 !!!!"
+                elif o == "--dataCache":
+                        dataCache = preprocess.DataCache(a)
                 elif o in ("-r","--rankingMethods"):
                        rankingMethodList = []
                        list = a.split(',')
@@ -383,13 +313,9 @@ def main():
 
 
         # reading training files
-	file = FileReader(trainArff)
-	traindata = Instances(file)
-	#traindata.setClassIndex(traindata.numAttributes() - 2)   # last attribute is ID and one before is class-label
-
-	# remove and edit train/test data
+	# read and preprocess train data, where the last attribute is ID and one before is class-label
 	options = {'idFlag':True, 'weightFlag': False, 'rmClassFlag': rmClassFlag, 'rmClass': removeLabel}
-        newTrainData, trainIDs = PreprocessData(traindata,options)
+        newTrainData, trainIDs = preprocess.load(dataCache, trainArff, options)
 
        
         rankingScores = [] 
@@ -0,0 +1,58 @@
+#! /usr/bin/env python
+
+##############################################################################
+# @file  fakejobstatus.py
+# @brief Stand-in for the job status command of a batch queuing system.
+#
+# The states of the jobs are read from a file with one line "<jobid> <state>"
+# per job which is still known to the scheduler. A line "exit <status>" makes
+# the command fail with the given exit status. Each call is appended to the
+# file <statefile>.calls.
+#
+# Usage: fakejobstatus.py <statefile> <jobid>[,<jobid>...]
+#        fakejobstatus.py --jobstat <statefile> <jobid>
+#
+# In the first form, a line "<jobid> <state>" is printed for each of the
+# known jobs as done by the "jobstatus" command. In the second form, the
+# command exits with status zero if the job is known and neither done nor
+# failed as done by the "jobstat" command.
+#
+# Copyright (c) 2012 University of Pennsylvania. All rights reserved.
+# See http://www.rad.upenn.edu/sbia/software/license.html or COPYING file.
+#
+# Contact: SBIA Group <sbia-software at uphs.upenn.edu>
+##############################################################################
+
+import sys
+
+# ----------------------------------------------------------------------------
+def main(args):
+    jobstat = (args and args[0] == '--jobstat')
+    if jobstat: args = args[1:]
+    if len(args) != 2:
+        sys.stderr.write("Usage: fakejobstatus.py [--jobstat] <statefile> <jobids>\n")
+        return 2
+    (statefile, jobids) = (args[0], args[1].split(','))
+    f = open(statefile + '.calls', 'a')
+    f.write(' '.join(sys.argv[1:]) + '\n')
+    f.close()
+    states = {}
+    status = 0
+    f = open(statefile, 'r')
+    for line in f.readlines():
+        tokens = line.split()
+        if len(tokens) != 2: continue
+        if tokens[0] == 'exit': status = int(tokens[1])
+        else:                   states[tokens[0]] = tokens[1]
+    f.close()
+    if status != 0: return status
+    if jobstat:
+        if states.get(jobids[0], 'done').lower() in ('done', 'cd', 'e', 'eqw', 'failed'): return 1
+        return 0
+    for jobid in jobids:
+        if jobid in states: print "%s %s" % (jobid, states[jobid])
+    return 0
+
+# ----------------------------------------------------------------------------
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
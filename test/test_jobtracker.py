@@ -0,0 +1,167 @@
+#! /usr/bin/env python
+
+##############################################################################
+# @file  test_jobtracker.py
+# @brief Test of the tracking of batch jobs by gondola-crossval.
+#
+# The job states are queried by fakejobstatus.py, which stands in for the job
+# status command of a batch queuing system. The test covers the parsing of
+# the job states, the querying of all jobs at once ("jobstatus") and of each
+# job separately ("jobstat"), and the transitions of the jobs tracked by
+# JobTracker from active to done or failed, including failed queries and the
+# increase of the interval between queries.
+#
+# Copyright (c) 2012 University of Pennsylvania. All rights reserved.
+# See http://www.rad.upenn.edu/sbia/software/license.html or COPYING file.
+#
+# Contact: SBIA Group <sbia-software at uphs.upenn.edu>
+##############################################################################
+
+import os
+import sys
+import imp
+import shutil
+import tempfile
+
+# ----------------------------------------------------------------------------
+failures = 0
+
+# ----------------------------------------------------------------------------
+def check(condition, message):
+    global failures
+    if not condition:
+        sys.stderr.write("FAILED: %s\n" % message)
+        failures = failures + 1
+
+# ----------------------------------------------------------------------------
+def setstates(statefile, lines):
+    f = open(statefile, 'w')
+    f.write('\n'.join(lines) + '\n')
+    f.close()
+
+# ----------------------------------------------------------------------------
+def numcalls(statefile):
+    if not os.path.isfile(statefile + '.calls'): return 0
+    f = open(statefile + '.calls', 'r')
+    try:
+        return len(f.readlines())
+    finally:
+        f.close()
+
+# ----------------------------------------------------------------------------
+def test_parsejobstatus(crossval):
+    stdout = "101 r\n102 Eqw\n103 CD\n104 qw\n105 R+\n"
+    states = crossval.parsejobstatus(stdout, ['101', '102', '103', '104', '105', '106'])
+    check(states == {'101': 'active', '102': 'failed', '103': 'done',
+                     '104': 'active', '105': 'active', '106': 'done'},
+          "parsejobstatus() returned %s" % states)
+    stdout = "101 0.5 job user r\n102 0.5 job user Eqw\n"
+    states = crossval.parsejobstatus(stdout, ['101', '102'], crossval.JOBSTATUS_STATE_COLUMNS['qstat'])
+    check(states == {'101': 'active', '102': 'failed'},
+          "parsejobstatus() of qstat output returned %s" % states)
+
+# ----------------------------------------------------------------------------
+def test_queryjobs(crossval, cfg, statefile):
+    setstates(statefile, ['201 r', '202 failed'])
+    states = crossval.queryjobs(cfg, ['201', '202', '203'])
+    check(states == {'201': 'active', '202': 'failed', '203': 'done'},
+          "queryjobs() returned %s" % states)
+    setstates(statefile, ['exit 1', '201 r'])
+    states = crossval.queryjobs(cfg, ['201', '202'])
+    check(states == {'201': 'active', '202': 'active'},
+          "queryjobs() returned %s when the job status command failed" % states)
+    jobstat = crossval.ConfigParser()
+    jobstat.add_section(crossval.COMMANDS)
+    jobstat.set(crossval.COMMANDS, 'jobstat', cfg.get(crossval.COMMANDS, 'jobstat', 1))
+    setstates(statefile, ['201 r', '202 done'])
+    states = crossval.queryjobs(jobstat, ['201', '202', '203'])
+    check(states == {'201': 'active', '202': 'done', '203': 'done'},
+          "queryjobs() using jobstat command returned %s" % states)
+
+# ----------------------------------------------------------------------------
+def test_jobtracker(crossval, cfg, statefile):
+    jobs = []
+    for jobid in ('301', '302', '303'):
+        job = crossval.Job(crossval.maketask('search', jobid, ['true']))
+        job.jobid = jobid
+        jobs.append(job)
+    tracker = crossval.JobTracker(lambda jobids: crossval.queryjobs(cfg, jobids))
+    for job in jobs: tracker.add(job)
+    calls = numcalls(statefile)
+    # no query before the first interval elapsed
+    setstates(statefile, ['301 r', '302 qw', '303 r'])
+    tracker.poll()
+    check(numcalls(statefile) == calls, "JobTracker queried job states before the interval elapsed")
+    # interval is increased while all jobs are active
+    tracker.nextpoll = 0
+    tracker.poll()
+    check(numcalls(statefile) == calls + 1, "JobTracker did not query job states")
+    check(len(tracker) == 3 and [job for job in jobs if job.state != 'active'] == [],
+          "JobTracker changed state of active jobs")
+    interval = crossval.JOBSTAT_MIN_INTERVAL * crossval.JOBSTAT_BACKOFF
+    check(abs(tracker.interval - interval) < 1e-9,
+          "JobTracker interval is %s instead of %s" % (tracker.interval, interval))
+    # jobs stay active and interval is increased when the query failed
+    setstates(statefile, ['exit 1'])
+    tracker.nextpoll = 0
+    tracker.poll()
+    check(len(tracker) == 3 and [job for job in jobs if job.state != 'active'] == [],
+          "JobTracker changed state of jobs although the job status query failed")
+    interval = interval * crossval.JOBSTAT_BACKOFF
+    check(abs(tracker.interval - interval) < 1e-9,
+          "JobTracker interval is %s instead of %s" % (tracker.interval, interval))
+    # interval does not exceed the maximum
+    setstates(statefile, ['301 r', '302 r', '303 r'])
+    for i in range(30):
+        tracker.nextpoll = 0
+        tracker.poll()
+    check(tracker.interval == crossval.JOBSTAT_MAX_INTERVAL,
+          "JobTracker interval is %s instead of maximum %s" % (tracker.interval, crossval.JOBSTAT_MAX_INTERVAL))
+    # finished jobs are done or failed and interval is reset
+    setstates(statefile, ['302 Eqw', '303 r'])
+    tracker.nextpoll = 0
+    tracker.poll()
+    check(jobs[0].state == 'done', "State of finished job is %s instead of done" % jobs[0].state)
+    check(jobs[1].state == 'failed' and jobs[1].message == "batch job 302 failed",
+          "State of failed job is %s (%s) instead of failed" % (jobs[1].state, jobs[1].message))
+    check(jobs[2].state == 'active', "State of running job is %s instead of active" % jobs[2].state)
+    check(len(tracker) == 1, "JobTracker still tracks %d jobs instead of 1" % len(tracker))
+    check(tracker.interval == crossval.JOBSTAT_MIN_INTERVAL,
+          "JobTracker interval is %s instead of minimum %s" % (tracker.interval, crossval.JOBSTAT_MIN_INTERVAL))
+    # only outstanding jobs are queried
+    setstates(statefile, [])
+    tracker.nextpoll = 0
+    tracker.poll()
+    check(jobs[2].state == 'done' and len(tracker) == 0, "JobTracker did not finish last job")
+    f = open(statefile + '.calls', 'r')
+    last = f.readlines()[-1].split()
+    f.close()
+    check(last[-1] == '303', "JobTracker queried jobs %s instead of 303" % last[-1])
+
+# ----------------------------------------------------------------------------
+def main(crossvalfile, fakejobstatus):
+    crossval = imp.load_source('gondola_crossval', crossvalfile)
+    tmpdir = tempfile.mkdtemp()
+    try:
+        statefile = os.path.join(tmpdir, 'states')
+        setstates(statefile, [])
+        cfg = crossval.ConfigParser()
+        cfg.add_section(crossval.COMMANDS)
+        cfg.set(crossval.COMMANDS, 'jobstatus', '"%s" "%s" "%s" %%(jobids)s' % (sys.executable, fakejobstatus, statefile))
+        cfg.set(crossval.COMMANDS, 'jobstat', '"%s" "%s" --jobstat "%s" %%(jobid)s' % (sys.executable, fakejobstatus, statefile))
+        test_parsejobstatus(crossval)
+        test_queryjobs(crossval, cfg, statefile)
+        test_jobtracker(crossval, cfg, statefile)
+    finally:
+        shutil.rmtree(tmpdir)
+    if failures > 0:
+        sys.stderr.write("%d checks failed\n" % failures)
+        return 1
+    return 0
+
+# ----------------------------------------------------------------------------
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.stderr.write("Usage: %s <gondola-crossval> <fakejobstatus.py>\n" % sys.argv[0])
+        sys.exit(1)
+    sys.exit(main(sys.argv[1], sys.argv[2]))
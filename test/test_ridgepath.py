@@ -0,0 +1,57 @@
+#! /usr/bin/env jython
+
+##############################################################################
+# @file  test_ridgepath.py
+# @brief Regression test of the ridge path of the Logistic parameter search.
+#
+# The accuracies computed by ridgepath.cross_validate_path() must equal those
+# of Weka's Logistic classifier cross-validated by util.cross_validate() on
+# the same folds. The test dataset has 150 instances of three overlapping
+# classes, a nominal attribute, and missing values.
+#
+# Copyright (c) 2012 University of Pennsylvania. All rights reserved.
+# See http://www.rad.upenn.edu/sbia/software/license.html or COPYING file.
+#
+# Contact: SBIA Group <sbia-software at uphs.upenn.edu>
+##############################################################################
+
+import sys
+
+import weka.classifiers.functions.Logistic as Logistic
+
+from gondola.paramsearch import preprocess
+from gondola.paramsearch import ridgepath
+from gondola.paramsearch import util
+
+# ----------------------------------------------------------------------------
+# ridge values of the path, i.e., down to 1e-4, where both optimizers converge
+# to the same coefficients, and smaller ones which are fitted by Logistic
+RBounds = [-6,2,1]
+
+# ----------------------------------------------------------------------------
+def main(arffFile):
+    options = {'idFlag': True, 'rmClassFlag': False, 'rmClass': -1, 'weightFlag': False}
+    (data, IDs) = preprocess.load(None, arffFile, options)
+    if not ridgepath.supported(data):
+        sys.stderr.write("Dataset %s has too many attributes for the ridge path\n" % arffFile)
+        return 1
+    exponents = range(RBounds[0],RBounds[1]+RBounds[2],RBounds[2])
+    path = ridgepath.cross_validate_path(data, [pow(10,r) for r in exponents])
+    failed = 0
+    for i in range(len(exponents)):
+        logistic = Logistic()
+        logistic.setRidge(pow(10,exponents[i]))
+        acc = util.cross_validate(logistic, data)
+        print "Ridge = 10^%d: path accuracy = %f, Logistic accuracy = %f" % (exponents[i], path[i], acc)
+        if abs(path[i] - acc) > 1e-6: failed = failed + 1
+    if failed > 0:
+        sys.stderr.write("Accuracies of %d ridge values differ\n" % failed)
+        return 1
+    return 0
+
+# ----------------------------------------------------------------------------
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        sys.stderr.write("Usage: %s <arff file>\n" % sys.argv[0])
+        sys.exit(1)
+    sys.exit(main(sys.argv[1]))